@@ -1,15 +1,32 @@
-import boto3
+import asyncio
+import functools
+import hashlib
 import json
 import logging
-from botocore.config import Config
-from typing import Any, Dict, List, Optional, Union
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
 from neo4j_graphrag.types import LLMMessage
 from neo4j_graphrag.message_history import MessageHistory
+from .client_pool import ClientPool, default_client_pool
+from .response_cache import DiskResponseCache, InMemoryResponseCache
+from .retry import CLIENT_ERROR, THROTTLING, AdaptiveConcurrencyLimiter, backoff_delay, classify_error
 
 import time
 
 logger = logging.getLogger(__name__)
 
+# Put in a prompt after its stable part (instructions, schema, examples): with prompt
+# caching on, the text before it becomes a cache breakpoint, so later calls sharing it
+# read it from the cache instead of processing it again. The marker is never sent.
+PROMPT_CACHE_BREAKPOINT = "\x00CACHE_BREAKPOINT\x00"
+
+# Bedrock accepts at most 4 cache breakpoints per request
+MAX_CACHE_BREAKPOINTS = 4
+
+_USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
 
 class Claude:
     def __init__(
@@ -18,16 +35,47 @@ class Claude:
         max_retries: int = 10,
         default_max_tokens: int = 20000,
         default_temperature: float = 0.0,
-        aws_region: str = "us-west-2",
+        aws_region: Optional[str] = None,
         experimenting: bool = False,
+        max_concurrency: int = 8,
+        response_cache: Optional[Union[InMemoryResponseCache, DiskResponseCache]] = None,
+        call_timeout: float = 900.0,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        client_pool: Optional[ClientPool] = None,
+        prompt_caching: bool = True,
+        stream_history_size: int = 1000,
     ):
-        config = Config(read_timeout=read_timeout)
-        self.bedrock_client = boto3.client(service_name="bedrock-runtime", config=config, region_name=aws_region)
+        # the boto3 client is shared through the pool and only built on the first call
+        self.client_pool = client_pool or default_client_pool()
+        self.aws_region = aws_region
+        self.read_timeout = read_timeout
         self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        # boto3 has no native asyncio client, so async calls are offloaded to this
+        # executor; its size is the in-flight limit for agenerate_response.
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bedrock-claude")
+        # shrinks the number of in-flight requests when Bedrock throttles, grows it back on success
+        self.limiter = AdaptiveConcurrencyLimiter(max_limit=max_concurrency)
+        self.call_timeout = call_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
         self.default_max_tokens = default_max_tokens
         self.default_temperature = default_temperature
         self.experimenting = experimenting
+        self.response_cache = response_cache
         self.prompts_experiment: List[Dict[str, Any]] = []
+        # only the latest streams are kept, so a long-lived server doesn't grow it forever;
+        # `stream_stats` holds the totals over every stream
+        self.stream_history: Deque[Dict[str, Any]] = deque(maxlen=stream_history_size)
+        self._stream_totals = {"streams": 0, "cached": 0, "time_to_first_token": 0.0, "total_latency": 0.0}
+        # system prompts and the text before PROMPT_CACHE_BREAKPOINT are marked for Bedrock's
+        # prompt cache; prefixes shorter than the model minimum (1024 tokens for Sonnet) are
+        # simply not cached. Turn off for models without prompt caching support.
+        self.prompt_caching = prompt_caching
+        # token counts reported by Bedrock, summed over calls
+        self.usage: Dict[str, int] = {"calls": 0, **{field: 0 for field in _USAGE_FIELDS}}
+        self._usage_lock = threading.Lock()
 
     def _experiment_wrapper(self, func) -> Optional[str]:
         def wrapper(*args, **kwargs):
@@ -47,43 +95,103 @@ class Claude:
 
         return wrapper # type: ignore
 
+    @property
+    def bedrock_client(self):
+        return self.client_pool.get(
+            "bedrock-runtime", self.aws_region, max_pool_connections=self.max_concurrency, read_timeout=self.read_timeout
+        )
+
     @property
     def experiment_history(self) -> List[Dict[str, Any]]:
         return self.prompts_experiment
 
-    def _invoke_model(self, prompt_config: dict, model_id: str) -> Optional[str]:
-        retries = 0
-        while retries < self.max_retries:
+    def _with_retries(self, call: Callable[[], Any]) -> Any:
+        """
+        Run `call` while holding a concurrency slot, retrying throttling, timeouts and
+        server errors with exponential backoff and jitter until `max_retries` attempts or
+        `call_timeout` seconds are used. Client errors (validation, access, bad input)
+        are not retried. Returns None when the call did not succeed.
+        """
+        deadline = time.monotonic() + self.call_timeout
+        attempt = 0
+        while True:
+            if not self.limiter.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                logger.error("Timed out waiting for a free request slot.")
+                return None
             try:
-                body = json.dumps(prompt_config)
-                response = self.bedrock_client.invoke_model(
-                    body=body,
-                    modelId=model_id,
-                    accept="application/json",
-                    contentType="application/json",
-                )
-                response_body = json.loads(response["body"].read())
-                if "content" in response_body and len(response_body["content"]) > 0:
-                    return response_body["content"][0]["text"]
-                else:
-                    logger.warning(f"Unexpected response format: {response_body}")
-                    return None
+                result = call()
+                self.limiter.on_success()
+                return result
             except Exception as e:
-                logger.error(f"Error invoking model: {e}")
-                retries += 1
-        logger.error(f"Failed to invoke model after {self.max_retries} retries.")
-        return None
+                error_kind = classify_error(e)
+                if error_kind == THROTTLING:
+                    self.limiter.on_throttle()
+                logger.error(f"Error invoking model ({error_kind}): {e}")
+            finally:
+                self.limiter.release()
 
-    def generate_response(
+            if error_kind == CLIENT_ERROR:
+                logger.error("Not retrying non-retryable error.")
+                return None
+            attempt += 1
+            if attempt >= self.max_retries:
+                logger.error(f"Failed to invoke model after {self.max_retries} retries.")
+                return None
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+            if time.monotonic() + delay > deadline:
+                logger.error(f"Giving up after {attempt} attempts: call deadline of {self.call_timeout}s reached.")
+                return None
+            time.sleep(delay)
+
+    def _record_usage(self, usage: Dict[str, Any], calls: int = 1):
+        with self._usage_lock:
+            self.usage["calls"] += calls
+            for field in _USAGE_FIELDS:
+                self.usage[field] += usage.get(field) or 0
+        if usage.get("cache_read_input_tokens") or usage.get("cache_creation_input_tokens"):
+            logger.debug(
+                f"Prompt cache: {usage.get('cache_read_input_tokens') or 0} tokens read, "
+                f"{usage.get('cache_creation_input_tokens') or 0} written"
+            )
+
+    def cache_hit_rate(self) -> float:
+        """Share of the input tokens that were read from the prompt cache."""
+        with self._usage_lock:
+            cached = self.usage["cache_read_input_tokens"]
+            total = cached + self.usage["cache_creation_input_tokens"] + self.usage["input_tokens"]
+        return cached / total if total else 0.0
+
+    def _invoke_model(self, prompt_config: dict, model_id: str) -> Optional[str]:
+        body = json.dumps(prompt_config)
+
+        def call():
+            response = self.bedrock_client.invoke_model(
+                body=body,
+                modelId=model_id,
+                accept="application/json",
+                contentType="application/json",
+            )
+            return json.loads(response["body"].read())
+
+        response_body = self._with_retries(call)
+        if response_body is None:
+            return None
+        self._record_usage(response_body.get("usage") or {})
+        if "content" in response_body and len(response_body["content"]) > 0:
+            return response_body["content"][0]["text"]
+        else:
+            logger.warning(f"Unexpected response format: {response_body}")
+            return None
+
+    def _build_prompt_config(
         self,
         prompt: str,
-        system_prompt: str = None,  # type: ignore
-        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,  # type: ignore
-        model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-        max_tokens: int = None,  # type: ignore
-        temperature: float = None,  # type: ignore
-        stop_sequences: List[str] = None,  # type: ignore
-    ) -> Optional[str]:
+        system_prompt: Optional[str],
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+        stop_sequences: Optional[List[str]],
+    ) -> dict:
         max_tokens = max_tokens or self.default_max_tokens
         temperature = temperature or self.default_temperature
 
@@ -94,7 +202,15 @@ class Claude:
             "messages": [{"role": "user", "content": []}],
         }
 
-        prompt_config["messages"][0]["content"].append({"type": "text", "text": prompt})  # type: ignore
+        breakpoints = MAX_CACHE_BREAKPOINTS
+        if system_prompt:
+            if self.prompt_caching:
+                prompt_config["system"] = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+                breakpoints -= 1
+            else:
+                prompt_config["system"] = system_prompt
+
+        prompt_config["messages"][0]["content"] = self._content_blocks(prompt, breakpoints)  # type: ignore
 
         if message_history:
             for message in message_history:
@@ -107,21 +223,216 @@ class Claude:
                     }
                 )
 
-        if system_prompt:
-            prompt_config["system"] = system_prompt
-
         if stop_sequences:
             prompt_config["stop_sequences"] = stop_sequences # type: ignore
 
-        return (
+        return prompt_config
+
+    def request_body(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+    ) -> dict:
+        """The InvokeModel request body of a single-turn call, e.g. for a batch inference record."""
+        return self._build_prompt_config(prompt, system_prompt, None, max_tokens, temperature, None)
+
+    def _content_blocks(self, prompt: str, breakpoints: int) -> List[Dict[str, Any]]:
+        """
+        Split `prompt` at PROMPT_CACHE_BREAKPOINT into text blocks; with prompt caching on,
+        each block followed by a marker (up to `breakpoints` of them) gets a cache_control.
+        """
+        parts = prompt.split(PROMPT_CACHE_BREAKPOINT)
+        blocks: List[Dict[str, Any]] = []
+        for i, part in enumerate(parts):
+            if not part:
+                continue
+            block: Dict[str, Any] = {"type": "text", "text": part}
+            if self.prompt_caching and i < len(parts) - 1 and breakpoints > 0:
+                block["cache_control"] = {"type": "ephemeral"}
+                breakpoints -= 1
+            blocks.append(block)
+        return blocks or [{"type": "text", "text": ""}]
+
+    def generate_response(
+        self,
+        prompt: str,
+        system_prompt: str = None,  # type: ignore
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,  # type: ignore
+        model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        max_tokens: int = None,  # type: ignore
+        temperature: float = None,  # type: ignore
+        stop_sequences: List[str] = None,  # type: ignore
+        use_cache: bool = True,
+    ) -> Optional[str]:
+        prompt_config = self._build_prompt_config(
+            prompt, system_prompt, message_history, max_tokens, temperature, stop_sequences
+        )
+
+        cache_key = None
+        if self.response_cache is not None and use_cache:
+            cache_key = self._cache_key(prompt_config, model_id)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit")
+                return cached
+
+        response = (
             self._invoke_model(prompt_config, model_id)
             if not self.experimenting
             else self._experiment_wrapper(self._invoke_model)(prompt_config, model_id) # type: ignore
         )
 
+        if cache_key is not None and response is not None:
+            self.response_cache.put(cache_key, response)  # type: ignore
+        return response
+
+    def generate_response_stream(
+        self,
+        prompt: str,
+        system_prompt: str = None,  # type: ignore
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,  # type: ignore
+        model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        max_tokens: int = None,  # type: ignore
+        temperature: float = None,  # type: ignore
+        stop_sequences: List[str] = None,  # type: ignore
+        use_cache: bool = True,
+    ) -> Iterator[str]:
+        """
+        Streaming version of generate_response: yields text as the model produces it.
+
+        Opening the stream is retried like a regular call; once tokens flow, errors are raised.
+        Time to first token and total latency of each call are logged, kept in
+        `stream_history` (the latest `stream_history_size` calls) and summarized by
+        `stream_stats`; the token counts are added to `usage`. A response cache hit is
+        yielded as a single piece.
+        """
+        prompt_config = self._build_prompt_config(
+            prompt, system_prompt, message_history, max_tokens, temperature, stop_sequences
+        )
+        start_time = time.perf_counter()
+
+        cache_key = None
+        if self.response_cache is not None and use_cache:
+            cache_key = self._cache_key(prompt_config, model_id)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit")
+                self._record_stream(model_id, start_time, start_time, len(cached), cached=True)
+                yield cached
+                return
+
+        body = json.dumps(prompt_config)
+        response = self._with_retries(
+            lambda: self.bedrock_client.invoke_model_with_response_stream(
+                body=body,
+                modelId=model_id,
+                accept="application/json",
+                contentType="application/json",
+            )
+        )
+        if response is None:
+            raise RuntimeError("Failed to open response stream.")
+
+        first_token_time = None
+        parts: List[str] = []
+        for text in self.generate_stream(response["body"]):
+            if first_token_time is None:
+                first_token_time = time.perf_counter()
+            parts.append(text)
+            yield text
+
+        full_response = "".join(parts)
+        self._record_stream(model_id, start_time, first_token_time, len(full_response))
+        if cache_key is not None and full_response:
+            self.response_cache.put(cache_key, full_response)  # type: ignore
+
+    def _record_stream(
+        self, model_id: str, start_time: float, first_token_time: Optional[float], chars: int, cached: bool = False
+    ):
+        end_time = time.perf_counter()
+        metrics = {
+            "model_id": model_id,
+            "time_to_first_token": (first_token_time or end_time) - start_time,
+            "total_latency": end_time - start_time,
+            "chars": chars,
+            "cached": cached,
+        }
+        with self._usage_lock:
+            self.stream_history.append(metrics)
+            self._stream_totals["streams"] += 1
+            self._stream_totals["cached"] += int(cached)
+            self._stream_totals["time_to_first_token"] += metrics["time_to_first_token"]
+            self._stream_totals["total_latency"] += metrics["total_latency"]
+        logger.info(
+            f"Stream finished: time to first token {metrics['time_to_first_token']:.2f}s, "
+            f"total {metrics['total_latency']:.2f}s"
+        )
+
+    def stream_stats(self) -> Dict[str, Any]:
+        """
+        Streams so far (and how many were response cache hits), their mean time to first
+        token and total latency, and the p50/p95 of both over the latest `stream_history`.
+        """
+        with self._usage_lock:
+            totals = dict(self._stream_totals)
+            recent = list(self.stream_history)
+        streams = totals["streams"]
+        stats: Dict[str, Any] = {"streams": streams, "cached": totals["cached"]}
+        for name in ("time_to_first_token", "total_latency"):
+            values = sorted(metrics[name] for metrics in recent)
+            stats[f"{name}_mean_s"] = round(totals[name] / streams, 3) if streams else 0.0
+            for label, fraction in (("p50", 0.5), ("p95", 0.95)):
+                stats[f"{name}_{label}_s"] = round(values[min(len(values) - 1, int(fraction * len(values)))], 3) if values else 0.0
+        return stats
+
+    @staticmethod
+    def _cache_key(prompt_config: dict, model_id: str) -> str:
+        """
+        Hash everything that determines the answer: model, system prompt, messages,
+        max_tokens, temperature and stop sequences.
+        """
+        payload = json.dumps({"model_id": model_id, **prompt_config}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def agenerate_response(
+        self,
+        prompt: str,
+        system_prompt: str = None,  # type: ignore
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,  # type: ignore
+        model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        max_tokens: int = None,  # type: ignore
+        temperature: float = None,  # type: ignore
+        stop_sequences: List[str] = None,  # type: ignore
+        use_cache: bool = True,
+    ) -> Optional[str]:
+        """
+        Asynchronous version of generate_response.
+
+        The blocking Bedrock call runs on the client's executor, so the event loop stays
+        free and at most `max_concurrency` requests are in flight at once.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(
+                self.generate_response,
+                prompt,
+                system_prompt=system_prompt,
+                message_history=message_history,
+                model_id=model_id,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stop_sequences=stop_sequences,
+                use_cache=use_cache,
+            ),
+        )
+
     def generate_stream(self, response):
         """
-        Generates the response by yielding text from the API response when using streaming
+        Generates the response by yielding text from the API response when using streaming.
+        The token counts of the message_start and message_delta events are added to `usage`.
 
         Args:
             response: The API response.
@@ -129,10 +440,16 @@ class Claude:
         Yields:
             str: The text extracted from the response.
         """
+        usage: Dict[str, Any] = {}
         for event in response:
             chunk = event.get("chunk")
             if chunk:
                 data = json.loads(chunk.get("bytes").decode())
-                if "content_block_delta" in data["type"] and "text" in data["delta"]:
+                if data["type"] == "message_start":
+                    usage.update(data["message"].get("usage") or {})
+                elif data["type"] == "message_delta":
+                    usage.update(data.get("usage") or {})
+                elif "content_block_delta" in data["type"] and "text" in data["delta"]:
                     text = data["delta"]["text"]
                     yield text
+        self._record_usage(usage)
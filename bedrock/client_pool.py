@@ -0,0 +1,109 @@
+""" This module provides a shared, lazily built registry of boto3 clients. """
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGION = "us-west-2"
+
+
+def default_region() -> str:
+    """The region of Bedrock calls: BEDROCK_REGION, else the usual AWS variables, else us-west-2."""
+    return os.getenv("BEDROCK_REGION") or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or DEFAULT_REGION
+
+
+class ClientPool:
+    """
+    A registry of boto3 clients shared by everything that talks to AWS, so the Claude and
+    embedding clients of a process reuse one set of warm HTTP connections per region.
+
+    Clients are built on first use (boto3 is not even imported before that), one per
+    (service, region, read timeout). Each caller states the connection pool size it needs
+    (typically its number of parallel workers); when a caller needs more connections than
+    the current client has, the client is rebuilt with the larger pool. Callers should
+    therefore ask the pool for the client on every use instead of keeping it.
+
+    Attributes:
+        max_pool_connections (int): Minimum HTTP connections per client (urllib3's default is 10).
+        tcp_keepalive (bool): Enable TCP keep-alive on the connections, so idle connections
+            to Bedrock survive between calls.
+        read_timeout (int): Default read timeout in seconds.
+        connect_timeout (int): Connect timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int = 50,
+        tcp_keepalive: bool = True,
+        read_timeout: int = 1000,
+        connect_timeout: int = 10,
+    ):
+        self.max_pool_connections = max_pool_connections
+        self.tcp_keepalive = tcp_keepalive
+        self.read_timeout = read_timeout
+        self.connect_timeout = connect_timeout
+        self._clients: Dict[Tuple[str, str, int], Tuple[Any, int]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "rebuilt": 0}
+
+    def _build(self, service: str, region: str, read_timeout: int, pool_connections: int):
+        import boto3
+        from botocore.config import Config
+
+        config = Config(
+            read_timeout=read_timeout,
+            connect_timeout=self.connect_timeout,
+            max_pool_connections=pool_connections,
+            tcp_keepalive=self.tcp_keepalive,
+        )
+        return boto3.client(service_name=service, config=config, region_name=region)
+
+    def get(
+        self,
+        service: str = "bedrock-runtime",
+        region: Optional[str] = None,
+        max_pool_connections: int = 0,
+        read_timeout: Optional[int] = None,
+    ):
+        """
+        The shared client of `service` in `region` (default_region() if None), with at least
+        `max_pool_connections` connections.
+        """
+        key = (service, region or default_region(), read_timeout or self.read_timeout)
+        needed = max(max_pool_connections, self.max_pool_connections)
+        entry = self._clients.get(key)
+        if entry is not None and entry[1] >= needed:
+            return entry[0]
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[1] >= needed:
+                return entry[0]
+            client = self._build(*key, needed)
+            self._clients[key] = (client, needed)
+            self.stats["rebuilt" if entry is not None else "created"] += 1
+            logger.info(f"Created {key[0]} client for {key[1]} with {needed} connections")
+            return client
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+_default_pool: Optional[ClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_client_pool() -> ClientPool:
+    """
+    The process-wide ClientPool. Its minimum pool size can be set with the
+    BEDROCK_MAX_POOL_CONNECTIONS environment variable.
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ClientPool(max_pool_connections=int(os.getenv("BEDROCK_MAX_POOL_CONNECTIONS", "50")))
+    return _default_pool
@@ -0,0 +1,235 @@
+""" This module provides a persistent, content-addressed cache for embedding vectors. """
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    An on-disk embedding cache keyed by (model_id, dimension, sha256 of the text).
+
+    Vectors are stored as float32 rows of memory-mapped files (one file per vector
+    length), and a SQLite database maps each key to its row. When the stored vectors
+    exceed `max_size_mb`, the least recently used entries are evicted and their rows
+    are reused.
+
+    Attributes:
+        path (str): Directory holding the index database and vector files.
+        max_size_mb (float): Size limit of the stored vectors, in megabytes.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups not found in the cache.
+    """
+
+    def __init__(self, path: str = ".cache/embeddings", max_size_mb: float = 512):
+        """
+        Initialize the EmbeddingCache instance.
+
+        Args:
+            path (str): Directory holding the cache files. Created if missing.
+            max_size_mb (float): Size limit of the stored vectors. Defaults to 512 MB.
+        """
+        self.path = path
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors: Dict[int, np.memmap] = {}
+
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                model_id TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector_dim INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model_id, dimension, text_hash)
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS free_slots (
+                vector_dim INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                PRIMARY KEY (vector_dim, slot)
+            );
+            CREATE TABLE IF NOT EXISTS slot_counters (
+                vector_dim INTEGER PRIMARY KEY,
+                next_slot INTEGER NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _vector_file(self, vector_dim: int, min_rows: int) -> np.memmap:
+        """Return the memory map for `vector_dim`, growing the file to hold `min_rows` rows."""
+        vectors = self._vectors.get(vector_dim)
+        if vectors is not None and vectors.shape[0] >= min_rows:
+            return vectors
+
+        file_path = os.path.join(self.path, f"vectors-{vector_dim}.f32")
+        row_bytes = vector_dim * 4
+        rows = os.path.getsize(file_path) // row_bytes if os.path.exists(file_path) else 0
+        if rows < min_rows:
+            if vectors is not None:
+                vectors.flush()
+            rows = max(min_rows, rows * 2, 1024)
+            with open(file_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        vectors = np.memmap(file_path, dtype=np.float32, mode="r+", shape=(rows, vector_dim))
+        self._vectors[vector_dim] = vectors
+        return vectors
+
+    def get(self, model_id: str, dimension: int, text: str) -> Optional[list]:
+        """
+        Look up the embedding of `text`.
+
+        Returns:
+            list: The cached embedding vector, or None on a miss.
+        """
+        return self.get_many(model_id, dimension, [text])[0]
+
+    def get_many(self, model_id: str, dimension: int, texts: List[str]) -> List[Optional[list]]:
+        """
+        Look up the embeddings of several texts.
+
+        Returns:
+            list: One cached vector (or None on a miss) per input text.
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        results: List[Optional[list]] = [None] * len(texts)
+        now = time.time()
+        with self._lock:
+            found: Dict[str, Tuple[int, int]] = {}
+            for start in range(0, len(hashes), 500):
+                batch = list(set(hashes[start:start + 500]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT text_hash, vector_dim, slot FROM entries "
+                    f"WHERE model_id = ? AND dimension = ? AND text_hash IN ({placeholders})",
+                    [model_id, dimension, *batch],
+                ).fetchall()
+                found.update({row[0]: (row[1], row[2]) for row in rows})
+
+            for i, h in enumerate(hashes):
+                if h in found:
+                    vector_dim, slot = found[h]
+                    results[i] = self._vector_file(vector_dim, 0)[slot].tolist()
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+            if found:
+                self._db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE model_id = ? AND dimension = ? AND text_hash = ?",
+                    [(now, model_id, dimension, h) for h in found],
+                )
+                self._db.commit()
+        return results
+
+    def put(self, model_id: str, dimension: int, text: str, vector: list):
+        """Store the embedding of `text`."""
+        self.put_many(model_id, dimension, [text], [vector])
+
+    def put_many(self, model_id: str, dimension: int, texts: List[str], vectors: List[list]):
+        """Store the embeddings of several texts, then evict entries over the size limit."""
+        now = time.time()
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vector_dim = len(vector)
+                key = (model_id, dimension, self.text_hash(text))
+                row = self._db.execute(
+                    "SELECT vector_dim, slot FROM entries WHERE model_id = ? AND dimension = ? AND text_hash = ?",
+                    key,
+                ).fetchone()
+                if row and row[0] == vector_dim:
+                    slot = row[1]
+                else:
+                    if row:
+                        self._free_slot(row[0], row[1])
+                    slot = self._allocate_slot(vector_dim)
+                self._vector_file(vector_dim, slot + 1)[slot] = np.asarray(vector, dtype=np.float32)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, vector_dim, slot, now),
+                )
+            for vectors in self._vectors.values():
+                vectors.flush()
+            self._evict()
+            self._db.commit()
+
+    def _allocate_slot(self, vector_dim: int) -> int:
+        row = self._db.execute(
+            "SELECT slot FROM free_slots WHERE vector_dim = ? ORDER BY slot LIMIT 1", (vector_dim,)
+        ).fetchone()
+        if row:
+            self._db.execute("DELETE FROM free_slots WHERE vector_dim = ? AND slot = ?", (vector_dim, row[0]))
+            return row[0]
+        row = self._db.execute("SELECT next_slot FROM slot_counters WHERE vector_dim = ?", (vector_dim,)).fetchone()
+        slot = row[0] if row else 0
+        self._db.execute("INSERT OR REPLACE INTO slot_counters VALUES (?, ?)", (vector_dim, slot + 1))
+        return slot
+
+    def _free_slot(self, vector_dim: int, slot: int):
+        self._db.execute("INSERT OR IGNORE INTO free_slots VALUES (?, ?)", (vector_dim, slot))
+
+    def _evict(self):
+        """Drop least recently used entries until the stored vectors fit in `max_size_mb`."""
+        max_bytes = self.max_size_mb * 1024 * 1024
+        size = self._size_bytes()
+        if size <= max_bytes:
+            return
+        evicted = 0
+        for model_id, dimension, text_hash, vector_dim, slot in self._db.execute(
+            "SELECT model_id, dimension, text_hash, vector_dim, slot FROM entries ORDER BY last_used"
+        ).fetchall():
+            if size <= max_bytes:
+                break
+            self._db.execute(
+                "DELETE FROM entries WHERE model_id = ? AND dimension = ? AND text_hash = ?",
+                (model_id, dimension, text_hash),
+            )
+            self._free_slot(vector_dim, slot)
+            size -= vector_dim * 4
+            evicted += 1
+        logger.info(f"Evicted {evicted} embeddings from cache")
+
+    def _size_bytes(self) -> int:
+        row = self._db.execute("SELECT COALESCE(SUM(vector_dim), 0) FROM entries").fetchone()
+        return row[0] * 4
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size_bytes = self._size_bytes()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            for vectors in self._vectors.values():
+                vectors.flush()
+            self._vectors.clear()
+            self._db.close()
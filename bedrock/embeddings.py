@@ -1,7 +1,29 @@
 """ This module provides a class to interact with the embedding model. """
 
-import boto3
+import asyncio
 import json
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .client_pool import ClientPool, default_client_pool
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatchError(Exception):
+    """
+    Raised when some texts of a batch could not be embedded.
+
+    Attributes:
+        embeddings (list): The batch results in input order, None where embedding failed.
+        errors (dict): The exception raised for each failed input index.
+    """
+
+    def __init__(self, embeddings: List[Optional[list]], errors: Dict[int, Exception]):
+        self.embeddings = embeddings
+        self.errors = errors
+        super().__init__(f"Failed to embed {len(errors)} of {len(embeddings)} texts (indices: {sorted(errors)})")
 
 
 class EmbeddingModel:
@@ -15,30 +37,50 @@ class EmbeddingModel:
         provider (str): The provider of the embedding model.
         model_id (str): The ID of the embedding model.
         kwargs (dict): Additional keyword arguments.
-        bedrock_client (boto3.client): The Bedrock client object.
+        bedrock_client (boto3.client): The Bedrock client object, taken from the client pool.
     """
 
-    def __init__(self, provider: str = "bedrock", *kwargs):
+    def __init__(
+        self,
+        provider: str = "bedrock",
+        *kwargs,
+        max_pool_connections: int = 10,
+        aws_region: Optional[str] = None,
+        client_pool: Optional[ClientPool] = None,
+    ):
         """
         Initialize the EmbeddingModel instance.
 
         Args:
             provider (str): The provider of the embedding model. Defaults to "bedrock".
             *kwargs: Additional keyword arguments.
+            max_pool_connections (int): HTTP connection pool size; should be at least the
+                number of parallel workers used by embed_texts. Defaults to 10.
+            aws_region (Optional[str]): Region of the model. Defaults to default_region().
+            client_pool (Optional[ClientPool]): Pool the client is taken from. Defaults to
+                the process-wide pool, shared with Claude.
         """
         self.provider = provider
         self.kwargs = kwargs
-        self.bedrock_client = self._initialize_client()
+        self.max_pool_connections = max_pool_connections
+        self.aws_region = aws_region
+        self.client_pool = client_pool or default_client_pool()
+        if provider != "bedrock":
+            raise ValueError("Unsupported provider")
+
+    @property
+    def bedrock_client(self):
+        # built on first use, so creating the model costs nothing at import time
+        return self._initialize_client()
 
     def _init_bedrock_client(self):
         """
-        Initialize and return a Bedrock client.
+        Return the shared Bedrock client.
 
         Returns:
-            boto3.client: The initialized Bedrock client.
+            boto3.client: The Bedrock client of the region.
         """
-        bedrock_client = boto3.client(service_name="bedrock-runtime", region_name="us-west-2")
-        return bedrock_client
+        return self.client_pool.get("bedrock-runtime", self.aws_region, max_pool_connections=self.max_pool_connections)
 
     def _initialize_client(self):
         """
@@ -57,21 +99,22 @@ class EmbeddingModel:
             raise ValueError("Unsupported provider")
 
     # returns an embedding vector for the given text
-    def embed_text(self, text, model_id: str = "amazon.titan-embed-text-v2:0") -> list:
+    def embed_text(self, text, model_id: str = "amazon.titan-embed-text-v2:0", dimensions: Optional[int] = None) -> list:
         """
         Embed the given text using the embedding model.
 
         Args:
             text (str): The text to embed.
+            dimensions (int): Output vector size, for models that support it (e.g. Titan v2).
+                The model default is used when not given.
 
         Returns:
             list: The embedding vector.
         """
-        body = json.dumps(
-            {
-                "inputText": text,
-            }
-        )
+        request = {"inputText": text}
+        if dimensions:
+            request["dimensions"] = dimensions
+        body = json.dumps(request)
 
         # Invoke model
         response = self.bedrock_client.invoke_model(
@@ -86,6 +129,102 @@ class EmbeddingModel:
 
         return embedding
 
+    def embed_texts(
+        self,
+        texts: List[str],
+        model_id: str = "amazon.titan-embed-text-v2:0",
+        executor: Optional[Executor] = None,
+        max_workers: int = 8,
+        max_retries: int = 2,
+        raise_on_error: bool = True,
+        dimensions: Optional[int] = None,
+    ) -> List[Optional[list]]:
+        """
+        Embed many texts in parallel, one request per text, keeping the input order.
+
+        Texts that fail are retried up to `max_retries` more times before being reported.
+
+        Args:
+            texts (list): The texts to embed.
+            model_id (str): The embedding model ID.
+            executor (Executor): Worker pool to fan out on. A temporary pool of
+                `max_workers` threads is used when not given.
+            max_workers (int): Size of the temporary pool. Defaults to 8.
+            max_retries (int): Extra attempts for texts that failed. Defaults to 2.
+            raise_on_error (bool): Raise EmbeddingBatchError if any text still failed,
+                otherwise return None in its position. Defaults to True.
+            dimensions (int): Output vector size, see embed_text.
+
+        Returns:
+            list: One embedding vector (or None) per input text.
+        """
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock-embed") as pool:
+                return self.embed_texts(texts, model_id, pool, max_workers, max_retries, raise_on_error, dimensions)
+
+        embeddings: List[Optional[list]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        errors: Dict[int, Exception] = {}
+        for attempt in range(max_retries + 1):
+            futures = {i: executor.submit(self.embed_text, texts[i], model_id, dimensions) for i in pending}
+            errors = {}
+            for i, future in futures.items():
+                try:
+                    embeddings[i] = future.result()
+                except Exception as e:
+                    errors[i] = e
+            pending = sorted(errors)
+            if not pending:
+                break
+            if attempt < max_retries:
+                logger.warning(f"Retrying {len(pending)} failed embeddings")
+        return self._finish_batch(embeddings, errors, raise_on_error)
+
+    async def aembed_texts(
+        self,
+        texts: List[str],
+        model_id: str = "amazon.titan-embed-text-v2:0",
+        executor: Optional[Executor] = None,
+        max_retries: int = 2,
+        raise_on_error: bool = True,
+        dimensions: Optional[int] = None,
+    ) -> List[Optional[list]]:
+        """
+        Asynchronous version of embed_texts. The blocking requests run on `executor`
+        (the loop's default executor when not given).
+        """
+        loop = asyncio.get_running_loop()
+        embeddings: List[Optional[list]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        errors: Dict[int, Exception] = {}
+        for attempt in range(max_retries + 1):
+            results = await asyncio.gather(
+                *(loop.run_in_executor(executor, self.embed_text, texts[i], model_id, dimensions) for i in pending),
+                return_exceptions=True,
+            )
+            errors = {}
+            for i, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    errors[i] = result
+                else:
+                    embeddings[i] = result
+            pending = sorted(errors)
+            if not pending:
+                break
+            if attempt < max_retries:
+                logger.warning(f"Retrying {len(pending)} failed embeddings")
+        return self._finish_batch(embeddings, errors, raise_on_error)
+
+    @staticmethod
+    def _finish_batch(
+        embeddings: List[Optional[list]], errors: Dict[int, Exception], raise_on_error: bool
+    ) -> List[Optional[list]]:
+        if errors:
+            logger.error(f"Failed to embed {len(errors)} of {len(embeddings)} texts")
+            if raise_on_error:
+                raise EmbeddingBatchError(embeddings, errors)
+        return embeddings
+
     def get_embedding_dimension(self):
         """
         Retrieve the embedding vector dimension.
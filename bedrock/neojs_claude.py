@@ -1,12 +1,15 @@
 from neo4j_graphrag.llm import LLMInterface
-from typing import Optional, Any, Union, List
+from typing import Optional, Any, AsyncIterator, Iterator, Union, List
 from neo4j_graphrag.types import LLMMessage  
 from neo4j_graphrag.llm.types import LLMResponse
 from neo4j_graphrag.exceptions import LLMGenerationError
 from neo4j_graphrag.message_history import MessageHistory
 
+import asyncio
 import logging
 from .claude import Claude
+from .client_pool import ClientPool
+from .response_cache import DiskResponseCache, InMemoryResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,13 @@ class NeoJSClaude(LLMInterface):
     Args:
         model_name (str): The name of the language model.
         model_params (Optional[dict]): Additional parameters passed to the model when text is sent to it. Defaults to None.
+        max_concurrency (int): Maximum number of requests `ainvoke` keeps in flight at once. Defaults to 8.
+        response_cache (Optional[InMemoryResponseCache | DiskResponseCache]): Cache of previous responses,
+            used by both `invoke` and `ainvoke`. Set `model_params["use_cache"]` to False to bypass it.
+        aws_region (Optional[str]): Bedrock region. Defaults to BEDROCK_REGION / AWS_REGION, else us-west-2.
+        client_pool (Optional[ClientPool]): Pool of boto3 clients. Defaults to the process-wide pool.
+        prompt_caching (bool): Mark system instructions and the text before PROMPT_CACHE_BREAKPOINT
+            for Bedrock prompt caching. Defaults to True.
         **kwargs (Any): Arguments passed to the model when for the class is initialized. Defaults to None.
     """
 
@@ -23,12 +33,33 @@ class NeoJSClaude(LLMInterface):
         self,
         model_name: str,
         model_params: Optional[dict[str, Any]] = None,
+        max_concurrency: int = 8,
+        response_cache: Optional[Union[InMemoryResponseCache, DiskResponseCache]] = None,
+        aws_region: Optional[str] = None,
+        client_pool: Optional[ClientPool] = None,
+        prompt_caching: bool = True,
         **kwargs: Any,
     ):
         logger.info("Initializing NeoJSClaude with model: %s", model_name)
         self.model_name = model_name
         self.model_params = model_params or {}
-        self.claude = Claude()
+        self.claude = Claude(
+            max_concurrency=max_concurrency,
+            response_cache=response_cache,
+            aws_region=aws_region,
+            client_pool=client_pool,
+            prompt_caching=prompt_caching,
+        )
+
+    @property
+    def usage(self) -> dict:
+        """Input, output and prompt cache read/write token counts reported by Bedrock so far."""
+        return {**self.claude.usage, "cache_hit_rate": round(self.claude.cache_hit_rate(), 3)}
+
+    @property
+    def stream_stats(self) -> dict:
+        """Count and latency (time to first token, total) of the streamed answers so far."""
+        return self.claude.stream_stats()
         
     
     def invoke(
@@ -60,6 +91,7 @@ class NeoJSClaude(LLMInterface):
                 model_id=self.model_name,
                 max_tokens=self.model_params.get("max_tokens", 20000),
                 temperature=self.model_params.get("temperature", 0.0),
+                use_cache=self.model_params.get("use_cache", True),
             )
 
             if not response:
@@ -72,41 +104,108 @@ class NeoJSClaude(LLMInterface):
             raise LLMGenerationError(f"Failed to generate response from LLM: {str(e)}")
 
     async def ainvoke(
-            self,
-            input: str,
-            message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,
-            system_instruction: Optional[str] = None,
-        ) -> LLMResponse:
-            """Asynchronously sends a text input to the LLM and retrieves a response.
-
-            Args:
-                input (str): Text sent to the LLM.
-                message_history (Optional[Union[List[LLMMessage], MessageHistory]]): A collection previous messages,
-                    with each message having a specific role assigned.
-                system_instruction (Optional[str]): An option to override the llm system message for this invocation.
-
-            Returns:
-                LLMResponse: The response from the LLM.
-
-            Raises:
-                LLMGenerationError: If anything goes wrong.
-            """
-            try: 
-                logger.info("Calling Claude")
-                response = self.claude.generate_response(
-                    prompt=input,
-                    system_prompt=system_instruction,
-                    message_history=message_history,
-                    model_id=self.model_name,
-                    max_tokens=self.model_params.get("max_tokens", 20000),
-                    temperature=self.model_params.get("temperature", 0.0),
-                )
-
-                if not response:
-                    raise LLMGenerationError("Failed to generate response from LLM.")
-
-                logger.info("Response generated")
-                return LLMResponse(content=response)
+        self,
+        input: str,
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,
+        system_instruction: Optional[str] = None,
+    ) -> LLMResponse:
+        """Asynchronously sends a text input to the LLM and retrieves a response.
+
+        Args:
+            input (str): Text sent to the LLM.
+            message_history (Optional[Union[List[LLMMessage], MessageHistory]]): A collection previous messages,
+                with each message having a specific role assigned.
+            system_instruction (Optional[str]): An option to override the llm system message for this invocation.
+
+        Returns:
+            LLMResponse: The response from the LLM.
+
+        Raises:
+            LLMGenerationError: If anything goes wrong.
+        """
+        try:
+            logger.info("Calling Claude (async)")
+            response = await self.claude.agenerate_response(
+                prompt=input,
+                system_prompt=system_instruction,
+                message_history=message_history,
+                model_id=self.model_name,
+                max_tokens=self.model_params.get("max_tokens", 20000),
+                temperature=self.model_params.get("temperature", 0.0),
+                use_cache=self.model_params.get("use_cache", True),
+            )
+
+            if not response:
+                raise LLMGenerationError("Failed to generate response from LLM.")
+
+            logger.info("Response generated")
+            return LLMResponse(content=response)
+
+        except Exception as e:
+            raise LLMGenerationError(f"Failed to generate response from LLM: {str(e)}")
+
+    def stream(
+        self,
+        input: str,
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,
+        system_instruction: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Sends a text input to the LLM and yields the response text as it is generated.
+
+        Args:
+            input (str): Text sent to the LLM.
+            message_history (Optional[Union[List[LLMMessage], MessageHistory]]): A collection previous messages,
+                with each message having a specific role assigned.
+            system_instruction (Optional[str]): An option to override the llm system message for this invocation.
+
+        Yields:
+            str: Pieces of the response text.
+
+        Raises:
+            LLMGenerationError: If anything goes wrong.
+        """
+        try:
+            logger.info("Calling Claude (stream)")
+            yield from self.claude.generate_response_stream(
+                prompt=input,
+                system_prompt=system_instruction,
+                message_history=message_history,
+                model_id=self.model_name,
+                max_tokens=self.model_params.get("max_tokens", 20000),
+                temperature=self.model_params.get("temperature", 0.0),
+                use_cache=self.model_params.get("use_cache", True),
+            )
+        except Exception as e:
+            raise LLMGenerationError(f"Failed to generate response from LLM: {str(e)}")
 
+    async def astream(
+        self,
+        input: str,
+        message_history: Optional[Union[List[LLMMessage], MessageHistory]] = None,
+        system_instruction: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Asynchronous version of `stream`. The blocking stream is read on the Claude
+        executor and handed to the event loop piece by piece.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for text in self.stream(input, message_history, system_instruction):
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
             except Exception as e:
-                raise LLMGenerationError(f"Failed to generate response from LLM: {str(e)}")
\ No newline at end of file
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(self.claude._executor, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
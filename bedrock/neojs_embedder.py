@@ -1,17 +1,145 @@
 
 from neo4j_graphrag.embeddings.base import Embedder
-from .embeddings import EmbeddingModel
-import logging  
+from neo4j_graphrag.experimental.components.embedder import TextChunkEmbedder
+from neo4j_graphrag.experimental.components.types import TextChunk, TextChunks
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from pydantic import validate_call
+from .client_pool import ClientPool
+from .embeddings import EmbeddingBatchError, EmbeddingModel
+from .embedding_cache import EmbeddingCache
+import asyncio
+import logging
 
 logger = logging.getLogger(__name__)
 
 class NeoJSEmbedder(Embedder):
-    def __init__(self, model_id: str = "amazon.titan-embed-text-v2:0"):
-        self.embedding_model = EmbeddingModel(provider="bedrock")
+    """Bedrock embedder for neo4j_graphrag.
+
+    Args:
+        model_id (str): The embedding model ID.
+        max_workers (int): Number of parallel requests used by embed_documents and
+            aembed_documents; also sizes the HTTP connection pool. Defaults to 8.
+        dimensions (Optional[int]): Output vector size requested from the model. Defaults to
+            None (model default, 1024 for Titan v2).
+        cache (Optional[EmbeddingCache]): Persistent cache consulted before calling Bedrock.
+        aws_region (Optional[str]): Bedrock region. Defaults to BEDROCK_REGION / AWS_REGION, else us-west-2.
+        client_pool (Optional[ClientPool]): Pool of boto3 clients. Defaults to the process-wide pool.
+    """
+
+    def __init__(
+        self,
+        model_id: str = "amazon.titan-embed-text-v2:0",
+        max_workers: int = 8,
+        dimensions: Optional[int] = None,
+        cache: Optional[EmbeddingCache] = None,
+        aws_region: Optional[str] = None,
+        client_pool: Optional[ClientPool] = None,
+    ):
+        self.embedding_model = EmbeddingModel(
+            provider="bedrock", max_pool_connections=max_workers, aws_region=aws_region, client_pool=client_pool
+        )
         self.model_id = model_id
+        self.max_workers = max_workers
+        self.dimensions = dimensions
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bedrock-embed")
 
     def embed_query(self, text: str) -> list:
         logger.debug(f"Embedding text: {text}")
-        embedding = self.embedding_model.embed_text(text=text, model_id=self.model_id)
+        if self.cache:
+            embedding = self.cache.get(self.model_id, self.dimensions or 0, text)
+            if embedding is not None:
+                logger.debug("Embedding cache hit")
+                return embedding
+        embedding = self.embedding_model.embed_text(text=text, model_id=self.model_id, dimensions=self.dimensions)
+        if self.cache and embedding:
+            self.cache.put(self.model_id, self.dimensions or 0, text, embedding)
         logger.info("Embedding Completed")
-        return embedding
\ No newline at end of file
+        return embedding
+
+    async def aembed_query(self, text: str) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.embed_query, text)
+
+    def embed_documents(self, texts: List[str], raise_on_error: bool = True) -> List[Optional[list]]:
+        """Embed many texts in parallel, keeping the input order. Cached texts are not sent to Bedrock.
+
+        Raises:
+            EmbeddingBatchError: If some texts could not be embedded and `raise_on_error` is set.
+                The error carries the partial results.
+        """
+        cached, missing = self._lookup(texts)
+        if missing:
+            logger.info(f"Embedding {len(missing)} documents with {self.max_workers} workers")
+            try:
+                embeddings = self.embedding_model.embed_texts(
+                    [texts[i] for i in missing],
+                    model_id=self.model_id,
+                    executor=self._executor,
+                    raise_on_error=raise_on_error,
+                    dimensions=self.dimensions,
+                )
+            except EmbeddingBatchError as e:
+                self._store(texts, cached, missing, e.embeddings)
+                raise EmbeddingBatchError(cached, {missing[i]: error for i, error in e.errors.items()}) from e
+            self._store(texts, cached, missing, embeddings)
+        return cached
+
+    async def aembed_documents(self, texts: List[str], raise_on_error: bool = True) -> List[Optional[list]]:
+        """Asynchronous version of embed_documents."""
+        cached, missing = self._lookup(texts)
+        if missing:
+            logger.info(f"Embedding {len(missing)} documents with {self.max_workers} workers")
+            try:
+                embeddings = await self.embedding_model.aembed_texts(
+                    [texts[i] for i in missing],
+                    model_id=self.model_id,
+                    executor=self._executor,
+                    raise_on_error=raise_on_error,
+                    dimensions=self.dimensions,
+                )
+            except EmbeddingBatchError as e:
+                self._store(texts, cached, missing, e.embeddings)
+                raise EmbeddingBatchError(cached, {missing[i]: error for i, error in e.errors.items()}) from e
+            self._store(texts, cached, missing, embeddings)
+        return cached
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Optional[list]], List[int]]:
+        """Return the cached embeddings (None where missing) and the indices still to embed."""
+        if not self.cache:
+            return [None] * len(texts), list(range(len(texts)))
+        cached = self.cache.get_many(self.model_id, self.dimensions or 0, texts)
+        return cached, [i for i, embedding in enumerate(cached) if embedding is None]
+
+    def _store(
+        self,
+        texts: List[str],
+        results: List[Optional[list]],
+        missing: List[int],
+        embeddings: List[Optional[list]],
+    ):
+        """Fill `results` with the new embeddings and write the successful ones to the cache."""
+        new = [(texts[i], embedding) for i, embedding in zip(missing, embeddings) if embedding is not None]
+        for i, embedding in zip(missing, embeddings):
+            results[i] = embedding
+        if self.cache and new:
+            self.cache.put_many(self.model_id, self.dimensions or 0, *map(list, zip(*new)))
+
+
+class BatchTextChunkEmbedder(TextChunkEmbedder):
+    """TextChunkEmbedder that embeds all chunks of a document in one parallel batch
+    instead of one `embed_query` call after another."""
+
+    def __init__(self, embedder: NeoJSEmbedder):
+        super().__init__(embedder)
+
+    @validate_call
+    async def run(self, text_chunks: TextChunks) -> TextChunks:
+        embeddings = await self._embedder.aembed_documents([chunk.text for chunk in text_chunks.chunks])  # type: ignore
+        chunks = []
+        for chunk, embedding in zip(text_chunks.chunks, embeddings):
+            metadata = chunk.metadata if chunk.metadata else {}
+            metadata["embedding"] = embedding
+            chunks.append(TextChunk(text=chunk.text, index=chunk.index, metadata=metadata, uid=chunk.uid))
+        return TextChunks(chunks=chunks)
@@ -0,0 +1,139 @@
+""" This module provides retry classification, backoff and adaptive concurrency for Bedrock calls. """
+
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+logger = logging.getLogger(__name__)
+
+THROTTLING = "throttling"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+CLIENT_ERROR = "client_error"
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+}
+
+SERVER_ERROR_CODES = {
+    "InternalServerException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+
+TIMEOUT_ERRORS = (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError, ConnectionClosedError)
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an exception raised by a Bedrock call.
+
+    Returns:
+        str: THROTTLING, TIMEOUT or SERVER_ERROR for errors worth retrying,
+        CLIENT_ERROR for errors that will fail again (validation, access, bad input).
+    """
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if code in THROTTLING_ERROR_CODES or status == 429:
+            return THROTTLING
+        if code in SERVER_ERROR_CODES or status >= 500:
+            return SERVER_ERROR
+        return CLIENT_ERROR
+    if isinstance(error, TIMEOUT_ERRORS):
+        return TIMEOUT
+    return CLIENT_ERROR
+
+
+def is_retryable(error: Exception) -> bool:
+    return classify_error(error) != CLIENT_ERROR
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter: a random delay in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    An AIMD (additive increase, multiplicative decrease) limit on in-flight requests.
+
+    Every success raises the limit by `1 / limit` (about +1 per full window of
+    successes), every throttle multiplies it by `decrease_factor`. Throttles arriving
+    within `cooldown` seconds of a decrease count once, since they come from the same burst.
+
+    Attributes:
+        max_limit (int): Upper bound of the limit.
+        min_limit (int): Lower bound of the limit.
+        in_flight (int): Number of slots currently held.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._limit = float(initial_limit or max_limit)
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot. Returns False if none was free within `timeout` seconds."""
+        with self._condition:
+            acquired = self._condition.wait_for(lambda: self.in_flight < self.limit, timeout=timeout)
+            if acquired:
+                self.in_flight += 1
+            return acquired
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            previous = self.limit
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            if self.limit > previous:
+                self._condition.notify()
+
+    def on_throttle(self):
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+            logger.warning(f"Throttled by Bedrock, concurrency limit lowered to {self.limit}")
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
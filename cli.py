@@ -0,0 +1,217 @@
+"""
+Single entry point for the project scripts.
+
+    python cli.py ask "How is precision medicine applied to Lupus?"
+    python cli.py batch questions.jsonl --output answers.jsonl
+    python cli.py samples --stream
+    python cli.py visualize
+    python cli.py ingest fifa
+    python cli.py serve --port 8765
+
+Only argparse and the standard library are imported up front; every subcommand imports
+what it needs (neo4j_graphrag, boto3, langchain, pyvis, ...) when it runs, and Neo4j and
+Bedrock clients are created on first use. `--profile-startup` prints where the startup
+time went: the slowest imports, and how long each lazily built component took.
+"""
+
+import argparse
+import builtins
+import os
+import runpy
+import sys
+import time
+
+_START_TIME = time.perf_counter()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImportProfiler:
+    """
+    Times first imports by wrapping `builtins.__import__`. For every module imported
+    while installed, records its cumulative time (including the modules it imports) and
+    its self time (excluding them).
+    """
+
+    def __init__(self):
+        self.cumulative = {}
+        self.self_time = {}
+        self._stack = []
+        self._original_import = builtins.__import__
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start_time = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.cumulative[name] = self.cumulative.get(name, 0.0) + elapsed
+            self.self_time[name] = self.self_time.get(name, 0.0) + elapsed - children
+
+    def install(self):
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        builtins.__import__ = self._original_import
+
+    def report(self, top: int = 15, file=sys.stderr):
+        print("\nSlowest imports (cumulative / self, ms):", file=file)
+        for name, seconds in sorted(self.cumulative.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {seconds * 1000:9.1f} {self.self_time[name] * 1000:9.1f}  {name}", file=file)
+
+
+def _script(name: str) -> dict:
+    """Load one of the hyphenated top-level scripts as a namespace, without running its __main__ block."""
+    return runpy.run_path(os.path.join(SCRIPT_DIR, name), run_name=name.rsplit(".", 1)[0].replace("-", "_"))
+
+
+def _print_results(results):
+    print("\n===========================\n".join(f"{label} Response: \n{result.answer}" for label, result in results.items()))
+
+
+def cmd_ask(args, resources):
+    if args.pipeline == "all":
+        search = resources.search
+    else:
+        from rag import MultiRetrieverSearch
+
+        # only the chosen pipeline is built (and connects)
+        name, rag = {
+            "vector": ("Vector", lambda: resources.vector_rag),
+            "vector-cypher": ("Vector + Cypher", lambda: resources.vc_rag),
+        }[args.pipeline]
+        search = MultiRetrieverSearch({name: rag()}, embedder=resources.embedder, answer_cache=resources.answer_cache)
+    if args.stream:
+        from rag import stream_search
+
+        query_vector = search.embed(args.question)
+        for label, rag in search.rags.items():
+            print(f"{label} Response: ")
+            for text in stream_search(rag, args.question, retriever_config={'top_k': args.top_k}, query_vector=query_vector):
+                print(text, end="", flush=True)
+            print()
+        return
+    _print_results(search.search(args.question, retriever_config={'top_k': args.top_k}))
+
+
+def cmd_batch(args, resources):
+    import asyncio
+    import json
+
+    from rag import BatchQuestionAnswerer, load_questions
+
+    answerer = BatchQuestionAnswerer(
+        resources.rags,
+        embedder=resources.embedder,
+        concurrency=args.concurrency,
+        retriever_config={'top_k': args.top_k},
+        answer_cache=resources.answer_cache,
+    )
+    summary = asyncio.run(answerer.run(load_questions(args.questions), args.output))
+    print(json.dumps(summary, indent=1))
+
+
+def cmd_samples(args, resources):
+    import asyncio
+
+    graph_rag = _script("graph-rag.py")
+    # share this command's resources, so the profile covers the components it builds
+    graph_rag["main"].__globals__["resources"] = resources
+    asyncio.run(graph_rag["main"](stream=args.stream))
+
+
+def cmd_visualize(args, resources):
+    visualizer = _script("visualizer.py")
+    visualizer["main"].__globals__["resources"] = resources
+    visualizer["main"]()
+
+
+def cmd_ingest(args, resources):
+    runpy.run_path(os.path.join(SCRIPT_DIR, f"main-{args.dataset}.py"), run_name="__main__")
+
+
+def cmd_serve(args, resources):
+    from rag.server import QueryServer
+
+    QueryServer(resources, host=args.host, port=args.port, max_concurrent=args.max_concurrent).serve_forever()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Knowledge graph ingestion and GraphRAG question answering.")
+    parser.add_argument("--profile-startup", action="store_true", help="report import and component build times on stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ask = subparsers.add_parser("ask", help="answer one question")
+    ask.add_argument("question")
+    ask.add_argument("--pipeline", choices=["vector", "vector-cypher", "all"], default="all", help="retrieval pipeline(s) to use")
+    ask.add_argument("--top-k", type=int, default=5, help="chunks retrieved")
+    ask.add_argument("--stream", action="store_true", help="print the answer as it is generated")
+    ask.set_defaults(handler=cmd_ask)
+
+    batch = subparsers.add_parser("batch", help="answer a JSONL file of questions")
+    batch.add_argument("questions", help="JSONL file of questions")
+    batch.add_argument("--output", default="answers.jsonl", help="JSONL file the answers are written to")
+    batch.add_argument("--concurrency", type=int, default=8, help="questions answered at the same time")
+    batch.add_argument("--top-k", type=int, default=5, help="chunks retrieved per question")
+    batch.set_defaults(handler=cmd_batch)
+
+    samples = subparsers.add_parser("samples", help="ask the sample lupus questions (graph-rag.py)")
+    samples.add_argument("--stream", action="store_true", help="print answers as they are generated")
+    samples.set_defaults(handler=cmd_samples)
+
+    visualize = subparsers.add_parser("visualize", help="print the retrieved context of a sample question (visualizer.py)")
+    visualize.set_defaults(handler=cmd_visualize)
+
+    ingest = subparsers.add_parser("ingest", help="build the knowledge graph (main-aws.py / main-fifa.py)")
+    ingest.add_argument("dataset", choices=["aws", "fifa"])
+    ingest.set_defaults(handler=cmd_ingest)
+
+    serve = subparsers.add_parser("serve", help="keep the pipelines warm and answer questions over HTTP")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on")
+    serve.add_argument("--max-concurrent", type=int, default=8, help="searches running at the same time")
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    profiler = None
+    if args.profile_startup:
+        profiler = ImportProfiler()
+        profiler.install()
+
+    import logging
+
+    from rag.resources import QueryResources
+
+    logging.basicConfig(level=logging.INFO)
+    resources = QueryResources()
+    ready_time = time.perf_counter()
+    try:
+        args.handler(args, resources)
+    finally:
+        if profiler is not None:
+            profiler.uninstall()
+            end_time = time.perf_counter()
+            print(
+                f"\nStartup until '{args.command}' ran: {(ready_time - _START_TIME) * 1000:.1f} ms, "
+                f"command: {(end_time - ready_time) * 1000:.1f} ms",
+                file=sys.stderr,
+            )
+            profiler.report()
+            if resources.build_times:
+                print("Components built on first use (ms):", file=sys.stderr)
+                for name, seconds in resources.build_times.items():
+                    print(f"  {seconds * 1000:9.1f}  {name}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,50 @@
-from dotenv import load_dotenv
-import os
 import logging
 import json
 
-import neo4j
-from bedrock.neojs_embedder import NeoJSEmbedder
-from bedrock.neojs_claude import NeoJSClaude
-
-from neo4j_graphrag.generation import RagTemplate
-from neo4j_graphrag.generation.graphrag import GraphRAG
-from neo4j_graphrag.retrievers import VectorRetriever
-from neo4j_graphrag.retrievers import VectorCypherRetriever
-
+from rag import QueryResources
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# load neo4j credentials (and openai api key in background).
-load_dotenv('.env', override=True)
-NEO4J_URI = os.getenv('NEO4J_URI', '')
-NEO4J_USERNAME = os.getenv('NEO4J_USERNAME', '')
-NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD', '')
-
-driver = neo4j.GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-
-ex_llm=NeoJSClaude(
-    model_name="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-    model_params={
-        "response_format": {"type": "json_object"}, # use json_object formatting for best results
-        "temperature": 0 # turning temperature down for more deterministic results
-    }
-)
-
-#create text embedder
-# embedder = OllamaEmbeddings(model="nomc-embed-text")
-embedder = NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0")
-
-vector_retriever = VectorRetriever(
-    driver,
-    index_name="text_embeddings",
-    embedder=embedder,
-    return_properties=["text"],
-)
-
-vc_retriever = VectorCypherRetriever(
-    driver,
-    index_name="text_embeddings",
-    embedder=embedder,
-    retrieval_query="""
-        //1) Go out 2-3 hops in the entity graph and get relationships
-        WITH node AS chunk
-        MATCH (chunk)<-[:FROM_CHUNK]-()-[relList:!FROM_CHUNK]-{1,2}()
-        UNWIND relList AS rel
-
-        //2) collect relationships and text chunks
-        WITH collect(DISTINCT chunk) AS chunks, 
-        collect(DISTINCT rel) AS rels
-
-        //3) format and return context
-        RETURN '=== text ===\n' + apoc.text.join([c in chunks | c.text], '\n---\n') + '\n\n=== kg_rels ===\n' +
-        apoc.text.join([r in rels | startNode(r).name + ' - ' + type(r) + '(' + coalesce(r.details, '') + ')' +  ' -> ' + endNode(r).name ], '\n---\n') AS info
-        """
-    )
-
+# the driver, Claude, the embedder and the retrievers are built on first use, so
+# `--help` and argument errors return immediately
+resources = QueryResources()
 
 
-async def main():
-    rag_template = RagTemplate(template='''Answer the Question using the following Context. Only respond with information mentioned in the Context. Do not inject any speculative information not mentioned. 
+def print_answers(search, q, stream, top_k=5):
+    """Print the answer of every pipeline of `search` to the question `q`."""
+    if not stream:
+        # the question is embedded once and both pipelines run concurrently
+        results = search.search(q, retriever_config={'top_k': top_k})
+        print("\n===========================\n".join(f"{label} Response: \n{result.answer}" for label, result in results.items()))
+        return
+    from rag import stream_search
 
-    # Question:
-    {query_text}
-    
-    # Context:
-    {context}
+    # print tokens as they arrive instead of waiting for the full answer;
+    # Claude logs time to first token and total latency of each call
+    query_vector = search.embed(q)
+    for i, (label, rag) in enumerate(search.rags.items()):
+        if i:
+            print("\n===========================\n")
+        print(f"{label} Response: ")
+        for text in stream_search(rag, q, retriever_config={'top_k': top_k}, query_vector=query_vector):
+            print(text, end="", flush=True)
+        print()
 
-    # Answer:
-    ''', expected_inputs=['query_text', 'context'])
 
-    v_rag  = GraphRAG(llm=ex_llm, retriever=vector_retriever, prompt_template=rag_template)
-    vc_rag = GraphRAG(llm=ex_llm, retriever=vc_retriever, prompt_template=rag_template)
+async def main(stream=False):
+    search = resources.search
 
 
     q = "How is precision medicine applied to Lupus? provide in list format."
-    print(f"Vector Response: \n{v_rag.search(q, retriever_config={'top_k':5}).answer}")
-    print("\n===========================\n")
-    print(f"Vector + Cypher Response: \n{vc_rag.search(q, retriever_config={'top_k':5}).answer}")
+    print_answers(search, q, stream)
 
 
     q = "Can you summarize systemic lupus erythematosus (SLE)? including common effects, biomarkers, and treatments? Provide in detailed list format."
 
-    v_rag_result = v_rag.search(q, retriever_config={'top_k': 5}, return_context=True)
-    vc_rag_result = vc_rag.search(q, retriever_config={'top_k': 5}, return_context=True)
+    results = await search.asearch(q, retriever_config={'top_k': 5}, return_context=True)
+    v_rag_result, vc_rag_result = results["Vector"], results["Vector + Cypher"]
 
     print(f"Vector Response: \n{v_rag_result.answer}")
     print("\n===========================\n")
@@ -99,20 +52,48 @@ async def main():
 
     for i in v_rag_result.retriever_result.items: print(json.dumps(eval(i.content), indent=1))  # noqa: E701
 
-    vc_ls = vc_rag_result.retriever_result.items[0].content.split('\\n---\\n')
+    vc_ls = vc_rag_result.retriever_result.items[0].content.split('\n---\n')
     for i in vc_ls:
         if "biomarker" in i: print(i)  # noqa: E701
 
-    vc_ls = vc_rag_result.retriever_result.items[0].content.split('\\n---\\n')
+    vc_ls = vc_rag_result.retriever_result.items[0].content.split('\n---\n')
     for i in vc_ls:
         if "treat" in i: print(i)  # noqa: E701
 
     q = "Can you summarize systemic lupus erythematosus (SLE)? including common effects, biomarkers, treatments, and current challenges faced by Physicians and patients? provide in list format with details for each item."
-    print(f"Vector Response: \n{v_rag.search(q, retriever_config={'top_k': 5}).answer}")
-    print("\n===========================\n")
-    print(f"Vector + Cypher Response: \n{vc_rag.search(q, retriever_config={'top_k': 5}).answer}")
+    print_answers(search, q, stream)
+
+    logger.info(f"Answer cache: {resources.answer_cache.stats}")
+    logger.info(f"Context compression: {resources.compressor.stats}")
+
+
+async def run_batch(questions_path, output_path, concurrency=8, top_k=5):
+    """Answer every question of a JSONL file with both pipelines, writing results to a JSONL file."""
+    from rag import BatchQuestionAnswerer, load_questions
+
+    answerer = BatchQuestionAnswerer(
+        resources.rags,
+        embedder=resources.embedder,
+        concurrency=concurrency,
+        retriever_config={'top_k': top_k},
+        answer_cache=resources.answer_cache,
+    )
+    summary = await answerer.run(load_questions(questions_path), output_path)
+    print(json.dumps(summary, indent=1))
 
 
 if __name__ == "__main__":
+    import argparse
     import asyncio
-    asyncio.run(main())
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Ask the sample questions over the knowledge graph.")
+    parser.add_argument("--stream", action="store_true", help="print answers token by token as they are generated")
+    parser.add_argument("--questions", help="JSONL file of questions to answer in batch instead of the samples")
+    parser.add_argument("--output", default="answers.jsonl", help="JSONL file the batch answers are written to")
+    parser.add_argument("--concurrency", type=int, default=8, help="questions answered at the same time in batch mode")
+    parser.add_argument("--top-k", type=int, default=5, help="chunks retrieved per question in batch mode")
+    args = parser.parse_args()
+    if args.questions:
+        asyncio.run(run_batch(args.questions, args.output, args.concurrency, args.top_k))
+    else:
+        asyncio.run(main(stream=args.stream))
\ No newline at end of file
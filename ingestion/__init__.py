@@ -0,0 +1,20 @@
+"""
+ingestion package
+
+This package contains the components used to build the knowledge graph from documents.
+"""
+
+from .batch_inference import BatchBackend, BatchIngestor, BedrockBatchBackend, LocalBatchBackend
+from .extraction import ChunkTrackingExtractor, PackingExtractor
+from .graph_writer import BulkGraphWriter
+from .manifest import IngestionManifest
+from .incremental import IncrementalIngestor
+from .pipeline import StagedIngestPipeline
+from .prompt_compiler import CompiledExtractionTemplate, TokenCounter
+from .text_splitter import TokenTextSplitter
+
+__all__ = [
+    'BatchBackend', 'BatchIngestor', 'BedrockBatchBackend', 'BulkGraphWriter', 'ChunkTrackingExtractor',
+    'CompiledExtractionTemplate', 'IngestionManifest', 'IncrementalIngestor', 'LocalBatchBackend', 'PackingExtractor',
+    'StagedIngestPipeline', 'TokenCounter', 'TokenTextSplitter',
+]
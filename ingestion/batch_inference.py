@@ -0,0 +1,414 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from neo4j_graphrag.exceptions import LLMGenerationError
+from neo4j_graphrag.generation.prompts import ERExtractionTemplate
+from neo4j_graphrag.llm import LLMInterface
+from neo4j_graphrag.llm.types import LLMResponse
+
+from bedrock.claude import Claude
+from bedrock.client_pool import ClientPool, default_client_pool
+
+from .extraction import ChunkTrackingExtractor
+from .incremental import IncrementalIngestor
+from .manifest import IngestionManifest
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUSES = ("Completed", "PartiallyCompleted")
+FAILED_STATUSES = ("Failed", "Stopped", "Expired")
+
+
+class BatchBackend:
+    """
+    Runs batch inference jobs. The input is a JSONL file of {"recordId", "modelInput"}
+    records, the output JSONL files hold {"recordId", "modelInput", "modelOutput"} (or
+    "error") per record, as in Bedrock batch inference.
+
+    Attributes:
+        min_records (int): Smallest job the backend accepts; BatchIngestor extracts fewer
+            chunks with interactive calls instead.
+    """
+
+    min_records = 0
+
+    def submit(self, input_path: str, job_name: str) -> str:
+        """Start a job on the records of `input_path` and return its id."""
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """Status of the job, e.g. "InProgress", "Completed" or "Failed"."""
+        raise NotImplementedError
+
+    def fetch_output(self, job_id: str, output_dir: str) -> List[str]:
+        """Copy the output files of a finished job to `output_dir` and return their paths."""
+        raise NotImplementedError
+
+
+class BedrockBatchBackend(BatchBackend):
+    """
+    Bedrock batch inference (CreateModelInvocationJob): records are uploaded to
+    s3://bucket/prefix/input/, results are read from s3://bucket/prefix/output/<job id>/.
+    Batch jobs cost half the on-demand price and don't count against the InvokeModel
+    throughput quotas, but take up to `timeout_hours` and need at least `min_records`
+    records.
+
+    Args:
+        bucket (str): S3 bucket for the job input and output.
+        role_arn (str): IAM role Bedrock assumes to read and write the bucket.
+        model_id (str): Model or inference profile the job runs.
+        prefix (str): Key prefix in the bucket.
+        aws_region (Optional[str]): Region of the job and the bucket. Defaults to default_region().
+        client_pool (Optional[ClientPool]): Pool of boto3 clients. Defaults to the process-wide pool.
+        timeout_hours (int): Hours before Bedrock stops an unfinished job.
+        min_records (int): Smallest job Bedrock accepts (a service quota).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        role_arn: str,
+        model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        prefix: str = "graphrag-batch",
+        aws_region: Optional[str] = None,
+        client_pool: Optional[ClientPool] = None,
+        timeout_hours: int = 24,
+        min_records: int = 100,
+    ):
+        self.bucket = bucket
+        self.role_arn = role_arn
+        self.model_id = model_id
+        self.prefix = prefix.strip("/")
+        self.aws_region = aws_region
+        self.client_pool = client_pool or default_client_pool()
+        self.timeout_hours = timeout_hours
+        self.min_records = min_records
+
+    def _client(self, service: str):
+        return self.client_pool.get(service, self.aws_region)
+
+    def submit(self, input_path: str, job_name: str) -> str:
+        with open(input_path, encoding="utf-8") as f:
+            records = sum(1 for line in f if line.strip())
+        if records < self.min_records:
+            raise ValueError(
+                f"{records} records: Bedrock batch jobs need at least {self.min_records}, "
+                "use the interactive ingestion for small corpora"
+            )
+        key = f"{self.prefix}/input/{os.path.basename(input_path)}"
+        self._client("s3").upload_file(input_path, self.bucket, key)
+        response = self._client("bedrock").create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=self.model_id,
+            inputDataConfig={"s3InputDataConfig": {"s3Uri": f"s3://{self.bucket}/{key}", "s3InputFormat": "JSONL"}},
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{self.bucket}/{self.prefix}/output/"}},
+            timeoutDurationInHours=self.timeout_hours,
+        )
+        logger.info(f"Submitted batch job {job_name} with {records} records: {response['jobArn']}")
+        return response["jobArn"]
+
+    def status(self, job_id: str) -> str:
+        job = self._client("bedrock").get_model_invocation_job(jobIdentifier=job_id)
+        if job.get("message"):
+            logger.info(f"Batch job {job_id}: {job['message']}")
+        return job["status"]
+
+    def fetch_output(self, job_id: str, output_dir: str) -> List[str]:
+        s3 = self._client("s3")
+        output_prefix = f"{self.prefix}/output/{job_id.rsplit('/', 1)[-1]}/"
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=output_prefix):
+            for item in page.get("Contents", []):
+                # manifest.json.out only holds the job's record counts
+                if item["Key"].endswith(".jsonl.out"):
+                    path = os.path.join(output_dir, os.path.basename(item["Key"]))
+                    s3.download_file(self.bucket, item["Key"], path)
+                    paths.append(path)
+        return paths
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    A file-based stand-in for Bedrock batch inference, for tests and offline runs: a job
+    is a directory under `work_dir`, and its records are run through `invoke` (modelInput
+    in, modelOutput out) the first time its status is polled.
+
+    Args:
+        invoke (Callable[[dict], dict]): Returns the model response body of a request body.
+        work_dir (str): Directory of the jobs.
+    """
+
+    def __init__(self, invoke: Callable[[Dict[str, Any]], Dict[str, Any]], work_dir: str = ".cache/batch/local"):
+        self.invoke = invoke
+        self.work_dir = work_dir
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.work_dir, job_id)
+
+    def _set_status(self, job_id: str, status: str):
+        with open(os.path.join(self._job_dir(job_id), "status"), "w") as f:
+            f.write(status)
+
+    def submit(self, input_path: str, job_name: str) -> str:
+        os.makedirs(self._job_dir(job_name), exist_ok=True)
+        shutil.copy(input_path, os.path.join(self._job_dir(job_name), os.path.basename(input_path)))
+        self._set_status(job_name, "Submitted")
+        return job_name
+
+    def status(self, job_id: str) -> str:
+        with open(os.path.join(self._job_dir(job_id), "status")) as f:
+            status = f.read().strip()
+        if status == "Submitted":
+            status = self._run(job_id)
+            self._set_status(job_id, status)
+        return status
+
+    def _run(self, job_id: str) -> str:
+        job_dir = self._job_dir(job_id)
+        failed = 0
+        for name in os.listdir(job_dir):
+            if not name.endswith(".jsonl"):
+                continue
+            with open(os.path.join(job_dir, name), encoding="utf-8") as f_in, open(
+                os.path.join(job_dir, name + ".out"), "w", encoding="utf-8"
+            ) as f_out:
+                for line in f_in:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    try:
+                        record["modelOutput"] = self.invoke(record["modelInput"])
+                    except Exception as e:
+                        failed += 1
+                        record["error"] = {"errorCode": 500, "errorMessage": str(e)}
+                    f_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return "PartiallyCompleted" if failed else "Completed"
+
+    def fetch_output(self, job_id: str, output_dir: str) -> List[str]:
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name in os.listdir(self._job_dir(job_id)):
+            if name.endswith(".jsonl.out"):
+                path = os.path.join(output_dir, name)
+                shutil.copy(os.path.join(self._job_dir(job_id), name), path)
+                paths.append(path)
+        return paths
+
+
+class _BatchResultsLLM(LLMInterface):
+    """
+    Answers an extraction "prompt" (the chunk text) with the batch output of that chunk.
+    A chunk without output fails like an interactive call would, so the extractor records it.
+    """
+
+    def __init__(self, responses: Dict[str, str]):
+        super().__init__(model_name="batch-results")
+        self.responses = responses
+        self.missing = 0
+
+    def invoke(self, input: str, message_history=None, system_instruction=None) -> LLMResponse:  # type: ignore
+        response = self.responses.get(IngestionManifest.chunk_hash(input))
+        if response is None:
+            self.missing += 1
+            raise LLMGenerationError("No batch inference result for this chunk")
+        return LLMResponse(content=response)
+
+    async def ainvoke(self, input: str, message_history=None, system_instruction=None) -> LLMResponse:  # type: ignore
+        return self.invoke(input)
+
+
+class BatchIngestor:
+    """
+    Runs the extraction stage of an IncrementalIngestor as one batch inference job instead
+    of interactive calls, for corpus-scale ingestion where cost per chunk matters more
+    than latency:
+
+    1. every file is loaded, split and embedded as usual (unchanged files and chunks are skipped);
+    2. the extraction request of every new chunk (the ingestor's prompt, so `return_prompt()`
+       for the scripts) is written to a JSONL file of batch inference records;
+    3. the job is submitted through `backend` and polled until it ends;
+    4. the outputs are parsed by the usual extractor (JSON repair, schema checks, lexical
+       graph) and written with the ingestor's BulkGraphWriter, then the manifest is updated.
+
+    Chunks without a usable result (failed records, invalid responses) are left out of the
+    graph and the manifest and listed in stats["failed_chunk_hashes"], so the next run
+    submits them again. When there are fewer new chunks than `backend.min_records`, they
+    are extracted with the ingestor's interactive calls instead of a batch job.
+
+    Args:
+        ingestor (IncrementalIngestor): Provides the splitter, embedder, prompt, schema and writer.
+        backend (BatchBackend): Where the job runs, e.g. BedrockBatchBackend or LocalBatchBackend.
+        work_dir (str): Directory of the input and output JSONL files.
+        poll_interval (float): Seconds between status checks.
+        timeout (Optional[float]): Seconds to wait for the job before giving up (it keeps
+            running and can be resumed with `run(..., job_id=...)`). None waits until it ends.
+        max_tokens (int): Response token limit of each record.
+        temperature (float): Sampling temperature of each record.
+
+    Attributes:
+        stats (dict): Counts and timings of the last run.
+    """
+
+    def __init__(
+        self,
+        ingestor: IncrementalIngestor,
+        backend: BatchBackend,
+        work_dir: str = ".cache/batch",
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+        max_tokens: int = 20000,
+        temperature: float = 0.0,
+    ):
+        self.ingestor = ingestor
+        self.backend = backend
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        # only builds request bodies; batch records take no cache breakpoints
+        self._claude = Claude(prompt_caching=False, max_concurrency=1)
+        self.stats: Dict[str, Any] = {}
+
+    def build_records(self, jobs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Request bodies of the new chunks by chunk hash; a chunk found in several files is sent once."""
+        schema = self.ingestor.schema.model_dump()
+        records: Dict[str, Dict[str, Any]] = {}
+        for job in jobs:
+            for chunk in job["chunks"].chunks:
+                chunk_hash = chunk.metadata["hash"]
+                if chunk_hash not in records:
+                    prompt = self.ingestor.prompt_template.format(schema=schema, examples="", text=chunk.text)
+                    records[chunk_hash] = self._claude.request_body(
+                        prompt, max_tokens=self.max_tokens, temperature=self.temperature
+                    )
+        return records
+
+    @staticmethod
+    def write_records(records: Dict[str, Dict[str, Any]], path: str) -> Dict[str, str]:
+        """Write the batch input JSONL and return the chunk hash of each record id."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        record_hashes = {}
+        with open(path, "w", encoding="utf-8") as f:
+            for i, (chunk_hash, body) in enumerate(records.items()):
+                # record ids are 11 alphanumeric characters
+                record_id = f"R{i:010d}"
+                record_hashes[record_id] = chunk_hash
+                f.write(json.dumps({"recordId": record_id, "modelInput": body}, ensure_ascii=False) + "\n")
+        return record_hashes
+
+    def read_results(self, paths: List[str], record_hashes: Dict[str, str]) -> Dict[str, str]:
+        """Response text of each chunk hash from the output files; failed records are counted and left out."""
+        responses = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    chunk_hash = record_hashes.get(record.get("recordId"))
+                    output = record.get("modelOutput") or {}
+                    if chunk_hash is None or not output.get("content"):
+                        self.stats["failed_records"] += 1
+                        logger.warning(f"Batch record {record.get('recordId')} failed: {record.get('error')}")
+                        continue
+                    responses[chunk_hash] = output["content"][0]["text"]
+                    usage = output.get("usage") or {}
+                    self.stats["input_tokens"] += usage.get("input_tokens") or 0
+                    self.stats["output_tokens"] += usage.get("output_tokens") or 0
+        return responses
+
+    async def wait(self, job_id: str) -> str:
+        """Poll the job until it completes; raise if it fails or `timeout` passes."""
+        start_time = time.monotonic()
+        while True:
+            status = await asyncio.to_thread(self.backend.status, job_id)
+            if status in COMPLETED_STATUSES:
+                return status
+            if status in FAILED_STATUSES:
+                raise RuntimeError(f"Batch job {job_id} ended with status {status}")
+            elapsed = time.monotonic() - start_time
+            if self.timeout is not None and elapsed > self.timeout:
+                raise TimeoutError(f"Batch job {job_id} still {status} after {elapsed:.0f}s; resume with job_id")
+            logger.info(f"Batch job {job_id}: {status} ({elapsed:.0f}s)")
+            await asyncio.sleep(self.poll_interval)
+
+    async def run(self, file_paths: List[str], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ingest the given files with one batch job. Pass the `job_id` of a job already
+        submitted for the same files (e.g. after a restart) to wait for it instead of
+        submitting a new one.
+        """
+        start_time = time.perf_counter()
+        self.stats = {
+            "files_skipped": 0, "files_processed": 0, "chunks_processed": 0, "chunks_deleted": 0,
+            "chunks_failed": 0, "records": 0, "failed_records": 0, "chunks_without_result": 0,
+            "input_tokens": 0, "output_tokens": 0, "job_id": job_id, "extraction": "batch",
+        }
+        jobs = []
+        for path in file_paths:
+            job = await self.ingestor.load(path)
+            if job is None:
+                self.stats["files_skipped"] += 1
+                continue
+            job = await self.ingestor.split(job)
+            jobs.append(await self.ingestor.embed(job))
+
+        records = self.build_records(jobs)
+        self.stats["records"] = len(records)
+        # None extracts with the ingestor's own (interactive) extractor
+        extractor: Optional[ChunkTrackingExtractor] = None
+        results_llm: Optional[_BatchResultsLLM] = None
+        if records and job_id is None and len(records) < self.backend.min_records:
+            logger.warning(
+                f"{len(records)} chunks to extract, fewer than the {self.backend.min_records} records "
+                "a batch job needs: extracting them with interactive calls"
+            )
+            self.stats["extraction"] = "interactive"
+            self.stats["records"] = 0
+        elif records:
+            # the same files give the same records in the same order, so a resumed job's ids still match
+            job_name = f"graph-extraction-{time.strftime('%Y%m%d-%H%M%S')}"
+            input_path = os.path.join(self.work_dir, f"{job_name}.jsonl")
+            record_hashes = self.write_records(records, input_path)
+            if job_id is None:
+                job_id = await asyncio.to_thread(self.backend.submit, input_path, job_name)
+                self.stats["job_id"] = job_id
+            wait_start = time.perf_counter()
+            await self.wait(job_id)
+            self.stats["wait_seconds"] = round(time.perf_counter() - wait_start, 1)
+            output_dir = os.path.join(self.work_dir, "output", job_id.rsplit("/", 1)[-1])
+            output_paths = await asyncio.to_thread(self.backend.fetch_output, job_id, output_dir)
+            responses = self.read_results(output_paths, record_hashes)
+            # the extractor "prompt" is the chunk text, answered from the batch output
+            results_llm = _BatchResultsLLM(responses)
+            extractor = ChunkTrackingExtractor(
+                llm=results_llm, prompt_template=ERExtractionTemplate(template="{text}"), max_concurrency=64
+            )
+
+        failed_hashes = set()
+        for job in jobs:
+            job = await self.ingestor.extract(job, extractor)
+            await self.ingestor.write(job)
+            failed_hashes.update(job["failed_hashes"])
+            self.stats["files_processed"] += 1
+            self.stats["chunks_processed"] += len(job["chunks"].chunks)
+            self.stats["chunks_deleted"] += len(job["stale_hashes"])
+            self.stats["chunks_failed"] += len(job["failed_hashes"])
+        if self.ingestor.perform_entity_resolution and self.stats["chunks_processed"]:
+            await self.ingestor.resolve_entities()
+
+        if results_llm is not None:
+            self.stats["chunks_without_result"] = results_llm.missing
+        # left out of the manifest, the next run submits them again
+        self.stats["failed_chunk_hashes"] = sorted(failed_hashes)
+        self.stats["seconds"] = round(time.perf_counter() - start_time, 3)
+        logger.info(f"Batch ingestion finished: {self.stats}")
+        return self.stats
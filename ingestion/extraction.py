@@ -0,0 +1,278 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from neo4j_graphrag.experimental.components.entity_relation_extractor import (
+    LLMEntityRelationExtractor,
+    OnError,
+    fix_invalid_json,
+)
+from neo4j_graphrag.experimental.components.lexical_graph import LexicalGraphBuilder
+from neo4j_graphrag.experimental.components.schema import SchemaConfig
+from neo4j_graphrag.experimental.components.types import (
+    DocumentInfo,
+    LexicalGraphConfig,
+    Neo4jGraph,
+    TextChunk,
+    TextChunks,
+)
+from neo4j_graphrag.generation.prompts import ERExtractionTemplate
+from neo4j_graphrag.llm import LLMInterface
+
+from .prompt_compiler import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+PACK_INSTRUCTIONS = """The text below is made of several independent chunks, each starting with a "### chunk <number>" line.
+Extract each chunk on its own, as if it were the only text, and put everything in one JSON answer:
+- give every node and every relationship a "chunk" property holding the number of the chunk it comes from;
+- never connect nodes of different chunks;
+- node ids must be unique across the whole answer.
+"""
+
+
+class ChunkTrackingExtractor(LLMEntityRelationExtractor):
+    """
+    An LLMEntityRelationExtractor that tells failed chunks apart from chunks with nothing
+    to extract. Like OnError.IGNORE, a chunk whose LLM call fails or whose response is
+    not a valid graph gets an empty graph, so the other chunks of the document are still
+    written; unlike it, the chunk id is recorded, so the caller can leave the chunk out
+    of the manifest and extract it again on the next run.
+
+    Args:
+        llm (LLMInterface): LLM used for the extraction.
+        prompt_template (ERExtractionTemplate | str): Extraction prompt.
+        create_lexical_graph (bool): Add the Document and Chunk nodes to the graph.
+        max_concurrency (int): Chunks extracted concurrently.
+
+    Attributes:
+        failed_chunk_ids (set): Ids of the chunks whose extraction failed, until taken
+            with `pop_failed`.
+    """
+
+    def __init__(
+        self,
+        llm: LLMInterface,
+        prompt_template: Union[ERExtractionTemplate, str] = ERExtractionTemplate(),
+        create_lexical_graph: bool = True,
+        max_concurrency: int = 5,
+    ):
+        super().__init__(
+            llm=llm,
+            prompt_template=prompt_template,
+            create_lexical_graph=create_lexical_graph,
+            on_error=OnError.RAISE,
+            max_concurrency=max_concurrency,
+        )
+        self.failed_chunk_ids: Set[str] = set()
+
+    async def run(
+        self,
+        chunks: TextChunks,
+        document_info: Optional[DocumentInfo] = None,
+        lexical_graph_config: Optional[LexicalGraphConfig] = None,
+        schema: Optional[SchemaConfig] = None,
+        examples: str = "",
+        **kwargs: Any,
+    ) -> Neo4jGraph:
+        # neo4j_graphrag components must define run themselves
+        return await super().run(
+            chunks,
+            document_info=document_info,
+            lexical_graph_config=lexical_graph_config,
+            schema=schema,
+            examples=examples,
+            **kwargs,
+        )
+
+    async def extract_for_chunk(self, schema: SchemaConfig, examples: str, chunk: TextChunk) -> Neo4jGraph:
+        try:
+            return await super().extract_for_chunk(schema, examples, chunk)
+        except Exception as e:
+            logger.error(f"Extraction failed for chunk_index={chunk.index}, it will be retried on the next run: {e}")
+            self.failed_chunk_ids.add(chunk.chunk_id)
+            return Neo4jGraph()
+
+    def pop_failed(self, chunks: List[TextChunk]) -> List[TextChunk]:
+        """The chunks of `chunks` whose extraction failed; they are forgotten afterwards."""
+        failed = [chunk for chunk in chunks if chunk.chunk_id in self.failed_chunk_ids]
+        self.failed_chunk_ids.difference_update(chunk.chunk_id for chunk in failed)
+        return failed
+
+
+def drop_chunks(graph: Neo4jGraph, chunk_ids: Set[str]) -> Neo4jGraph:
+    """Remove the given Chunk nodes (and the relationships touching them) from an extracted graph."""
+    graph.nodes = [node for node in graph.nodes if node.id not in chunk_ids]
+    graph.relationships = [
+        rel for rel in graph.relationships if rel.start_node_id not in chunk_ids and rel.end_node_id not in chunk_ids
+    ]
+    return graph
+
+
+class PackingExtractor(ChunkTrackingExtractor):
+    """
+    A ChunkTrackingExtractor that sends several consecutive chunks in one LLM call while
+    their text fits in `max_tokens`, so short chunks (typically the tail of each document)
+    need fewer round trips. The chunks stay separate Chunk nodes: each section of the
+    prompt is delimited by its chunk number, the LLM tags every node and relationship with
+    it, and the answer is split back into one graph per chunk.
+
+    Chunks whose part of the answer can't be attributed (invalid JSON, a node without a
+    known chunk tag, an id reused across chunks, a relationship between chunks) are
+    extracted again one call each; so is the whole pack when the call itself fails.
+
+    Args:
+        llm (LLMInterface): LLM used for the extraction.
+        prompt_template (ERExtractionTemplate | str): Extraction prompt.
+        max_tokens (int): Token budget of the chunk text packed into one call.
+        max_chunks (int): Most chunks packed into one call.
+        create_lexical_graph (bool): Add the Document and Chunk nodes to the graph.
+        max_concurrency (int): LLM calls made concurrently.
+        token_counter (TokenCounter): Counter used to measure chunks.
+
+    Attributes:
+        stats (dict): LLM calls, packed calls, chunks extracted in a packed call and
+            chunks that fell back to their own call.
+    """
+
+    def __init__(
+        self,
+        llm: LLMInterface,
+        prompt_template: Union[ERExtractionTemplate, str] = ERExtractionTemplate(),
+        max_tokens: int = 3000,
+        max_chunks: int = 8,
+        create_lexical_graph: bool = True,
+        max_concurrency: int = 5,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        super().__init__(
+            llm=llm,
+            prompt_template=prompt_template,
+            create_lexical_graph=create_lexical_graph,
+            max_concurrency=max_concurrency,
+        )
+        self.max_tokens = max_tokens
+        self.max_chunks = max_chunks
+        self.token_counter = token_counter or TokenCounter()
+        self.stats = {"calls": 0, "packed_calls": 0, "packed_chunks": 0, "fallback_chunks": 0}
+
+    async def run(
+        self,
+        chunks: TextChunks,
+        document_info: Optional[DocumentInfo] = None,
+        lexical_graph_config: Optional[LexicalGraphConfig] = None,
+        schema: Optional[SchemaConfig] = None,
+        examples: str = "",
+        **kwargs: Any,
+    ) -> Neo4jGraph:
+        # same steps as LLMEntityRelationExtractor.run, with one task per pack instead of per chunk
+        lexical_graph_builder = None
+        lexical_graph = None
+        if self.create_lexical_graph:
+            lexical_graph_builder = LexicalGraphBuilder(config=lexical_graph_config or LexicalGraphConfig())
+            lexical_graph = (await lexical_graph_builder.run(text_chunks=chunks, document_info=document_info)).graph
+        elif lexical_graph_config:
+            lexical_graph_builder = LexicalGraphBuilder(config=lexical_graph_config)
+        schema = schema or SchemaConfig(entities={}, relations={}, potential_schema=[])
+        sem = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            self.run_for_pack(sem, pack, schema, examples or "", lexical_graph_builder)
+            for pack in self.pack(chunks.chunks)
+        ]
+        chunk_graphs = [graph for pack_graphs in await asyncio.gather(*tasks) for graph in pack_graphs]
+        return self.combine_chunk_graphs(lexical_graph, chunk_graphs)
+
+    def pack(self, chunks: List[TextChunk]) -> List[List[TextChunk]]:
+        """Group consecutive chunks while their text fits in the token budget."""
+        packs: List[List[TextChunk]] = []
+        packed_tokens = 0
+        for chunk in chunks:
+            tokens = self.token_counter.count(chunk.text)
+            if packs and len(packs[-1]) < self.max_chunks and packed_tokens + tokens <= self.max_tokens:
+                packs[-1].append(chunk)
+                packed_tokens += tokens
+            else:
+                packs.append([chunk])
+                packed_tokens = tokens
+        return packs
+
+    async def extract_for_chunk(self, schema: SchemaConfig, examples: str, chunk: TextChunk) -> Neo4jGraph:
+        self.stats["calls"] += 1
+        return await super().extract_for_chunk(schema, examples, chunk)
+
+    async def run_for_pack(
+        self,
+        sem: asyncio.Semaphore,
+        pack: List[TextChunk],
+        schema: SchemaConfig,
+        examples: str,
+        lexical_graph_builder: Optional[LexicalGraphBuilder] = None,
+    ) -> List[Neo4jGraph]:
+        """Extract a pack in one call, then the chunks that couldn't be attributed one by one."""
+        if len(pack) == 1:
+            return [await self.run_for_chunk(sem, pack[0], schema, examples, lexical_graph_builder)]
+        # the semaphore is only held for the packed call, run_for_chunk takes it again for fallbacks
+        async with sem:
+            graphs, unattributed = await self.extract_for_pack(schema, examples, pack)
+        results = []
+        for chunk in pack:
+            if chunk.chunk_id in unattributed:
+                self.stats["fallback_chunks"] += 1
+                results.append(await self.run_for_chunk(sem, chunk, schema, examples, lexical_graph_builder))
+                continue
+            chunk_graph = self.validate_chunk(graphs[chunk.chunk_id], schema)
+            await self.post_process_chunk(chunk_graph, chunk, lexical_graph_builder)
+            results.append(chunk_graph)
+        return results
+
+    async def extract_for_pack(
+        self, schema: SchemaConfig, examples: str, pack: List[TextChunk]
+    ) -> Tuple[Dict[str, Neo4jGraph], Set[str]]:
+        """
+        One LLM call for the chunks of `pack`. Returns the graph of each chunk id, and the
+        ids of the chunks that have to be extracted on their own.
+        """
+        text = PACK_INSTRUCTIONS + "\n".join(f"\n### chunk {chunk.index}\n{chunk.text}" for chunk in pack)
+        prompt = self.prompt_template.format(text=text, schema=schema.model_dump(), examples=examples)
+        self.stats["calls"] += 1
+        self.stats["packed_calls"] += 1
+        try:
+            llm_result = await self.llm.ainvoke(prompt)
+            graph = Neo4jGraph.model_validate(json.loads(fix_invalid_json(llm_result.content)))
+        except Exception as e:
+            logger.warning(f"Packed extraction of {len(pack)} chunks failed, extracting them one by one: {e}")
+            return {}, {chunk.chunk_id for chunk in pack}
+        graphs, unattributed = split_packed_graph(graph, pack)
+        self.stats["packed_chunks"] += len(pack) - len(unattributed)
+        if unattributed:
+            logger.info(f"{len(unattributed)} of {len(pack)} packed chunks could not be attributed, extracting them one by one")
+        return graphs, unattributed
+
+
+def split_packed_graph(graph: Neo4jGraph, pack: List[TextChunk]) -> Tuple[Dict[str, Neo4jGraph], Set[str]]:
+    """
+    Split the answer to a packed extraction call into one graph per chunk id, using the
+    "chunk" property (the chunk index) of each node. Returns the graphs and the ids of the
+    chunks that can't be attributed: all of them when a node has no known tag or an id
+    tagged with two chunks, the chunks at both ends of a relationship between chunks.
+    """
+    chunk_ids = {str(chunk.index): chunk.chunk_id for chunk in pack}
+    graphs = {chunk.chunk_id: Neo4jGraph() for chunk in pack}
+    node_chunks: Dict[str, str] = {}
+    for node in graph.nodes:
+        chunk_id = chunk_ids.get(str(node.properties.pop("chunk", None)))
+        if chunk_id is None or node_chunks.setdefault(node.id, chunk_id) != chunk_id:
+            return {}, set(graphs)
+        graphs[chunk_id].nodes.append(node)
+    unattributed: Set[str] = set()
+    for rel in graph.relationships:
+        rel.properties.pop("chunk", None)
+        start_chunk, end_chunk = node_chunks.get(rel.start_node_id), node_chunks.get(rel.end_node_id)
+        if start_chunk is not None and start_chunk == end_chunk:
+            graphs[start_chunk].relationships.append(rel)
+        else:
+            unattributed.update(chunk_id for chunk_id in (start_chunk, end_chunk) if chunk_id is not None)
+    for chunk_id in unattributed:
+        del graphs[chunk_id]
+    return graphs, unattributed
@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import neo4j
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from neo4j_graphrag.experimental.components.types import LexicalGraphConfig, Neo4jGraph
+
+from bedrock.retry import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+
+NODE_QUERY = """
+UNWIND $rows AS row
+MERGE (n:__KGBuilder__ {{id: row.id}})
+SET n += row.properties
+SET n{labels}
+WITH n, row
+UNWIND keys(coalesce(row.embedding_properties, {{}})) AS emb
+CALL db.create.setNodeVectorProperty(n, emb, row.embedding_properties[emb])
+"""
+
+RELATIONSHIP_QUERY = """
+UNWIND $rows AS row
+MATCH (start:__KGBuilder__ {{id: row.start_node_id}})
+MATCH (end:__KGBuilder__ {{id: row.end_node_id}})
+MERGE (start)-[r:{type}]->(end)
+SET r += row.properties
+"""
+
+
+def _escape(name: str) -> str:
+    """Quote a label or relationship type for use in Cypher (they cannot be parameters)."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _clean_properties(properties: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Neo4j only stores primitives and lists of primitives; serialize anything else to JSON."""
+    cleaned = {}
+    for key, value in (properties or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            cleaned[key] = value
+        elif isinstance(value, list) and all(isinstance(v, (str, int, float, bool)) for v in value):
+            cleaned[key] = value
+        else:
+            cleaned[key] = json.dumps(value, ensure_ascii=False)
+    return cleaned
+
+
+class BulkGraphWriter:
+    """
+    Writes nodes, relationships, chunks and FROM_CHUNK links to Neo4j in UNWIND/MERGE
+    batches: rows are grouped by label (or relationship type) and sent `batch_size` rows
+    per transaction. Batches failing with a transient error are retried with backoff.
+
+    Nodes are merged on `id` under the `__KGBuilder__` label, like Neo4jWriter, so writing
+    the same graph twice does not duplicate it. Only `driver.execute_query` is used.
+
+    Attributes:
+        stats (dict): Round trips, rows written and retries so far.
+    """
+
+    def __init__(
+        self,
+        driver: neo4j.Driver,
+        batch_size: int = 500,
+        max_retries: int = 5,
+        neo4j_database: Optional[str] = None,
+        lexical_graph_config: LexicalGraphConfig = LexicalGraphConfig(),
+    ):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.neo4j_database = neo4j_database
+        self.lexical_graph_config = lexical_graph_config
+        self.stats = {"round_trips": 0, "nodes": 0, "relationships": 0, "retries": 0}
+        self._index_created = False
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1):
+        # the staged pipeline writes from several threads
+        with self._lock:
+            self.stats[key] += amount
+
+    def _execute(self, query: str, rows: List[dict]):
+        attempt = 0
+        while True:
+            try:
+                self.driver.execute_query(query, parameters_={"rows": rows}, database_=self.neo4j_database)
+                self._count("round_trips")
+                return
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self._count("retries")
+                logger.warning(f"Transient error writing batch of {len(rows)} rows, retrying: {e}")
+                time.sleep(backoff_delay(attempt))
+
+    def _ensure_index(self):
+        if not self._index_created:
+            self.driver.execute_query(
+                "CREATE INDEX __entity__id IF NOT EXISTS FOR (n:__KGBuilder__) ON (n.id)",
+                database_=self.neo4j_database,
+            )
+            self._index_created = True
+
+    def _batched(self, rows: List[dict]) -> Iterable[List[dict]]:
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start:start + self.batch_size]
+
+    def write_nodes(self, nodes: Iterable[Dict[str, Any]]):
+        """
+        Write nodes given as {"id", "label", "properties", "embedding_properties"?} dicts.
+        Nodes outside the lexical graph also get the `__Entity__` label.
+        """
+        self._ensure_index()
+        lexical_labels = self.lexical_graph_config.lexical_graph_node_labels
+        by_label: Dict[str, List[dict]] = defaultdict(list)
+        for node in nodes:
+            by_label[node["label"]].append(
+                {
+                    "id": node["id"],
+                    "properties": _clean_properties(node.get("properties")),
+                    "embedding_properties": node.get("embedding_properties"),
+                }
+            )
+        for label, rows in by_label.items():
+            labels = ":" + _escape(label) + ("" if label in lexical_labels else ":__Entity__")
+            query = NODE_QUERY.format(labels=labels)
+            for batch in self._batched(rows):
+                self._execute(query, batch)
+                self._count("nodes", len(batch))
+
+    def write_relationships(self, relationships: Iterable[Dict[str, Any]]):
+        """Write relationships given as {"start_node_id", "end_node_id", "type", "properties"} dicts."""
+        by_type: Dict[str, List[dict]] = defaultdict(list)
+        for rel in relationships:
+            by_type[rel["type"]].append(
+                {
+                    "start_node_id": rel["start_node_id"],
+                    "end_node_id": rel["end_node_id"],
+                    "properties": _clean_properties(rel.get("properties")),
+                }
+            )
+        for rel_type, rows in by_type.items():
+            query = RELATIONSHIP_QUERY.format(type=_escape(rel_type))
+            for batch in self._batched(rows):
+                self._execute(query, batch)
+                self._count("relationships", len(batch))
+
+    def write_chunks(self, chunks: Iterable[Dict[str, Any]]):
+        """Write Chunk nodes given as {"id", "text", "index", "embedding"?, ...extra properties} dicts."""
+        config = self.lexical_graph_config
+        nodes = []
+        for chunk in chunks:
+            properties = {k: v for k, v in chunk.items() if k not in ("id", "embedding")}
+            embedding = chunk.get("embedding")
+            nodes.append(
+                {
+                    "id": chunk["id"],
+                    "label": config.chunk_node_label,
+                    "properties": properties,
+                    "embedding_properties": {config.chunk_embedding_property: embedding} if embedding else None,
+                }
+            )
+        self.write_nodes(nodes)
+
+    def write_chunk_links(self, links: Iterable[Tuple[str, str]]):
+        """Write FROM_CHUNK relationships given as (entity id, chunk id) pairs."""
+        rel_type = self.lexical_graph_config.node_to_chunk_relationship_type
+        self.write_relationships(
+            {"start_node_id": entity_id, "end_node_id": chunk_id, "type": rel_type} for entity_id, chunk_id in links
+        )
+
+    def write_graph(self, graph: Neo4jGraph):
+        """Write a neo4j_graphrag Neo4jGraph (e.g. the output of LLMEntityRelationExtractor)."""
+        self.write_nodes(node.model_dump() for node in graph.nodes)
+        self.write_relationships(rel.model_dump() for rel in graph.relationships)
+
+    def write_extraction_results(self, results: List[Dict[str, list]]):
+        """
+        Write results in the knowledge_graph.fifa_nodes format:
+        {"Nodes": [[id, label, properties]], "Edges": [[start id, type, end id, properties]]}.
+        Node ids are lowercased; pass EntityResolver.resolve_results output to merge near-duplicates first.
+        """
+        nodes: Dict[str, dict] = {}
+        relationships = []
+        for result in results:
+            for node in result.get("Nodes", []):
+                if not node or len(node) < 2:
+                    continue
+                node_id = str(node[0]).lower()
+                properties = node[2] if len(node) > 2 and isinstance(node[2], dict) else {}
+                if node_id in nodes:
+                    nodes[node_id]["properties"] = {**properties, **nodes[node_id]["properties"]}
+                else:
+                    nodes[node_id] = {"id": node_id, "label": node[1], "properties": {"name": node[0], **properties}}
+            for edge in result.get("Edges", []):
+                if not edge or len(edge) < 3:
+                    continue
+                properties = edge[3] if len(edge) > 3 and isinstance(edge[3], dict) else {}
+                relationships.append(
+                    {
+                        "start_node_id": str(edge[0]).lower(),
+                        "end_node_id": str(edge[2]).lower(),
+                        "type": edge[1],
+                        "properties": properties,
+                    }
+                )
+        self.write_nodes(nodes.values())
+        self.write_relationships(relationships)
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import neo4j
+from fsspec.implementations.local import LocalFileSystem
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.experimental.components.embedder import TextChunkEmbedder
+from neo4j_graphrag.experimental.components.entity_relation_extractor import LLMEntityRelationExtractor
+from neo4j_graphrag.experimental.components.pdf_loader import PdfLoader
+from neo4j_graphrag.experimental.components.resolver import SinglePropertyExactMatchResolver
+from neo4j_graphrag.experimental.components.schema import SchemaBuilder, SchemaEntity, SchemaRelation
+from neo4j_graphrag.experimental.components.text_splitters.base import TextSplitter
+from neo4j_graphrag.experimental.components.types import DocumentInfo, LexicalGraphConfig, TextChunks
+from neo4j_graphrag.generation.prompts import ERExtractionTemplate
+from neo4j_graphrag.llm import LLMInterface
+
+from bedrock.claude import PROMPT_CACHE_BREAKPOINT
+from bedrock.neojs_claude import NeoJSClaude
+from bedrock.neojs_embedder import BatchTextChunkEmbedder, NeoJSEmbedder
+
+from .extraction import ChunkTrackingExtractor, PackingExtractor, drop_chunks
+from .graph_writer import BulkGraphWriter
+from .manifest import IngestionManifest
+from .prompt_compiler import CompiledExtractionTemplate, dedupe
+
+logger = logging.getLogger(__name__)
+
+# Entities whose every FROM_CHUNK link points at a stale chunk go away with it;
+# entities also found in other chunks only lose the link.
+DELETE_STALE_ENTITIES_QUERY = """
+MATCH (e)-[:FROM_CHUNK]->(c:Chunk {document_path: $path})
+WHERE c.hash IN $hashes
+AND NOT EXISTS {
+    MATCH (e)-[:FROM_CHUNK]->(other:Chunk)
+    WHERE NOT (other.document_path = $path AND other.hash IN $hashes)
+}
+WITH DISTINCT e
+DETACH DELETE e
+"""
+
+DELETE_STALE_CHUNKS_QUERY = """
+MATCH (c:Chunk {document_path: $path})
+WHERE c.hash IN $hashes
+DETACH DELETE c
+"""
+
+LINK_CHUNKS_TO_DOCUMENT_QUERY = """
+MATCH (d:Document {path: $path})
+MATCH (c:Chunk {document_path: $path})
+WHERE c.hash IN $hashes
+MERGE (c)-[:FROM_DOCUMENT]->(d)
+"""
+
+
+class IncrementalIngestor:
+    """
+    Builds the knowledge graph like SimpleKGPipeline (load, split, embed, extract, write,
+    resolve), but only for content that changed since the last run.
+
+    Each chunk is stored with `hash` and `document_path` properties. For every file:
+    - unchanged file hash: the file is skipped;
+    - changed file: only chunks with a new hash are embedded and extracted, chunks that
+      disappeared are deleted together with the entities found only in them;
+    - new file: everything is processed.
+
+    Args:
+        driver (neo4j.Driver): Neo4j driver.
+        llm (LLMInterface): LLM used for entity and relation extraction.
+        embedder (Embedder): Embedder for the chunk embeddings.
+        text_splitter (TextSplitter): Splitter used to chunk documents.
+        manifest (IngestionManifest): Record of what was ingested before.
+        entities, relations, potential_schema: Extraction schema, as for SimpleKGPipeline.
+        prompt_template (ERExtractionTemplate | str): Extraction prompt. Plain strings are
+            compiled into a CompiledExtractionTemplate (compact schema, token stats); with
+            NeoJSClaude, its fixed part is sent as a prompt cache breakpoint.
+        perform_entity_resolution (bool): Merge entities with the same label and name after writing.
+        max_concurrency (int): Chunks extracted concurrently.
+        pack_max_tokens (int): If given, consecutive chunks whose text fits in this many
+            tokens share one extraction call (PackingExtractor). Off by default.
+        graph_writer (BulkGraphWriter): Writer for the extracted graph. Defaults to a
+            BulkGraphWriter on `driver` with batches of 500 rows.
+    """
+
+    def __init__(
+        self,
+        driver: neo4j.Driver,
+        llm: LLMInterface,
+        embedder: Embedder,
+        text_splitter: TextSplitter,
+        manifest: IngestionManifest,
+        entities: Optional[Sequence[Union[str, dict]]] = None,
+        relations: Optional[Sequence[Union[str, dict]]] = None,
+        potential_schema: Optional[List[Tuple[str, str, str]]] = None,
+        prompt_template: Union[ERExtractionTemplate, str] = ERExtractionTemplate(),
+        perform_entity_resolution: bool = True,
+        max_concurrency: int = 5,
+        neo4j_database: Optional[str] = None,
+        graph_writer: Optional[BulkGraphWriter] = None,
+        pack_max_tokens: Optional[int] = None,
+    ):
+        self.driver = driver
+        self.llm = llm
+        self.manifest = manifest
+        self.neo4j_database = neo4j_database
+        self.perform_entity_resolution = perform_entity_resolution
+        self.text_splitter = text_splitter
+        self.chunk_embedder = (
+            BatchTextChunkEmbedder(embedder) if isinstance(embedder, NeoJSEmbedder) else TextChunkEmbedder(embedder)
+        )
+        if isinstance(prompt_template, str):
+            prompt_template = CompiledExtractionTemplate(
+                prompt_template, cache_breakpoint=PROMPT_CACHE_BREAKPOINT if isinstance(llm, NeoJSClaude) else None
+            )
+        self.prompt_template = prompt_template
+        if pack_max_tokens:
+            self.extractor = PackingExtractor(
+                llm=llm, prompt_template=prompt_template, max_tokens=pack_max_tokens, max_concurrency=max_concurrency
+            )
+        else:
+            self.extractor = ChunkTrackingExtractor(llm=llm, prompt_template=prompt_template, max_concurrency=max_concurrency)
+        self.schema = SchemaBuilder.create_schema_model(
+            entities=[SchemaEntity.from_text_or_dict(e) for e in dedupe(entities or [])],
+            relations=[SchemaRelation.from_text_or_dict(r) for r in dedupe(relations or [])],
+            potential_schema=list(dict.fromkeys(potential_schema)) if potential_schema else None,
+        )
+        if isinstance(prompt_template, CompiledExtractionTemplate):
+            # logs the fixed tokens (instructions + schema) paid on every chunk call
+            prompt_template.compile(self.schema.model_dump())
+        self.lexical_graph_config = LexicalGraphConfig()
+        self.graph_writer = graph_writer or BulkGraphWriter(
+            driver, neo4j_database=neo4j_database, lexical_graph_config=self.lexical_graph_config
+        )
+
+    async def run(self, file_paths: List[str]) -> Dict[str, Any]:
+        """Ingest the given files, skipping whatever is already up to date."""
+        stats: Dict[str, Any] = {
+            "files_skipped": 0, "files_processed": 0, "chunks_processed": 0, "chunks_deleted": 0, "chunks_failed": 0,
+        }
+        for path in file_paths:
+            file_stats = await self.ingest_file(path)
+            if file_stats is None:
+                stats["files_skipped"] += 1
+                continue
+            stats["files_processed"] += 1
+            stats["chunks_processed"] += file_stats["chunks_processed"]
+            stats["chunks_deleted"] += file_stats["chunks_deleted"]
+            stats["chunks_failed"] += file_stats["chunks_failed"]
+        if self.perform_entity_resolution and stats["chunks_processed"]:
+            await self.resolve_entities()
+        if isinstance(self.prompt_template, CompiledExtractionTemplate):
+            stats["prompt_tokens"] = dict(self.prompt_template.stats)
+        if isinstance(self.extractor, PackingExtractor):
+            stats["packing"] = dict(self.extractor.stats)
+        if isinstance(self.llm, NeoJSClaude):
+            stats["llm_usage"] = self.llm.usage
+        logger.info(f"Ingestion finished: {stats}")
+        return stats
+
+    async def resolve_entities(self):
+        """Merge entities with the same label and name, as SimpleKGPipeline does after writing."""
+        resolver = SinglePropertyExactMatchResolver(driver=self.driver, neo4j_database=self.neo4j_database)
+        await resolver.run()
+
+    async def ingest_file(self, path: str) -> Optional[Dict[str, int]]:
+        """Ingest one file. Returns None when the file is unchanged since the last run."""
+        job = await self.load(path)
+        if job is None:
+            return None
+        for step in (self.split, self.embed, self.extract, self.write):
+            job = await step(job)
+        return {
+            "chunks_processed": len(job["chunks"].chunks),
+            "chunks_deleted": len(job["stale_hashes"]),
+            "chunks_failed": len(job["failed_hashes"]),
+        }
+
+    # The steps below pass a job dict along; StagedIngestPipeline runs them as separate stages.
+
+    async def load(self, path: str) -> Optional[Dict[str, Any]]:
+        """Hash the file and read its text, or return None if it is unchanged."""
+        file_hash = await asyncio.to_thread(IngestionManifest.file_hash, path)
+        if self.manifest.is_unchanged(path, file_hash):
+            logger.info(f"Skipping unchanged file: {path}")
+            return None
+        # pypdf parsing is blocking, keep it off the event loop
+        text = await asyncio.to_thread(PdfLoader.load_file, path, LocalFileSystem())
+        return {
+            "path": path,
+            "file_hash": file_hash,
+            "text": text,
+            "document_info": DocumentInfo(path=path),
+            "document_exists": self.manifest.is_known(path),
+        }
+
+    async def split(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Split the text, delete chunks that disappeared and keep only the new ones."""
+        path = job["path"]
+        splitter_result = await self.text_splitter.run(text=job["text"])
+        chunk_hashes = [IngestionManifest.chunk_hash(chunk.text) for chunk in splitter_result.chunks]
+        new_hashes, stale_hashes = self.manifest.diff_chunks(path, chunk_hashes)
+
+        if stale_hashes:
+            await asyncio.to_thread(self._delete_chunks, path, sorted(stale_hashes))
+
+        new_chunks = []
+        for chunk, chunk_hash in zip(splitter_result.chunks, chunk_hashes):
+            if chunk_hash in new_hashes:
+                new_hashes.discard(chunk_hash)  # identical chunks in one file are stored once
+                chunk.metadata = {**(chunk.metadata or {}), "hash": chunk_hash, "document_path": path}
+                new_chunks.append(chunk)
+        logger.info(
+            f"{path}: {len(new_chunks)} new chunks, {len(stale_hashes)} stale chunks, "
+            f"{len(chunk_hashes) - len(new_chunks)} unchanged"
+        )
+        job.update(chunks=TextChunks(chunks=new_chunks), chunk_hashes=chunk_hashes, stale_hashes=stale_hashes)
+        del job["text"]
+        return job
+
+    async def embed(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if job["chunks"].chunks:
+            job["embedded_chunks"] = await self.chunk_embedder.run(text_chunks=job["chunks"])
+        return job
+
+    async def extract(
+        self, job: Dict[str, Any], extractor: Optional[LLMEntityRelationExtractor] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract the graph of the new chunks, with `extractor` instead of the ingestor's own
+        if given. Chunks whose extraction failed are left out of the graph and listed in
+        job["failed_hashes"], so they are not recorded as done.
+        """
+        job["failed_hashes"] = set()
+        if not job["chunks"].chunks:
+            job["graph"] = None
+            return job
+        extractor = extractor or self.extractor
+        graph = await extractor.run(
+            chunks=job["embedded_chunks"],
+            document_info=job["document_info"],
+            lexical_graph_config=self.lexical_graph_config,
+            schema=self.schema,
+        )
+        if isinstance(extractor, ChunkTrackingExtractor):
+            failed = extractor.pop_failed(job["embedded_chunks"].chunks)
+            if failed:
+                drop_chunks(graph, {chunk.chunk_id for chunk in failed})
+                job["failed_hashes"] = {chunk.metadata["hash"] for chunk in failed}
+                logger.warning(f"{job['path']}: extraction failed for {len(failed)} chunks, they will be retried on the next run")
+        if job["document_exists"]:
+            # the Document node is already in the graph: don't create a second one,
+            # link the new chunks to the existing node after writing instead
+            document_label = self.lexical_graph_config.document_node_label
+            document_ids = {node.id for node in graph.nodes if node.label == document_label}
+            graph.nodes = [node for node in graph.nodes if node.id not in document_ids]
+            graph.relationships = [rel for rel in graph.relationships if rel.end_node_id not in document_ids]
+        job["graph"] = graph
+        return job
+
+    async def write(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Write the extracted graph, then record the file in the manifest. Failed chunks are
+        left out of it, and the file hash is only recorded when no chunk failed, so the next
+        run loads the file again and extracts just those chunks.
+        """
+        path = job["path"]
+        failed = job.get("failed_hashes") or set()
+        if job["graph"] is not None:
+            await asyncio.to_thread(self.graph_writer.write_graph, job["graph"])
+            if job["document_exists"]:
+                hashes = [chunk.metadata["hash"] for chunk in job["chunks"].chunks if chunk.metadata["hash"] not in failed]
+                await asyncio.to_thread(
+                    self.driver.execute_query,
+                    LINK_CHUNKS_TO_DOCUMENT_QUERY,
+                    {"path": path, "hashes": hashes},
+                    database_=self.neo4j_database,
+                )
+        self.manifest.update(
+            path, None if failed else job["file_hash"], [chunk_hash for chunk_hash in job["chunk_hashes"] if chunk_hash not in failed]
+        )
+        self.manifest.save()
+        return job
+
+    def _delete_chunks(self, path: str, hashes: List[str]):
+        parameters = {"path": path, "hashes": hashes}
+        self.driver.execute_query(DELETE_STALE_ENTITIES_QUERY, parameters, database_=self.neo4j_database)
+        self.driver.execute_query(DELETE_STALE_CHUNKS_QUERY, parameters, database_=self.neo4j_database)
+        logger.info(f"{path}: deleted {len(hashes)} stale chunks and their entities")
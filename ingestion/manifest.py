@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionManifest:
+    """
+    Records what has already been ingested: a content hash for every file and the
+    hashes of the chunks it was split into. Used to skip unchanged files and to
+    re-process only the chunks of a file that changed.
+
+    The manifest is a JSON file of the form
+    {"files": {path: {"file_hash": str, "chunks": [chunk_hash, ...]}}}.
+    """
+
+    def __init__(self, path: str = ".cache/ingestion_manifest.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.files: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.files = json.load(f).get("files", {})
+            logger.info(f"Loaded ingestion manifest with {len(self.files)} files from {path}")
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def is_unchanged(self, file_path: str, file_hash: str) -> bool:
+        entry = self.files.get(file_path)
+        return entry is not None and entry["file_hash"] == file_hash
+
+    def is_known(self, file_path: str) -> bool:
+        return file_path in self.files
+
+    def diff_chunks(self, file_path: str, chunk_hashes: List[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        Compare the new chunk hashes of a file with the recorded ones.
+
+        Returns:
+            tuple: (hashes of chunks to process, hashes of recorded chunks that no longer exist)
+        """
+        old = set(self.files.get(file_path, {}).get("chunks", []))
+        new = set(chunk_hashes)
+        return new - old, old - new
+
+    def update(self, file_path: str, file_hash: Optional[str], chunk_hashes: List[str]):
+        """Record the chunks of a file. A None `file_hash` keeps the file from being skipped next time."""
+        with self._lock:
+            self.files[file_path] = {"file_hash": file_hash, "chunks": list(chunk_hashes)}
+
+    def remove(self, file_path: str):
+        with self._lock:
+            self.files.pop(file_path, None)
+
+    def save(self):
+        """Write the manifest atomically, so a crash never leaves a half-written file."""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"files": self.files}, f, indent=2)
+            os.replace(tmp_path, self.path)
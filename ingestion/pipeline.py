@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .incremental import IncrementalIngestor
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class StageStats:
+    """Counters of one pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+        self.max_queue_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def sample_queue(self, depth: int):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall = (self.last_end - self.first_start) if self.first_start and self.last_end else 0.0
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "throughput_per_s": round(self.processed / wall, 3) if wall else 0.0,
+            # close to 1.0 means every worker was busy all the time: the bottleneck
+            "utilization": round(self.busy_seconds / (wall * self.workers), 3) if wall else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+        }
+
+
+class StagedIngestPipeline:
+    """
+    Runs the IncrementalIngestor steps (load, split, embed, extract, write) as a pipeline
+    of stages, each with its own pool of workers and a bounded queue in front of it.
+    A full queue blocks the stage feeding it (backpressure), so a slow stage limits
+    memory use instead of letting finished work pile up, and many documents are in
+    flight at once.
+
+    Args:
+        ingestor (IncrementalIngestor): Provides the stage steps and the manifest handling.
+        workers (Dict[str, int]): Workers per stage, e.g. {"extract": 4}. Defaults to 2 for
+            load/split/embed/write and 4 for extract.
+        queue_size (int): Capacity of each inter-stage queue. Defaults to 4.
+    """
+
+    DEFAULT_WORKERS = {"load": 2, "split": 2, "embed": 2, "extract": 4, "write": 2}
+
+    def __init__(self, ingestor: IncrementalIngestor, workers: Optional[Dict[str, int]] = None, queue_size: int = 4):
+        self.ingestor = ingestor
+        self.workers = {**self.DEFAULT_WORKERS, **(workers or {})}
+        self.queue_size = queue_size
+        self.stats: Dict[str, StageStats] = {}
+
+    def _stages(self) -> List[tuple]:
+        return [
+            ("load", self.ingestor.load),
+            ("split", self.ingestor.split),
+            ("embed", self.ingestor.embed),
+            ("extract", self.ingestor.extract),
+            ("write", self.ingestor.write),
+        ]
+
+    async def run(self, file_paths: List[str]) -> Dict[str, Any]:
+        """Ingest the files and return per-stage statistics."""
+        start_time = time.perf_counter()
+        stages = self._stages()
+        self.stats = {name: StageStats(name, self.workers[name]) for name, _ in stages}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+        done: asyncio.Queue = asyncio.Queue()  # output of the last stage, unbounded
+
+        stage_tasks = []
+        for i, (name, step) in enumerate(stages):
+            out_queue = queues[i + 1] if i + 1 < len(stages) else done
+            tasks = [
+                asyncio.create_task(self._worker(name, step, queues[i], out_queue))
+                for _ in range(self.workers[name])
+            ]
+            stage_tasks.append(tasks)
+
+        async def feed():
+            for path in file_paths:
+                await self._put(queues[0], path, "load")
+            await self._stop_stage(queues[0], self.workers["load"])
+
+        feeder = asyncio.create_task(feed())
+        # when all workers of a stage are done, tell the next stage to stop too
+        for i, tasks in enumerate(stage_tasks):
+            await asyncio.gather(*tasks)
+            if i + 1 < len(stages):
+                await self._stop_stage(queues[i + 1], self.workers[stages[i + 1][0]])
+        await feeder
+
+        results = []
+        while not done.empty():
+            results.append(done.get_nowait())
+        if self.ingestor.perform_entity_resolution and any(job["chunks"].chunks for job in results):
+            await self.ingestor.resolve_entities()
+
+        report = {
+            "files": len(file_paths),
+            "files_processed": len(results),
+            # retried on the next run: they are not recorded in the manifest
+            "chunks_failed": sum(len(job.get("failed_hashes") or ()) for job in results),
+            "seconds": round(time.perf_counter() - start_time, 3),
+            "stages": [stats.as_dict() for stats in self.stats.values()],
+        }
+        prompt_stats = getattr(self.ingestor.prompt_template, "stats", None)
+        if prompt_stats is not None:
+            report["prompt_tokens"] = dict(prompt_stats)
+        llm_usage = getattr(self.ingestor.llm, "usage", None)
+        if llm_usage is not None:
+            # prompt cache reads vs writes show whether the extraction prefix is being reused
+            report["llm_usage"] = llm_usage
+        logger.info(f"Staged ingestion finished: {report}")
+        return report
+
+    async def _put(self, queue: asyncio.Queue, item: Any, stage_name: str):
+        await queue.put(item)
+        self.stats[stage_name].sample_queue(queue.qsize())
+
+    @staticmethod
+    async def _stop_stage(queue: asyncio.Queue, workers: int):
+        for _ in range(workers):
+            await queue.put(_STOP)
+
+    async def _worker(
+        self,
+        name: str,
+        step: Callable[[Any], Awaitable[Any]],
+        in_queue: asyncio.Queue,
+        out_queue: asyncio.Queue,
+    ):
+        stats = self.stats[name]
+        next_stage = self._next_stage_name(name)
+        while True:
+            item = await in_queue.get()
+            if item is _STOP:
+                return
+            started = time.perf_counter()
+            stats.first_start = stats.first_start or started
+            try:
+                result = await step(item)
+            except Exception as e:
+                stats.failed += 1
+                path = item if isinstance(item, str) else item.get("path")
+                logger.error(f"Stage {name} failed for {path}: {e}")
+                continue
+            finally:
+                ended = time.perf_counter()
+                stats.busy_seconds += ended - started
+                stats.last_end = ended
+            stats.processed += 1
+            if result is None:  # e.g. unchanged file, nothing more to do
+                continue
+            if next_stage:
+                await self._put(out_queue, result, next_stage)
+            else:
+                out_queue.put_nowait(result)
+
+    def _next_stage_name(self, name: str) -> Optional[str]:
+        names = [stage_name for stage_name, _ in self._stages()]
+        index = names.index(name)
+        return names[index + 1] if index + 1 < len(names) else None
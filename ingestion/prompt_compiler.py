@@ -0,0 +1,155 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from neo4j_graphrag.generation.prompts import ERExtractionTemplate
+
+logger = logging.getLogger(__name__)
+
+# loaded once per process; None when tiktoken could not load the encoding
+_ENCODINGS: Dict[str, Any] = {}
+_ENCODINGS_LOCK = threading.Lock()
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tiktoken encoding. cl100k_base is not Claude's tokenizer, but it
+    is close enough for budgeting. If the encoding can't be loaded (tiktoken downloads it
+    on first use), counts fall back to an estimate of one token per 4 characters.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding_name = encoding_name
+
+    def _get_encoding(self):
+        with _ENCODINGS_LOCK:
+            if self.encoding_name not in _ENCODINGS:
+                try:
+                    import tiktoken
+
+                    _ENCODINGS[self.encoding_name] = tiktoken.get_encoding(self.encoding_name)
+                except Exception as e:
+                    logger.warning(f"tiktoken encoding {self.encoding_name} unavailable, estimating tokens: {e}")
+                    _ENCODINGS[self.encoding_name] = None
+            return _ENCODINGS[self.encoding_name]
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+
+def dedupe(items: Iterable[Union[str, dict]]) -> List[Union[str, dict]]:
+    """Drop repeated labels or relationship types (strings or {"label": ...} dicts), keeping the first."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = item["label"] if isinstance(item, dict) else item
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def _describe(items: Dict[str, Dict[str, Any]]) -> List[str]:
+    lines = []
+    for label, item in items.items():
+        line = label
+        properties = [p["name"] for p in item.get("properties") or []]
+        if properties:
+            line += f" ({', '.join(properties)})"
+        if item.get("description"):
+            line += f": {item['description']}"
+        lines.append(line)
+    return lines
+
+
+def compact_schema(schema: Dict[str, Any]) -> str:
+    """
+    Render a SchemaConfig dump as short lines instead of the repr of the nested dict,
+    e.g. "Node labels: Person, Country" / "Relationship types: born_in" /
+    "Patterns: (Person)-[born_in]->(Country)".
+    """
+    entities = _describe(schema.get("entities") or {})
+    relations = _describe(schema.get("relations") or {})
+    lines = []
+    if entities:
+        lines.append("Node labels: " + ", ".join(entities))
+    if relations:
+        lines.append("Relationship types: " + ", ".join(relations))
+    if schema.get("potential_schema"):
+        lines.append(
+            "Patterns: " + ", ".join(f"({start})-[{rel}]->({end})" for start, rel, end in schema["potential_schema"])
+        )
+    return "\n".join(lines)
+
+
+class CompiledExtractionTemplate(ERExtractionTemplate):
+    """
+    An extraction prompt compiled once per schema: the schema is rendered compactly,
+    and everything around `{text}` is formatted a single time and reused for every chunk.
+
+    It also measures the tokens spent per call on the fixed part (instructions, schema,
+    examples) versus the chunk text.
+
+    The fixed part is only reusable by the model's prompt cache when it comes first, so
+    templates should end with `{text}` (the prompts in knowledge_graph do). When
+    `cache_breakpoint` is set, it is inserted right before the chunk text to mark the end
+    of the cacheable prefix.
+
+    Args:
+        template (str): Prompt with `{schema}`, `{examples}` and `{text}` placeholders.
+            Defaults to the ERExtractionTemplate prompt.
+        token_counter (TokenCounter): Counter used for the stats.
+        cache_breakpoint (str): Marker the LLM client turns into a prompt cache breakpoint,
+            e.g. bedrock.claude.PROMPT_CACHE_BREAKPOINT. None to leave the prompt as is.
+
+    Attributes:
+        stats (dict): Calls, fixed overhead tokens and chunk text tokens so far.
+    """
+
+    def __init__(
+        self,
+        template: Optional[str] = None,
+        token_counter: Optional[TokenCounter] = None,
+        cache_breakpoint: Optional[str] = None,
+    ):
+        super().__init__(template=template)
+        self.token_counter = token_counter or TokenCounter()
+        self.cache_breakpoint = cache_breakpoint
+        self.stats = {"calls": 0, "overhead_tokens": 0, "text_tokens": 0}
+        self._compiled: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, schema: Dict[str, Any], examples: str = "") -> tuple:
+        """Return (prefix, suffix, overhead tokens) of the prompt for this schema and examples."""
+        key = json.dumps([schema, examples], sort_keys=True, default=str)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            # chunk text can contain braces, so it must not go through str.format
+            marker = "\x00TEXT\x00"
+            prompt = self.template.format(schema=compact_schema(schema), examples=examples, text=marker)
+            prefix, _, suffix = prompt.partition(marker)
+            if suffix.strip():
+                logger.warning("Extraction prompt has instructions after {text}: they can't be part of the cached prefix")
+            overhead = self.token_counter.count(prefix + suffix)
+            compiled = (prefix, suffix, overhead)
+            self._compiled[key] = compiled
+            logger.info(f"Extraction prompt compiled: {overhead} tokens of fixed overhead per call")
+        return compiled
+
+    def overhead(self, schema: Dict[str, Any], examples: str = "") -> int:
+        return self.compile(schema, examples)[2]
+
+    def format(self, schema: Dict[str, Any], examples: str, text: str = "") -> str:  # type: ignore
+        prefix, suffix, overhead = self.compile(schema, examples)
+        text_tokens = self.token_counter.count(text)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["overhead_tokens"] += overhead
+            self.stats["text_tokens"] += text_tokens
+        if self.cache_breakpoint:
+            return prefix + self.cache_breakpoint + text + suffix
+        return prefix + text + suffix
@@ -0,0 +1,111 @@
+import re
+from typing import List, Optional, Tuple
+
+from neo4j_graphrag.experimental.components.text_splitters.base import TextSplitter
+from neo4j_graphrag.experimental.components.types import TextChunk, TextChunks
+
+from .prompt_compiler import TokenCounter
+
+# a sentence ends at . ! or ? followed by whitespace; a section ends at a blank line
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n[ \t]*\n\s*")
+_SECTION_BREAK = re.compile(r"\n[ \t]*\n")
+_WORD = re.compile(r"\S+\s*")
+
+
+class TokenTextSplitter(TextSplitter):
+    """
+    Splits text into chunks sized in model tokens instead of characters, cutting only at
+    sentence or section boundaries.
+
+    The text is cut into sentences, each counted once. Sentences are added to the current
+    chunk until the next one would exceed `chunk_size`; once the chunk holds at least
+    `section_fill` of its budget, it also ends at the next section break (blank line), so
+    sections are not cut in the middle when that costs little. The next chunk starts with
+    the last sentences of the previous one, up to `chunk_overlap` tokens. Sentences longer
+    than `chunk_size` are cut between words.
+
+    Args:
+        chunk_size (int): Maximum tokens per chunk.
+        chunk_overlap (int): Tokens repeated from the end of the previous chunk.
+        section_fill (float): Fraction of `chunk_size` after which a section break ends the chunk.
+        token_counter (TokenCounter): Counter used to size chunks.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1500,
+        chunk_overlap: int = 100,
+        section_fill: float = 0.8,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be strictly less than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.section_fill = section_fill
+        self.token_counter = token_counter or TokenCounter()
+
+    def _segments(self, text: str) -> List[Tuple[str, int, bool]]:
+        """(text with its trailing whitespace, tokens, ends a section) for every sentence."""
+        segments = []
+        start = 0
+        for match in _BOUNDARY.finditer(text):
+            segments.append(text[start:match.end()])
+            start = match.end()
+        if start < len(text):
+            segments.append(text[start:])
+
+        result = []
+        for segment in segments:
+            tokens = self.token_counter.count(segment)
+            section_end = bool(_SECTION_BREAK.search(segment))
+            if tokens <= self.chunk_size:
+                result.append((segment, tokens, section_end))
+                continue
+            # a sentence too long for one chunk (tables, lists without punctuation)
+            words = _WORD.findall(segment)
+            piece, piece_tokens = "", 0
+            for word in words:
+                word_tokens = self.token_counter.count(word)
+                if piece and piece_tokens + word_tokens > self.chunk_size:
+                    result.append((piece, piece_tokens, False))
+                    piece, piece_tokens = "", 0
+                piece += word
+                piece_tokens += word_tokens
+            if piece:
+                result.append((piece, piece_tokens, section_end))
+        return result
+
+    async def run(self, text: str) -> TextChunks:
+        chunks: List[str] = []
+        current: List[Tuple[str, int, bool]] = []
+        current_tokens = 0
+        new_in_current = 0  # segments not carried over as overlap
+
+        def emit():
+            nonlocal current, current_tokens, new_in_current
+            chunks.append("".join(segment for segment, _, _ in current))
+            overlap: List[Tuple[str, int, bool]] = []
+            overlap_tokens = 0
+            for segment in reversed(current):
+                if overlap_tokens + segment[1] > self.chunk_overlap:
+                    break
+                overlap.insert(0, segment)
+                overlap_tokens += segment[1]
+            current, current_tokens, new_in_current = overlap, overlap_tokens, 0
+
+        for segment in self._segments(text):
+            if new_in_current and current_tokens + segment[1] > self.chunk_size:
+                emit()
+            while current and current_tokens + segment[1] > self.chunk_size:
+                # the overlap and this segment don't fit together: shrink the overlap
+                current_tokens -= current.pop(0)[1]
+            current.append(segment)
+            current_tokens += segment[1]
+            new_in_current += 1
+            if segment[2] and current_tokens >= self.section_fill * self.chunk_size:
+                emit()
+        if new_in_current:
+            chunks.append("".join(segment for segment, _, _ in current))
+
+        return TextChunks(chunks=[TextChunk(text=chunk, index=i) for i, chunk in enumerate(chunks)])
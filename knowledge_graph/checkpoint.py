@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from clients import logger
+
+
+class ChunkCheckpoint:
+    """
+    Append-only JSONL store of per-chunk extraction results, keyed by a hash of the
+    chunk text. Each result is written as soon as it is available, so an interrupted
+    run loses at most the chunks that were still in flight.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._results = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # a run killed mid-write can leave a truncated last line
+                        logger.warning(f"Skipping corrupt checkpoint line in {path}")
+                        continue
+                    self._results[record["key"]] = record["result"]
+            logger.info(f"Loaded {len(self._results)} checkpointed chunks from {path}")
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._results
+
+    def get(self, key: str):
+        return self._results.get(key)
+
+    def save(self, key: str, result, index: Optional[int] = None):
+        """Persist the result of one chunk."""
+        with self._lock:
+            self._results[key] = result
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "index": index, "result": result}) + "\n")
+                f.flush()
@@ -0,0 +1,271 @@
+import re
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from clients import logger
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SEPARATORS = re.compile(r"[_\-/]+")
+_SPACES = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+")
+
+
+def canonicalize(name: str) -> str:
+    """
+    Normalize an entity name for matching: strip accents, lowercase, turn `_`, `-`
+    and `/` into spaces, drop punctuation and collapse whitespace.
+    "FIFA_World-Cup" and "fifa world cup" both become "fifa world cup".
+    """
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(c for c in name if not unicodedata.combining(c)).lower()
+    name = _SEPARATORS.sub(" ", name)
+    name = _PUNCTUATION.sub("", name)
+    return _SPACES.sub(" ", name).strip()
+
+
+def _shingles(text: str, n: int) -> Set[str]:
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class _UnionFind:
+    """
+    Union-find that only joins clusters naming the same numbers. A number-less name
+    never joins a numbered cluster: "fifa world cup" could be either "fifa world cup 2018"
+    or "fifa world cup 2022", and which one it reached first would depend on input order.
+    """
+
+    def __init__(self, numbers: List[frozenset]):
+        self.parent = list(range(len(numbers)))
+        self.numbers = list(numbers)
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.numbers[a] != self.numbers[b]:
+            return
+        root, child = min(a, b), max(a, b)
+        self.parent[child] = root
+
+
+class EntityResolver:
+    """
+    Merges entities extracted from different chunks that name the same thing.
+
+    Names are first canonicalized, so exact matches after normalization merge directly.
+    Remaining near-duplicates are found with MinHash/LSH over character n-grams: only
+    names sharing an LSH band are compared, which keeps resolution close to linear in
+    the number of distinct names. A candidate pair merges when the Jaccard similarity
+    of its n-grams reaches `threshold`, unless the two names contain different numbers:
+    "world cup 2018" never merges with "world cup 2022", and the generic "fifa world cup"
+    merges with neither.
+
+    Merging is deterministic: members are ordered by how often they were seen, then by
+    canonical name. The first one is the cluster id and gives the `name` (its most
+    frequent surface form), the label is the most frequent one, and for each property
+    the first member that has it wins. All surface forms are kept as `aliases`.
+
+    Args:
+        threshold (float): Minimum n-gram Jaccard similarity for a fuzzy merge.
+        ngram (int): Character n-gram size.
+        num_perm (int): MinHash signature length.
+        bands (int): LSH bands; `num_perm` must be a multiple of it.
+        per_label (bool): Only fuzzy-merge entities with the same label.
+        max_bucket_size (int): LSH buckets larger than this are skipped, since they
+            come from degenerate (very short or very common) names.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        ngram: int = 3,
+        num_perm: int = 64,
+        bands: int = 16,
+        per_label: bool = True,
+        max_bucket_size: int = 1000,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.ngram = ngram
+        self.num_perm = num_perm
+        self.bands = bands
+        self.per_label = per_label
+        self.max_bucket_size = max_bucket_size
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing: odd 64-bit multipliers, arithmetic wraps modulo 2^64
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+        # one entry per canonical name: original names, labels and properties seen for it
+        self._names: Dict[str, Counter] = defaultdict(Counter)
+        self._labels: Dict[str, Counter] = defaultdict(Counter)
+        self._properties: Dict[str, List[dict]] = defaultdict(list)
+        self._clusters: Optional[Dict[str, str]] = None
+
+    def add(self, name: str, label: Optional[str] = None, properties: Optional[dict] = None):
+        """Record one extracted entity. Can be called incrementally, chunk by chunk."""
+        key = canonicalize(name)
+        if not key:
+            return
+        self._names[key][str(name)] += 1
+        if label:
+            self._labels[key][label] += 1
+        if properties:
+            self._properties[key].append(properties)
+        self._clusters = None
+
+    def add_results(self, results: Iterable[dict]):
+        """Record the nodes of extraction results in the {"Nodes": [[id, label, properties]]} format."""
+        for result in results:
+            for node in result.get("Nodes", []):
+                if node and len(node) > 1:
+                    self.add(node[0], node[1], node[2] if len(node) > 2 and isinstance(node[2], dict) else None)
+
+    def _signatures(self, keys: List[str], batch_size: int = 10_000) -> np.ndarray:
+        """MinHash signatures of the keys' n-gram sets, computed in batches of keys."""
+        signatures = np.empty((len(keys), self.num_perm), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(keys), batch_size):
+                hashes, offsets = [], []
+                for key in keys[start:start + batch_size]:
+                    offsets.append(len(hashes))
+                    hashes.extend(zlib.crc32(s.encode("utf-8")) for s in _shingles(key, self.ngram))
+                permuted = (np.outer(np.asarray(hashes, dtype=np.uint64), self._a) + self._b) >> np.uint64(32)
+                signatures[start:start + len(offsets)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return signatures
+
+    def _label(self, key: str) -> Optional[str]:
+        labels = self._labels.get(key)
+        if not labels:
+            return None
+        return min(labels.items(), key=lambda item: (-item[1], item[0]))[0]
+
+    def _similar(self, a: str, b: str, shingles: Dict[str, Set[str]]) -> bool:
+        sa, sb = shingles[a], shingles[b]
+        return len(sa & sb) / len(sa | sb) >= self.threshold
+
+    def resolve(self) -> Dict[str, str]:
+        """
+        Cluster the recorded entities.
+
+        Returns:
+            dict: Canonical name -> cluster id, for every recorded name.
+        """
+        if self._clusters is not None:
+            return self._clusters
+
+        keys = sorted(self._names)
+        union_find = _UnionFind([frozenset(_NUMBERS.findall(key)) for key in keys])
+        if len(keys) > 1:
+            signatures = self._signatures(keys)
+            rows = self.num_perm // self.bands
+            buckets: Dict[Tuple, List[int]] = defaultdict(list)
+            for i, key in enumerate(keys):
+                label = self._label(key) if self.per_label else None
+                for band in range(self.bands):
+                    band_hash = signatures[i, band * rows:(band + 1) * rows].tobytes()
+                    buckets[(label, band, band_hash)].append(i)
+
+            shingles = {key: _shingles(key, self.ngram) for key in keys}
+            compared: Set[Tuple[int, int]] = set()
+            skipped = 0
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                if len(members) > self.max_bucket_size:
+                    skipped += 1
+                    continue
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pair = (members[x], members[y])
+                        if pair in compared:
+                            continue
+                        compared.add(pair)
+                        if self._similar(keys[pair[0]], keys[pair[1]], shingles):
+                            union_find.union(*pair)
+            if skipped:
+                logger.warning(f"Entity resolution skipped {skipped} oversized LSH buckets")
+            logger.info(f"Entity resolution compared {len(compared)} candidate pairs for {len(keys)} names")
+
+        members_by_root: Dict[int, List[str]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            members_by_root[union_find.find(i)].append(key)
+
+        self._clusters = {}
+        self._members: Dict[str, List[str]] = {}
+        for members in members_by_root.values():
+            members.sort(key=lambda k: (-sum(self._names[k].values()), k))
+            cluster_id = members[0]
+            self._members[cluster_id] = members
+            for key in members:
+                self._clusters[key] = cluster_id
+        logger.info(f"Entity resolution: {len(keys)} distinct names -> {len(self._members)} entities")
+        return self._clusters
+
+    def canonical_id(self, name: str) -> str:
+        """The cluster id of `name`, or its canonical form if it was never recorded."""
+        key = canonicalize(name)
+        return self.resolve().get(key, key)
+
+    def nodes(self) -> List[list]:
+        """The merged entities, as [id, label, properties] sorted by id."""
+        self.resolve()
+        nodes = []
+        for cluster_id in sorted(self._members):
+            members = self._members[cluster_id]
+            names: Counter = Counter()
+            labels: Counter = Counter()
+            properties: dict = {}
+            for key in members:
+                names.update(self._names[key])
+                labels.update(self._labels.get(key, {}))
+                for props in self._properties.get(key, []):
+                    for prop, value in props.items():
+                        properties.setdefault(prop, value)
+            # the name comes from the representative itself, never from another member
+            own_names = [props["name"] for props in self._properties.get(cluster_id, []) if props.get("name")]
+            properties["name"] = own_names[0] if own_names else min(
+                self._names[cluster_id].items(), key=lambda item: (-item[1], item[0])
+            )[0]
+            if len(names) > 1:
+                properties["aliases"] = sorted(names)
+            label = min(labels.items(), key=lambda item: (-item[1], item[0]))[0] if labels else None
+            nodes.append([cluster_id, label, properties])
+        return nodes
+
+    def resolve_results(self, results: List[dict]) -> dict:
+        """
+        Record the nodes of `results` and merge everything into one {"Nodes", "Edges"}
+        result with resolved ids. Edges get their endpoints remapped and duplicate
+        (start, type, end) edges are merged.
+        """
+        self.add_results(results)
+        edges: Dict[Tuple[str, str, str], dict] = {}
+        for result in results:
+            for edge in result.get("Edges", []):
+                if not edge or len(edge) < 3:
+                    continue
+                start, end = self.canonical_id(edge[0]), self.canonical_id(edge[2])
+                properties = edge[3] if len(edge) > 3 and isinstance(edge[3], dict) else {}
+                merged = edges.setdefault((start, edge[1], end), {})
+                for prop, value in properties.items():
+                    merged.setdefault(prop, value)
+        return {
+            "Nodes": self.nodes(),
+            "Edges": [[start, rel_type, end, props] for (start, rel_type, end), props in edges.items()],
+        }
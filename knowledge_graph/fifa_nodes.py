@@ -1,4 +1,7 @@
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from neo4j_graphrag.experimental.components.pdf_loader import PdfLoader
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
@@ -6,8 +9,14 @@ from neo4j_graphrag.experimental.components.text_splitters.fixed_size_splitter i
 from neo4j_graphrag.experimental.pipeline import Pipeline
 from langchain_aws import ChatBedrock
 import json
+from typing import Optional
 
 from clients import logger
+from ingestion.graph_writer import BulkGraphWriter
+
+from .checkpoint import ChunkCheckpoint
+from .entity_resolution import EntityResolver
+from .schema_profiler import SchemaProfiler
 
 from pyvis.network import Network
 
@@ -77,7 +86,9 @@ instruction = """
 """
 
 def extract_node_identifiers(json_data, key: str):
-    node_identifiers = []
+    """Unique labels ("Nodes") or relationship types ("Edges"), in first-seen order."""
+    # a dict keeps insertion order with O(1) membership checks
+    node_identifiers = {}
 
     # Loop through each object in the main array
     for item in json_data:
@@ -85,28 +96,41 @@ def extract_node_identifiers(json_data, key: str):
         if key in item:
             # Loop through each node in the Nodes array
             for node in item[key]:
-                # Append the first position (identifier) to our list
+                # Append the second position (label or type) to our list
                 if node and len(node) > 1:
-                    # check if the identifier is already in the list
-                    if node[1] not in node_identifiers:
-                        node_identifiers.append(node[1])
+                    node_identifiers.setdefault(node[1], None)
 
-    return node_identifiers
+    return list(node_identifiers)
 
 
-async def generate_nodes():
+async def generate_nodes(
+    pdf_path: str = "fifa-samples-pdfs/fifa-world-cup.pdf",
+    results_path: str = "knowledge_graph/fifa_nodes_example.json",
+    checkpoint_path: str = "knowledge_graph/fifa_nodes_checkpoint.jsonl",
+    max_workers: int = 4,
+    graph_writer: Optional[BulkGraphWriter] = None,
+    min_count: int = 1,
+):
+    """
+    Extract nodes and edges from the FIFA pdf (or load them from `results_path`),
+    render them to fifa-edges.html and profile their schema. If `graph_writer` is given,
+    the resolved nodes and edges are also written to Neo4j with it.
 
-    results = []
-    pdf_text = await PdfLoader().run(filepath="fifa-samples-pdfs/fifa-world-cup.pdf")
+    Returns:
+        tuple: Node labels, relationship types and (label, type, label) patterns seen at
+        least `min_count` times, most frequent first.
+    """
 
-    # logger.info(f"PDF text: {pdf_text.text}")
+    results = []
 
     # check if json file exists load from file
-    if os.path.exists("knowledge_graph/fifa_nodes_example.json"):
-        with open("knowledge_graph/fifa_nodes_example.json", "r") as f:
+    if os.path.exists(results_path):
+        with open(results_path, "r") as f:
             results = json.load(f)
 
     else:
+        pdf_text = await PdfLoader().run(filepath=pdf_path)
+
         # pipeline = Pipeline()
         text_splitter = FixedSizeSplitter(
             chunk_size=5000, chunk_overlap=200, approximate=True
@@ -116,31 +140,62 @@ async def generate_nodes():
 
         logger.info(f"Splitter Chunks len: {len(splitter_result.chunks)}")
 
-        for chunk in splitter_result.chunks:
-            # Create prompt template
+        # results of chunks finished by an earlier (possibly interrupted) run are reused
+        checkpoint = ChunkCheckpoint(checkpoint_path)
+        chunk_keys = [ChunkCheckpoint.key(chunk.text) for chunk in splitter_result.chunks]
+        pending = [
+            (chunk, key) for chunk, key in zip(splitter_result.chunks, chunk_keys) if key not in checkpoint
+        ]
+        logger.info(f"Chunks to extract: {len(pending)} (checkpointed: {len(chunk_keys) - len(pending)})")
+
+        if pending:
+            # Create prompt template, client and chain once and share them across workers
             prompt_template = PromptTemplate.from_template("""
             {instruction}
             Here is document. {documents}
 
             Return only the JSON object with the nodes and edges, do not add any additional text.
         """)
-
-            # logger.info(f"Prompt template created: {prompt_template}")
-
-            logger.info("Creating prompt template...")
             llm = ChatBedrock(model="anthropic.claude-3-5-sonnet-20240620-v1:0")
             llm_chain = LLMChain(prompt=prompt_template, llm=llm)
 
-            logger.info("Calling prompt template...")
-
-            result = llm_chain.run(instruction=instruction, documents=chunk.text)
-            results.append(result)
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fifa-extract") as executor:
+
+                async def extract(chunk, key):
+                    logger.info(f"Calling prompt template for chunk {chunk.index}...")
+                    try:
+                        result = await loop.run_in_executor(
+                            executor, functools.partial(llm_chain.run, instruction=instruction, documents=chunk.text)
+                        )
+                        checkpoint.save(key, parser(result), index=chunk.index)
+                    except Exception as e:
+                        # not checkpointed, so the next run retries this chunk
+                        logger.error(f"Extraction failed for chunk {chunk.index}: {e}")
+
+                await asyncio.gather(*(extract(chunk, key) for chunk, key in pending))
+
+        results = [checkpoint.get(key) for key in chunk_keys if key in checkpoint]
+        if len(results) == len(chunk_keys):
+            with open(results_path, "w") as f:
+                json.dump(results, f, indent=4)
+        else:
+            logger.warning(f"{len(chunk_keys) - len(results)} chunks failed; rerun to extract them")
 
     # logger.info(f"Prompt template result: {results}")
 
-    node_labels = extract_node_identifiers(results, "Nodes")
+    # merge near-duplicate entities ("fifa world cup", "FIFA_World_Cup", ...) across chunks
+    resolved = EntityResolver().resolve_results(results)
+
+    if graph_writer is not None:
+        graph_writer.write_extraction_results([resolved])
+        logger.info(f"Wrote extracted graph to Neo4j: {graph_writer.stats}")
+
+    # one pass over the results for label, type and pattern counts; rare ones are dropped
+    schema = SchemaProfiler().add_results(results).prune(min_count=min_count)
+    node_labels = schema["entities"]
     # print(f"Node labels: {node_labels}")
-    rel_types = extract_node_identifiers(results, "Edges")
+    rel_types = schema["relations"]
     # print(f"Relationship types: {rel_types}")
 
     # results_parsed = parser(results)
@@ -156,32 +211,20 @@ async def generate_nodes():
         filter_menu=True,
     )
 
-    nodes = []
-    edges = []
-    for result in results:
-        # print(f"Result: {result}")
-        # result_parsed = parser(result)
-        # merge all nodes and edges
-        nodes.extend(result.get("Nodes"))
-        edges.extend(result.get("Edges"))
-
     # Create Nodes and Edges
-    for node in nodes:
-        net.add_node(node[0].lower(), label=node[0].lower(), title=str(node[2]))
-
-    for edge in edges:
-        from_node, title_edge, to_node = edge[0].lower(), edge[1], edge[2].lower()
-        try:
-            net.add_edge(from_node, to=to_node, title=title_edge)
-        except Exception as e:
-            logger.error(f"Error adding edge: {e}")
-            net.add_node(to_node, label=to_node, title=str(to_node))
-            net.add_edge(from_node, to=to_node, title=title_edge)
-            # print(relationship)
+    for node_id, _, properties in resolved["Nodes"]:
+        net.add_node(node_id, label=node_id, title=str(properties))
+
+    for from_node, title_edge, to_node, _ in resolved["Edges"]:
+        for node_id in (from_node, to_node):
+            if node_id not in net.node_ids:
+                # edge endpoint the LLM did not list as a node
+                net.add_node(node_id, label=node_id, title=str(node_id))
+        net.add_edge(from_node, to=to_node, title=title_edge)
 
     net.show("fifa-edges.html")
 
-    return node_labels, rel_types
+    return node_labels, rel_types, schema["potential_schema"]
 
 def parser(result):
     """
@@ -53,11 +53,12 @@ documents = """
 
 def create_prompt_template():
     # Create prompt template
+    # fixed instructions first and the document last, so the prefix is the same on every call
     prompt_template = PromptTemplate.from_template("""
       {instruction}
-      Here is document. {documents}
-
       Return only the JSON object with the nodes and edges, do not add any additional text.
+
+      Here is document. {documents}
   """)
 
     logger.info(f"Prompt template created: {prompt_template}")
@@ -0,0 +1,102 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from clients import logger
+
+
+def _ranked(counts: Counter, min_count: int, top_k: Optional[int]) -> List[str]:
+    # most frequent first, ties alphabetical, so the schema (and prompt) is stable across runs
+    ranked = sorted((item for item, count in counts.items() if count >= min_count), key=lambda i: (-counts[i], i))
+    return ranked[:top_k] if top_k is not None else ranked
+
+
+class SchemaProfiler:
+    """
+    Streaming statistics of the schema found in extraction results: counts of node
+    labels, relationship types and (start label, type, end label) patterns.
+
+    Results are consumed one at a time in the {"Nodes": [[id, label, properties]],
+    "Edges": [[start id, type, end id, properties]]} format, in a single pass, so the
+    profiler can be fed chunk by chunk as extraction progresses.
+
+    Attributes:
+        label_counts (Counter): Occurrences of each node label.
+        relationship_counts (Counter): Occurrences of each relationship type.
+        pattern_counts (Counter): Occurrences of each (start label, type, end label) pattern.
+        results (int): Number of results consumed.
+    """
+
+    def __init__(self):
+        self.label_counts: Counter = Counter()
+        self.relationship_counts: Counter = Counter()
+        self.pattern_counts: Counter = Counter()
+        self.results = 0
+
+    def add_result(self, result: dict):
+        """Count the labels, types and patterns of one extraction result."""
+        # node ids are only meaningful inside their own result (chunk)
+        labels_by_id: Dict[str, str] = {}
+        for node in result.get("Nodes", []):
+            if node and len(node) > 1:
+                self.label_counts[node[1]] += 1
+                labels_by_id[str(node[0]).lower()] = node[1]
+        for edge in result.get("Edges", []):
+            if edge and len(edge) > 1:
+                self.relationship_counts[edge[1]] += 1
+                if len(edge) > 2:
+                    start = labels_by_id.get(str(edge[0]).lower())
+                    end = labels_by_id.get(str(edge[2]).lower())
+                    if start and end:
+                        self.pattern_counts[(start, edge[1], end)] += 1
+        self.results += 1
+
+    def add_results(self, results: Iterable[dict]) -> "SchemaProfiler":
+        for result in results:
+            self.add_result(result)
+        return self
+
+    def labels(self, min_count: int = 1, top_k: Optional[int] = None) -> List[str]:
+        """Node labels seen at least `min_count` times, most frequent first."""
+        return _ranked(self.label_counts, min_count, top_k)
+
+    def relationship_types(self, min_count: int = 1, top_k: Optional[int] = None) -> List[str]:
+        """Relationship types seen at least `min_count` times, most frequent first."""
+        return _ranked(self.relationship_counts, min_count, top_k)
+
+    def prune(
+        self,
+        min_count: int = 1,
+        top_k_labels: Optional[int] = None,
+        top_k_relationships: Optional[int] = None,
+        min_pattern_count: int = 1,
+    ) -> Dict[str, list]:
+        """
+        Drop rare labels and relationship types.
+
+        Returns:
+            dict: "entities", "relations" and "potential_schema" ready for
+            SimpleKGPipeline / IncrementalIngestor. Patterns are kept only when both
+            labels and the type survived the pruning.
+        """
+        entities = self.labels(min_count, top_k_labels)
+        relations = self.relationship_types(min_count, top_k_relationships)
+        kept_labels, kept_relations = set(entities), set(relations)
+        potential_schema: List[Tuple[str, str, str]] = [
+            pattern
+            for pattern in _ranked(self.pattern_counts, min_pattern_count, None)
+            if pattern[0] in kept_labels and pattern[1] in kept_relations and pattern[2] in kept_labels
+        ]
+        logger.info(
+            f"Schema pruned to {len(entities)}/{len(self.label_counts)} labels, "
+            f"{len(relations)}/{len(self.relationship_counts)} relationship types, "
+            f"{len(potential_schema)}/{len(self.pattern_counts)} patterns"
+        )
+        return {"entities": entities, "relations": relations, "potential_schema": potential_schema}
+
+    def summary(self, top_k: int = 10) -> dict:
+        return {
+            "results": self.results,
+            "labels": self.label_counts.most_common(top_k),
+            "relationship_types": self.relationship_counts.most_common(top_k),
+            "patterns": self.pattern_counts.most_common(top_k),
+        }
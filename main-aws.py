@@ -3,14 +3,16 @@ import os
 import logging
 
 import neo4j
-from neo4j_graphrag.experimental.components.text_splitters.fixed_size_splitter import FixedSizeSplitter
-from neo4j_graphrag.experimental.pipeline.kg_builder import SimpleKGPipeline
 
 from sample_president_nodes import return_node_labels, return_rel_types, return_prompt
 
 from neo4j_graphrag.indexes import create_vector_index
 from bedrock.neojs_embedder import NeoJSEmbedder
+from bedrock.embedding_cache import EmbeddingCache
 from bedrock.neojs_claude import NeoJSClaude
+from bedrock.response_cache import DiskResponseCache
+
+from ingestion import IncrementalIngestor, IngestionManifest, StagedIngestPipeline, TokenTextSplitter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -28,11 +30,19 @@ ex_llm=NeoJSClaude(
     model_params={
         "response_format": {"type": "json_object"}, # use json_object formatting for best results
         "temperature": 0 # turning temperature down for more deterministic results
-    }
+    },
+    # ainvoke offloads to a bounded executor of this size, which caps the Bedrock calls in
+    # flight: StagedIngestPipeline extracts up to 4 documents at once (workers["extract"]),
+    # each with up to 5 chunk calls (IncrementalIngestor max_concurrency); its bounded
+    # queues (queue_size=4) keep the other stages from running far ahead
+    max_concurrency=8,
+    # temperature 0 answers are reused across reruns
+    response_cache=DiskResponseCache(),
 )
 
 # create text embedder
-embedder = NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0")
+# chunks and questions already embedded on a previous run are read from the on-disk cache
+embedder = NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0", cache=EmbeddingCache())
 
 
 def create_db_vector_index():
@@ -49,24 +59,27 @@ async def main():
 
     create_db_vector_index()
 
-    kg_builder_pdf = SimpleKGPipeline(
-        llm=ex_llm,
+    # files and chunks already in the graph (per the manifest) are not extracted again
+    kg_builder_pdf = IncrementalIngestor(
         driver=driver,
-        text_splitter=FixedSizeSplitter(chunk_size=5000, chunk_overlap=100),
+        llm=ex_llm,
         embedder=embedder,
+        # chunks sized in tokens and cut at sentence boundaries; the size matches the former
+        # FixedSizeSplitter(5000 chars, 100), so retrieved chunks stay as large as before
+        text_splitter=TokenTextSplitter(chunk_size=1250, chunk_overlap=25),
+        manifest=IngestionManifest(),
         entities=return_node_labels(),
         relations=return_rel_types(),
         prompt_template=return_prompt(),
-        from_pdf=True,
     )
 
     pdf_file_paths = ["fifa-samples-pdfs/fifa-world-cup.pdf"]
 
-    for path in pdf_file_paths:
-        print(f"Processing : {path}")
-        pdf_result = await kg_builder_pdf.run_async(file_path=path)
-        print(f"Result: {pdf_result}")
-        logger.info("Finished processing...")
+    # documents flow through load/split/embed/extract/write stages concurrently;
+    # the per-stage stats show which stage limits the run
+    result = await StagedIngestPipeline(kg_builder_pdf).run(pdf_file_paths)
+    print(f"Result: {result}")
+    logger.info("Finished processing...")
 
 
 if __name__ == "__main__":
@@ -3,12 +3,21 @@ import os
 import logging
 
 import neo4j
-from neo4j_graphrag.experimental.components.text_splitters.fixed_size_splitter import FixedSizeSplitter
-from neo4j_graphrag.experimental.pipeline.kg_builder import SimpleKGPipeline
 
 from neo4j_graphrag.indexes import create_vector_index
 from bedrock.neojs_embedder import NeoJSEmbedder
+from bedrock.embedding_cache import EmbeddingCache
 from bedrock.neojs_claude import NeoJSClaude
+from bedrock.response_cache import DiskResponseCache
+
+from ingestion import (
+    BatchIngestor,
+    BedrockBatchBackend,
+    IncrementalIngestor,
+    IngestionManifest,
+    StagedIngestPipeline,
+    TokenTextSplitter,
+)
 
 from knowledge_graph.fifa_nodes import generate_nodes, return_prompt
 
@@ -28,11 +37,19 @@ ex_llm=NeoJSClaude(
     model_params={
         "response_format": {"type": "json_object"}, # use json_object formatting for best results
         "temperature": 0 # turning temperature down for more deterministic results
-    }
+    },
+    # ainvoke offloads to a bounded executor of this size, which caps the Bedrock calls in
+    # flight: StagedIngestPipeline extracts up to 4 documents at once (workers["extract"]),
+    # each with up to 5 chunk calls (IncrementalIngestor max_concurrency); its bounded
+    # queues (queue_size=4) keep the other stages from running far ahead
+    max_concurrency=8,
+    # temperature 0 answers are reused across reruns
+    response_cache=DiskResponseCache(),
 )
 
 # create text embedder
-embedder = NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0")
+# chunks and questions already embedded on a previous run are read from the on-disk cache
+embedder = NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0", cache=EmbeddingCache())
 
 
 def create_db_vector_index():
@@ -46,30 +63,43 @@ def create_db_vector_index():
     )
 
 async def main():
-    node_labels, rel_types = await generate_nodes()
+    # labels and types seen only once are dropped, keeping the extraction prompt short
+    node_labels, rel_types, potential_schema = await generate_nodes(min_count=2)
 
     create_db_vector_index()
 
-    kg_builder_pdf = SimpleKGPipeline(
-        llm=ex_llm,
+    # files and chunks already in the graph (per the manifest) are not extracted again
+    kg_builder_pdf = IncrementalIngestor(
         driver=driver,
-        text_splitter=FixedSizeSplitter(
-            chunk_size=5000, chunk_overlap=200, approximate=True
-        ),
+        llm=ex_llm,
         embedder=embedder,
+        # chunks sized in tokens and cut at sentence boundaries; size and overlap match the former
+        # FixedSizeSplitter(5000 chars, 200), so retrieved chunks stay as large as before
+        text_splitter=TokenTextSplitter(chunk_size=1250, chunk_overlap=50),
+        manifest=IngestionManifest(),
         entities=node_labels,
         relations=rel_types,
+        potential_schema=potential_schema,
         prompt_template=return_prompt(),
-        from_pdf=True,
     )
 
     pdf_file_paths = ["fifa-samples-pdfs/fifa-world-cup.pdf"]
 
-    for path in pdf_file_paths:
-        print(f"Processing : {path}")
-        pdf_result = await kg_builder_pdf.run_async(file_path=path)
-        print(f"Result: {pdf_result}")
-        logger.info("Finished processing...")
+    batch_bucket = os.getenv('BATCH_INFERENCE_BUCKET', '')
+    if batch_bucket:
+        # corpus-scale runs: every chunk is extracted by one Bedrock batch inference job
+        # (half the on-demand price, no throttling), then written as usual; runs with fewer
+        # new chunks than a job's minimum (100 records) fall back to interactive calls
+        backend = BedrockBatchBackend(
+            bucket=batch_bucket, role_arn=os.getenv('BATCH_INFERENCE_ROLE_ARN', ''), model_id=ex_llm.model_name
+        )
+        result = await BatchIngestor(kg_builder_pdf, backend).run(pdf_file_paths, job_id=os.getenv('BATCH_INFERENCE_JOB_ID') or None)
+    else:
+        # documents flow through load/split/embed/extract/write stages concurrently;
+        # the per-stage stats show which stage limits the run
+        result = await StagedIngestPipeline(kg_builder_pdf).run(pdf_file_paths)
+    print(f"Result: {result}")
+    logger.info("Finished processing...")
 
 
 if __name__ == "__main__":
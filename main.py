@@ -14,10 +14,6 @@ from neo4j_graphrag.indexes import create_vector_index
 
 from clients import logger
 
-from basic_knowledge_graph import create_knowledge_graph
-
-from knowledge_graph.graph import create_prompt_template
-
 # load neo4j credentials (and openai api key in background).
 load_dotenv('.env', override=True)
 NEO4J_URI = os.getenv('NEO4J_URI', '')
@@ -45,6 +41,10 @@ embedder = OllamaEmbeddings(model="nomic-embed-text")
 async def main():
     logger.info("Starting the application...")  
     
+    # knowledge_graph.graph pulls in langchain and pyvis, so it is only imported when used
+    from knowledge_graph.graph import create_prompt_template
+
+    # from basic_knowledge_graph import create_knowledge_graph
     # create_knowledge_graph()
     create_prompt_template()
 
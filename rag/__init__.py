@@ -0,0 +1,46 @@
+"""
+rag package
+
+This package contains the query-side helpers used on top of neo4j_graphrag's GraphRAG.
+
+Exports are imported on first access, so importing the package (e.g. for
+QueryResources) does not pull in neo4j_graphrag, numpy or boto3.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'BatchQuestionAnswerer': '.batch',
+    'CompressingRetriever': '.compression',
+    'ContextCompressor': '.compression',
+    'GraphExpansion': '.expansion',
+    'LocalVectorIndex': '.vector_index',
+    'LocalVectorRetriever': '.vector_index',
+    'MultiRetrieverSearch': '.multi_search',
+    'QueryResources': '.resources',
+    'QueryServer': '.server',
+    'SemanticAnswerCache': '.answer_cache',
+    'astream_search': '.search',
+    'build_prompt': '.search',
+    'file_version': '.answer_cache',
+    'load_questions': '.batch',
+    'stream_search': '.search',
+}
+
+__all__ = [
+    'BatchQuestionAnswerer', 'CompressingRetriever', 'ContextCompressor', 'GraphExpansion', 'LocalVectorIndex',
+    'LocalVectorRetriever', 'MultiRetrieverSearch', 'QueryResources', 'QueryServer', 'SemanticAnswerCache',
+    'astream_search', 'build_prompt', 'file_version', 'load_questions', 'stream_search',
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def file_version(path: str) -> Callable[[], Optional[str]]:
+    """
+    A graph version read from a file that ingestion rewrites, e.g. the IngestionManifest:
+    its modification time and size, or None while the file doesn't exist.
+    """
+
+    def version() -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    return version
+
+
+def config_key(*parts: Any) -> str:
+    """Canonical key of everything besides the question that shapes an answer (pipeline, retriever config, ...)."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class SemanticAnswerCache:
+    """
+    A cache of answers looked up by question embedding rather than question text, so a
+    rephrased question ("what is SLE?" / "can you explain SLE") reuses the answer of the
+    original one when their cosine similarity is at least `threshold`.
+
+    Entries are grouped by a config key (pipeline, retriever config, examples); only
+    questions asked with the same key can match. Every group is a matrix of normalized
+    query vectors, so a lookup is one matrix-vector product.
+
+    The whole cache is dropped when the graph version changes: `graph_version` is either
+    a fixed string or a callable checked on every lookup (see `file_version`).
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit.
+        ttl (Optional[float]): Seconds an answer stays valid. None means no expiry.
+        max_entries (int): Answers kept per config key before the oldest are evicted.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups not found (or expired) in the cache.
+        invalidations (int): Number of times the cache was dropped for a new graph version.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        graph_version: Union[str, Callable[[], Optional[str]], None] = None,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._graph_version = graph_version
+        self._version = self._current_version()
+        # config key -> (vectors, [(created_at, answer, context_ids)])
+        self._groups: Dict[str, Tuple[np.ndarray, List[Tuple[float, str, List[Any]]]]] = {}
+        self._lock = threading.Lock()
+
+    def _current_version(self) -> Optional[str]:
+        if callable(self._graph_version):
+            return self._graph_version()
+        return self._graph_version
+
+    def _check_version(self):
+        version = self._current_version()
+        if version != self._version:
+            if self._groups:
+                logger.info(f"Graph version changed ({self._version} -> {version}), dropping cached answers")
+                self.invalidations += 1
+            self._groups.clear()
+            self._version = version
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, query_vector, key: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Return the cached {"answer", "context_ids", "similarity"} of the most similar
+        question asked with `key`, or None.
+        """
+        query = self._normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            group = self._groups.get(key)
+            if group is not None and self.ttl is not None:
+                vectors, entries = group
+                fresh = [i for i, entry in enumerate(entries) if now - entry[0] <= self.ttl]
+                if len(fresh) < len(entries):
+                    group = (vectors[fresh], [entries[i] for i in fresh])
+                    self._groups[key] = group
+            if group is None or not group[1]:
+                self.misses += 1
+                return None
+            vectors, entries = group
+            similarities = vectors @ query
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            _, answer, context_ids = entries[best]
+            return {"answer": answer, "context_ids": context_ids, "similarity": float(similarities[best])}
+
+    def put(self, query_vector, answer: str, context_ids: Optional[List[Any]] = None, key: str = ""):
+        query = self._normalize(query_vector)
+        with self._lock:
+            self._check_version()
+            vectors, entries = self._groups.get(key, (np.empty((0, len(query)), dtype=np.float32), []))
+            vectors = np.vstack([vectors, query[None, :]])[-self.max_entries:]
+            entries = (entries + [(time.time(), answer, list(context_ids or []))])[-self.max_entries:]
+            self._groups[key] = (vectors, entries)
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = sum(len(group[1]) for group in self._groups.values())
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.generation.graphrag import GraphRAG
+
+from .answer_cache import SemanticAnswerCache, config_key
+from .search import build_prompt, context_ids
+
+logger = logging.getLogger(__name__)
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """
+    Read questions from a JSONL file. Each line is either a JSON string or an object
+    with a "question" key (and optionally an "id"); lines without an id are numbered.
+    """
+    questions = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            record.setdefault("id", line_number)
+            questions.append(record)
+    return questions
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class BatchQuestionAnswerer:
+    """
+    Answers a batch of questions with one or more GraphRAG pipelines, many questions at a
+    time. Each question is embedded once and its vector shared by all pipelines; retrieval
+    runs on a thread pool and generation uses the LLM's `ainvoke`.
+
+    Every (question, pipeline) pair produces one result with the answer, the ids of the
+    retrieved context and the latency of each stage (embedding, retrieval, generation).
+
+    Args:
+        rags (Dict[str, GraphRAG]): Pipelines by name.
+        embedder (Embedder): Embedder shared by the retrievers. Without one, retrievers
+            embed `query_text` themselves.
+        concurrency (int): Questions in flight at once.
+        retriever_config (dict): Parameters passed to every retriever, e.g. top_k.
+        examples (str): Examples added to the prompt.
+        answer_cache (SemanticAnswerCache): Optional cache of answers to similar questions,
+            consulted after embedding; hits skip retrieval and generation.
+    """
+
+    def __init__(
+        self,
+        rags: Dict[str, GraphRAG],
+        embedder: Optional[Embedder] = None,
+        concurrency: int = 8,
+        retriever_config: Optional[Dict[str, Any]] = None,
+        examples: str = "",
+        answer_cache: Optional[SemanticAnswerCache] = None,
+    ):
+        self.rags = rags
+        self.embedder = embedder
+        self.concurrency = concurrency
+        self.retriever_config = retriever_config or {}
+        self.examples = examples
+        self.answer_cache = answer_cache
+        # one thread per concurrent retrieval, so retrievals don't queue behind each other
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency * max(1, len(rags)), thread_name_prefix="batch-qa"
+        )
+
+    async def _run_in_thread(self, function, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: function(*args, **kwargs))
+
+    async def _answer_with(self, name: str, question: Dict[str, Any], query_vector: Optional[list], embedding_seconds: float) -> Dict[str, Any]:
+        rag = self.rags[name]
+        result: Dict[str, Any] = {"id": question["id"], "pipeline": name, "question": question["question"]}
+        latency = {"embedding": round(embedding_seconds, 3)}
+        cache_key = config_key(name, self.retriever_config, self.examples)
+        if self.answer_cache is not None and query_vector is not None:
+            cached = self.answer_cache.get(query_vector, cache_key)
+            if cached is not None:
+                result.update(answer=cached["answer"], context_ids=cached["context_ids"], cached=True)
+                latency["total"] = latency["embedding"]
+                result["latency"] = latency
+                return result
+        try:
+            start_time = time.perf_counter()
+            if query_vector is not None:
+                retriever_result = await self._run_in_thread(
+                    rag.retriever.search, query_vector=query_vector, **self.retriever_config
+                )
+            else:
+                retriever_result = await self._run_in_thread(
+                    rag.retriever.search, query_text=question["question"], **self.retriever_config
+                )
+            latency["retrieval"] = round(time.perf_counter() - start_time, 3)
+
+            start_time = time.perf_counter()
+            prompt = build_prompt(rag, question["question"], retriever_result, self.examples)
+            answer = await rag.llm.ainvoke(prompt, system_instruction=rag.prompt_template.system_instructions)
+            latency["generation"] = round(time.perf_counter() - start_time, 3)
+
+            result["answer"] = answer.content
+            result["context_ids"] = context_ids(retriever_result)
+            if self.answer_cache is not None and query_vector is not None:
+                self.answer_cache.put(query_vector, answer.content, result["context_ids"], cache_key)
+        except Exception as e:
+            logger.error(f"Question {question['id']} failed in {name}: {e}")
+            result["error"] = str(e)
+        latency["total"] = round(sum(latency.values()), 3)
+        result["latency"] = latency
+        return result
+
+    async def answer(self, question: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Answer one question ({"id", "question"}) with every pipeline."""
+        query_vector = None
+        embedding_seconds = 0.0
+        if self.embedder is not None:
+            start_time = time.perf_counter()
+            try:
+                query_vector = await self._run_in_thread(self.embedder.embed_query, question["question"])
+            except Exception as e:
+                # each retriever will try to embed the question itself
+                logger.error(f"Embedding question {question['id']} failed: {e}")
+            embedding_seconds = time.perf_counter() - start_time
+        return list(
+            await asyncio.gather(
+                *(self._answer_with(name, question, query_vector, embedding_seconds) for name in self.rags)
+            )
+        )
+
+    async def run(self, questions: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """
+        Answer all questions, appending each result to `output_path` (JSONL) as soon as it
+        is ready, so a long run can be followed (and an interrupted one inspected).
+
+        Returns:
+            dict: Counts, wall time and total latency percentiles of the run.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        write_lock = asyncio.Lock()
+        start_time = time.perf_counter()
+        results: List[Dict[str, Any]] = []
+
+        with open(output_path, "w") as output:
+
+            async def answer_and_write(question):
+                async with semaphore:
+                    question_results = await self.answer(question)
+                async with write_lock:
+                    for result in question_results:
+                        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+                    results.extend(question_results)
+
+            await asyncio.gather(*(answer_and_write(question) for question in questions))
+
+        totals = [r["latency"]["total"] for r in results if "error" not in r]
+        summary = {
+            "questions": len(questions),
+            "answers": len(totals),
+            "failures": len(results) - len(totals),
+            "seconds": round(time.perf_counter() - start_time, 3),
+            "latency_p50": _percentile(totals, 0.5),
+            "latency_p95": _percentile(totals, 0.95),
+        }
+        if self.answer_cache is not None:
+            summary["answer_cache"] = self.answer_cache.stats
+        logger.info(f"Batch finished: {summary}")
+        return summary
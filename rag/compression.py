@@ -0,0 +1,209 @@
+import ast
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from neo4j_graphrag.retrievers.base import Retriever
+from neo4j_graphrag.types import RawSearchResult, RetrieverResult, RetrieverResultItem
+
+from ingestion.prompt_compiler import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+TEXT_HEADER = "=== text ==="
+RELS_HEADER = "=== kg_rels ==="
+SEPARATOR = "\n---\n"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def text_overlap(previous: str, following: str, max_chars: int, min_chars: int = 20) -> int:
+    """
+    Length of the longest suffix of `previous` that starts `following` (splitter overlap).
+    Matches shorter than `min_chars` are coincidences, not overlap, and count as 0.
+    """
+    for size in range(min(len(previous), len(following), max_chars), min_chars - 1, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+def _parse(content: str) -> Tuple[str, Any]:
+    """
+    Split an item's content into its parts: ("sections", (texts, rels)) for the
+    '=== text === / === kg_rels ===' context, ("node", properties) for VectorRetriever's
+    node repr, ("text", content) otherwise.
+    """
+    if content.startswith(TEXT_HEADER):
+        text_part, _, rels_part = content[len(TEXT_HEADER):].partition(RELS_HEADER)
+        texts = [t.strip() for t in text_part.split(SEPARATOR) if t.strip()]
+        rels = [r.strip() for r in rels_part.split(SEPARATOR) if r.strip()]
+        return "sections", (texts, rels)
+    if content.startswith("{") and "'text'" in content:
+        try:
+            properties = ast.literal_eval(content)
+        except (ValueError, SyntaxError):
+            properties = None
+        if isinstance(properties, dict) and isinstance(properties.get("text"), str):
+            return "node", properties
+    return "text", content
+
+
+class ContextCompressor:
+    """
+    Shrinks retrieved context before it is put in the prompt:
+
+    - chunk texts that overlap (the splitter repeats the end of a chunk at the start of
+      the next) are merged, and texts contained in another one are dropped;
+    - duplicate kg_rels lines (same text up to case and whitespace) are dropped;
+    - what remains is kept in relevance order (the retriever's order, texts before
+      relationships within an item) until `max_tokens` is reached.
+
+    Items keep their format (node properties, '=== text ===' sections or plain text), so
+    the compressed result can be used wherever the original one was.
+
+    Attributes:
+        max_tokens (Optional[int]): Token budget of the whole context. None for no budget.
+        max_overlap_chars (int): Longest overlap looked for between two chunk texts.
+        token_counter (TokenCounter): Counter used for the budget and the metrics.
+        stats (dict): Totals over all calls: tokens in and out, merged chunks, dropped
+            relationship lines and tokens cut by the budget.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = 6000, max_overlap_chars: int = 1000, token_counter: Optional[TokenCounter] = None):
+        self.max_tokens = max_tokens
+        self.max_overlap_chars = max_overlap_chars
+        self.token_counter = token_counter or TokenCounter()
+        self.stats = {"calls": 0, "tokens_in": 0, "tokens_out": 0, "merged_chunks": 0, "duplicate_rels": 0, "truncated_tokens": 0}
+        self._lock = threading.Lock()
+
+    def _merge(self, texts: List[Tuple[int, str]], metrics: Dict[str, int]) -> List[Tuple[int, str]]:
+        """
+        Merge overlapping or contained texts, given as (item position, text) in relevance
+        order. A merged text stays with the most relevant of its items.
+        """
+        merged: List[Tuple[int, str]] = []
+        for position, text in texts:
+            for i, (kept_position, kept) in enumerate(merged):
+                if text in kept:
+                    pass
+                elif kept in text:
+                    merged[i] = (kept_position, text)
+                elif text_overlap(kept, text, self.max_overlap_chars):
+                    merged[i] = (kept_position, kept + text[text_overlap(kept, text, self.max_overlap_chars):])
+                elif text_overlap(text, kept, self.max_overlap_chars):
+                    merged[i] = (kept_position, text + kept[text_overlap(text, kept, self.max_overlap_chars):])
+                else:
+                    continue
+                metrics["merged_chunks"] += 1
+                break
+            else:
+                merged.append((position, text))
+        return merged
+
+    def _fit(self, text: str, budget: List[int], metrics: Dict[str, int], partial: bool = False) -> Optional[str]:
+        """
+        `text` if it fits in what is left of the budget (a one-element list), which it then
+        uses. With `partial`, a text too long is cut between words to the budget instead.
+        """
+        tokens = self.token_counter.count(text)
+        if self.max_tokens is None or tokens <= budget[0]:
+            budget[0] -= tokens
+            return text
+        if partial and budget[0] > 0:
+            cut = text[: len(text) * budget[0] // tokens].rsplit(" ", 1)[0]
+            if cut:
+                cut_tokens = self.token_counter.count(cut)
+                metrics["truncated_tokens"] += tokens - cut_tokens
+                budget[0] -= cut_tokens
+                return cut
+        metrics["truncated_tokens"] += tokens
+        return None
+
+    def compress(self, retriever_result: RetrieverResult) -> RetrieverResult:
+        metrics = {"tokens_in": 0, "tokens_out": 0, "merged_chunks": 0, "duplicate_rels": 0, "truncated_tokens": 0}
+        parsed = []
+        texts: List[Tuple[int, str]] = []
+        for position, item in enumerate(retriever_result.items):
+            metrics["tokens_in"] += self.token_counter.count(item.content)
+            kind, value = _parse(item.content)
+            parsed.append((item, kind, value))
+            if kind == "sections":
+                texts.extend((position, text) for text in value[0])
+            else:
+                texts.append((position, value["text"] if kind == "node" else value))
+
+        texts_by_item: Dict[int, List[str]] = {}
+        for position, text in self._merge(texts, metrics):
+            texts_by_item.setdefault(position, []).append(text)
+
+        budget = [self.max_tokens or 0]
+        seen_rels = set()
+        items = []
+        for position, (item, kind, value) in enumerate(parsed):
+            kept_texts = [
+                fitted for fitted in (self._fit(text, budget, metrics, partial=True) for text in texts_by_item.get(position, []))
+                if fitted
+            ]
+            if kind == "sections":
+                rels = []
+                for line in value[1]:
+                    key = _WHITESPACE.sub(" ", line).lower()
+                    if key in seen_rels:
+                        metrics["duplicate_rels"] += 1
+                        continue
+                    seen_rels.add(key)
+                    if self._fit(line, budget, metrics):
+                        rels.append(line)
+                if not kept_texts and not rels:
+                    continue
+                content = f"{TEXT_HEADER}\n{SEPARATOR.join(kept_texts)}\n\n{RELS_HEADER}\n{SEPARATOR.join(rels)}"
+            elif not kept_texts:
+                continue  # merged into a more relevant item, or over budget
+            elif kind == "node":
+                content = str({**value, "text": kept_texts[0]})
+            else:
+                content = kept_texts[0]
+            metrics["tokens_out"] += self.token_counter.count(content)
+            items.append(RetrieverResultItem(content=content, metadata=item.metadata))
+
+        with self._lock:
+            self.stats["calls"] += 1
+            for name, value in metrics.items():
+                self.stats[name] += value
+        if metrics["tokens_in"]:
+            logger.info(
+                f"Context compressed from {metrics['tokens_in']} to {metrics['tokens_out']} tokens "
+                f"({metrics['merged_chunks']} chunks merged, {metrics['duplicate_rels']} duplicate relationships, "
+                f"{metrics['truncated_tokens']} tokens over budget)"
+            )
+        metadata = dict(retriever_result.metadata or {})
+        metadata["compression"] = metrics
+        return RetrieverResult(items=items, metadata=metadata)
+
+
+class CompressingRetriever(Retriever):
+    """
+    Wraps a retriever and compresses its results with a ContextCompressor, so it can sit
+    between any retriever and the RagTemplate (GraphRAG, MultiRetrieverSearch, ...).
+    Search arguments (query_text, query_vector, top_k, ...) go to the wrapped retriever.
+
+    Args:
+        retriever (Retriever): The retriever whose results are compressed.
+        compressor (ContextCompressor): The compression stage.
+    """
+
+    VERIFY_NEO4J_VERSION = False
+
+    def __init__(self, retriever: Retriever, compressor: Optional[ContextCompressor] = None):
+        self.driver = retriever.driver
+        self.neo4j_database = retriever.neo4j_database
+        self.retriever = retriever
+        self.compressor = compressor or ContextCompressor()
+
+    def get_search_results(self, *args: Any, **kwargs: Any) -> RawSearchResult:
+        return self.retriever.get_search_results(*args, **kwargs)
+
+    def search(self, *args: Any, **kwargs: Any) -> RetrieverResult:
+        return self.compressor.compress(self.retriever.search(*args, **kwargs))
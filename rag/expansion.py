@@ -0,0 +1,138 @@
+import logging
+from typing import List, Optional
+
+import neo4j
+from neo4j_graphrag.types import RetrieverResultItem
+
+from ingestion.prompt_compiler import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+RANKINGS = ("degree", "relevance")
+
+# rank of a candidate relationship (higher first); `neighbor` is the node it leads to
+_RANK_EXPRESSIONS = {
+    # well-connected neighbours first
+    "degree": "COUNT {{ (neighbor)--() }}",
+    # neighbours also mentioned in the retrieved chunk first, then by degree
+    "relevance": "CASE WHEN EXISTS {{ (neighbor)-[:FROM_CHUNK]->(chunk) }} THEN 1000000 ELSE 0 END + COUNT {{ (neighbor)--() }}",
+}
+
+_HOP = """
+    CALL {{
+        WITH chunk, frontier, rels
+        UNWIND frontier AS source
+        CALL {{
+            WITH source, rels
+            MATCH (source)-[rel:!FROM_CHUNK]-(neighbor)
+            WHERE NOT rel IN rels
+            WITH rel, neighbor
+            LIMIT {max_fanout}
+            RETURN rel, neighbor
+        }}
+        WITH DISTINCT chunk, rel, neighbor
+        WITH rel, neighbor, {rank} AS rank
+        ORDER BY rank DESC
+        LIMIT {max_rels_per_hop}
+        RETURN collect(rel) AS hop_rels, collect(DISTINCT neighbor) AS next_frontier
+    }}
+    WITH chunk, score, next_frontier AS frontier, rels + hop_rels AS rels"""
+
+_QUERY = """
+WITH node AS chunk, score
+CALL {{
+    WITH chunk, score
+    MATCH (chunk)<-[:FROM_CHUNK]-(entity)
+    WITH chunk, score, collect(DISTINCT entity) AS frontier, [] AS rels{hops}
+    RETURN rels[..{max_rels_per_chunk}] AS chunk_rels
+}}
+WITH chunk, score, chunk_rels
+ORDER BY score DESC
+UNWIND (CASE WHEN chunk_rels = [] THEN [null] ELSE chunk_rels END) AS rel
+WITH collect(DISTINCT chunk.text) AS texts, collect(DISTINCT elementId(chunk)) AS ids, collect(DISTINCT rel) AS rels
+RETURN texts, ids,
+    [r IN rels | startNode(r).name + ' - ' + type(r) + '(' + coalesce(r.details, '') + ')' + ' -> ' + endNode(r).name] AS rels
+"""
+
+
+class GraphExpansion:
+    """
+    A bounded replacement for the `-[relList:!FROM_CHUNK]-{1,2}()` expansion of the
+    VectorCypherRetriever query, which follows every relationship of hub entities.
+
+    From the entities of each retrieved chunk, the graph is expanded hop by hop. Each hop
+    looks at no more than `max_fanout` relationships per entity, keeps the
+    `max_rels_per_hop` best ranked ones, and continues only from their endpoints. A chunk
+    contributes at most `max_rels_per_chunk` relationships, and chunks are merged
+    best-scored first. Relationships are ranked by the `degree` of the node they lead to,
+    or by `relevance`: nodes mentioned in the same chunk come first, then by degree.
+
+    `result_formatter` builds the context and stops adding kg_rels lines once
+    `max_context_tokens` is reached, so the prompt stays bounded.
+
+    Args:
+        max_hops (int): Hops followed from the chunk entities.
+        max_rels_per_hop (int): Relationships kept per hop and chunk.
+        max_rels_per_chunk (int): Relationships kept per chunk over all hops.
+        max_fanout (int): Relationships looked at per entity and hop.
+        ranking (str): "degree" or "relevance".
+        max_context_tokens (int): Token budget of the kg_rels section. None for no budget.
+        token_counter (TokenCounter): Counter used for the budget.
+    """
+
+    def __init__(
+        self,
+        max_hops: int = 2,
+        max_rels_per_hop: int = 25,
+        max_rels_per_chunk: int = 40,
+        max_fanout: int = 200,
+        ranking: str = "degree",
+        max_context_tokens: Optional[int] = 2000,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        if ranking not in RANKINGS:
+            raise ValueError(f"ranking must be one of {RANKINGS}, not {ranking!r}")
+        if max_hops < 1:
+            raise ValueError("max_hops must be at least 1")
+        self.max_hops = max_hops
+        self.max_rels_per_hop = max_rels_per_hop
+        self.max_rels_per_chunk = max_rels_per_chunk
+        self.max_fanout = max_fanout
+        self.ranking = ranking
+        self.max_context_tokens = max_context_tokens
+        self.token_counter = token_counter or TokenCounter()
+
+    @property
+    def retrieval_query(self) -> str:
+        """The `retrieval_query` for VectorCypherRetriever; returns `texts`, chunk element `ids` and `rels` lists."""
+        hop = _HOP.format(
+            max_fanout=self.max_fanout,
+            rank=_RANK_EXPRESSIONS[self.ranking].format(),
+            max_rels_per_hop=self.max_rels_per_hop,
+        )
+        return _QUERY.format(hops=hop * self.max_hops, max_rels_per_chunk=self.max_rels_per_chunk)
+
+    def budget(self, lines: List[str]) -> List[str]:
+        """The leading lines that fit in `max_context_tokens`."""
+        if self.max_context_tokens is None:
+            return lines
+        kept, tokens = [], 0
+        for line in lines:
+            tokens += self.token_counter.count(line) + 1
+            if tokens > self.max_context_tokens:
+                logger.info(f"kg_rels budget of {self.max_context_tokens} tokens reached, kept {len(kept)} of {len(lines)} relationships")
+                break
+            kept.append(line)
+        return kept
+
+    def result_formatter(self, record: neo4j.Record) -> RetrieverResultItem:
+        """
+        Format a record of `retrieval_query` as the '=== text === / === kg_rels ===' context.
+        The element ids of the retrieved chunks go to metadata["ids"].
+        """
+        rels = self.budget(record.get("rels") or [])
+        content = (
+            "=== text ===\n" + "\n---\n".join(record.get("texts") or [])
+            + "\n\n=== kg_rels ===\n" + "\n---\n".join(rels)
+        )
+        return RetrieverResultItem(content=content, metadata={"ids": list(record.get("ids") or []), "relationships": len(rels)})
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.generation.graphrag import GraphRAG
+from neo4j_graphrag.generation.types import RagResultModel
+from neo4j_graphrag.types import RetrieverResult
+
+from .answer_cache import SemanticAnswerCache, config_key
+from .search import build_prompt, context_ids
+
+logger = logging.getLogger(__name__)
+
+
+class MultiRetrieverSearch:
+    """
+    Runs one question through several GraphRAG pipelines (e.g. vector and vector + cypher
+    retrieval side by side) while embedding it only once: the query vector is passed to
+    every retriever as `query_vector`, and the pipelines run concurrently.
+
+    Recent query vectors are memoized, so asking the same question again (or streaming
+    it after a search) costs no embedding call. With an `answer_cache`, a question close
+    enough to one answered before (same pipeline and retriever config) is answered from
+    the cache without retrieval or generation.
+
+    Args:
+        rags (Dict[str, GraphRAG]): Pipelines by name. Their retrievers must accept
+            `query_vector` (VectorRetriever, VectorCypherRetriever, LocalVectorRetriever).
+        embedder (Embedder): Embedder shared by the retrievers.
+        max_workers (int): Threads running the pipelines. Defaults to one per pipeline.
+        max_cached_queries (int): Query vectors kept in memory.
+        answer_cache (SemanticAnswerCache): Optional cache of answers to similar questions.
+            Not used when the retrieved context is requested (`return_context=True`).
+    """
+
+    def __init__(
+        self,
+        rags: Dict[str, GraphRAG],
+        embedder: Embedder,
+        max_workers: Optional[int] = None,
+        max_cached_queries: int = 256,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+    ):
+        self.rags = rags
+        self.embedder = embedder
+        self.max_cached_queries = max_cached_queries
+        self.answer_cache = answer_cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(rags), thread_name_prefix="multi-search")
+        self._vectors: "OrderedDict[str, list[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, query_text: str) -> list[float]:
+        with self._lock:
+            vector = self._vectors.get(query_text)
+            if vector is not None:
+                self._vectors.move_to_end(query_text)
+                return vector
+        start_time = time.perf_counter()
+        vector = self.embedder.embed_query(query_text)
+        logger.info(f"Query embedded once for {len(self.rags)} retrievers in {time.perf_counter() - start_time:.2f}s")
+        with self._lock:
+            self._vectors[query_text] = vector
+            while len(self._vectors) > self.max_cached_queries:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def pipeline_names(self, pipelines: Optional[List[str]] = None) -> List[str]:
+        """The names of `pipelines` in the order of `rags`, all of them if None."""
+        if pipelines is None:
+            return list(self.rags)
+        unknown = [name for name in pipelines if name not in self.rags]
+        if unknown:
+            raise ValueError(f"Unknown pipelines {unknown}; available: {list(self.rags)}")
+        return [name for name in self.rags if name in pipelines]
+
+    def _retrieve(self, name: str, query_vector: list[float], retriever_config: dict[str, Any]) -> RetrieverResult:
+        start_time = time.perf_counter()
+        result = self.rags[name].retriever.search(query_vector=query_vector, **retriever_config)
+        logger.info(f"{name}: retrieval took {time.perf_counter() - start_time:.2f}s")
+        return result
+
+    def _search(
+        self, name: str, query_text: str, query_vector: list[float], retriever_config: dict[str, Any], examples: str, return_context: bool
+    ) -> RagResultModel:
+        rag = self.rags[name]
+        use_cache = self.answer_cache is not None and not return_context
+        cache_key = config_key(name, retriever_config, examples)
+        if use_cache:
+            cached = self.answer_cache.get(query_vector, cache_key)
+            if cached is not None:
+                logger.info(f"{name}: answered from cache (similarity {cached['similarity']:.3f})")
+                return RagResultModel(answer=cached["answer"])
+        retriever_result = self._retrieve(name, query_vector, retriever_config)
+        prompt = build_prompt(rag, query_text, retriever_result, examples)
+        answer = rag.llm.invoke(prompt, system_instruction=rag.prompt_template.system_instructions)
+        if use_cache:
+            self.answer_cache.put(query_vector, answer.content, context_ids(retriever_result), cache_key)
+        result: dict[str, Any] = {"answer": answer.content}
+        if return_context:
+            result["retriever_result"] = retriever_result
+        return RagResultModel(**result)
+
+    def retrieve(
+        self, query_text: str, retriever_config: Optional[dict[str, Any]] = None, pipelines: Optional[List[str]] = None
+    ) -> Dict[str, RetrieverResult]:
+        """Run every retriever (or those of `pipelines`) on the question concurrently, without generating answers."""
+        query_vector = self.embed(query_text)
+        futures = {
+            name: self._executor.submit(self._retrieve, name, query_vector, retriever_config or {})
+            for name in self.pipeline_names(pipelines)
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def search(
+        self,
+        query_text: str,
+        retriever_config: Optional[dict[str, Any]] = None,
+        examples: str = "",
+        return_context: bool = False,
+        pipelines: Optional[List[str]] = None,
+    ) -> Dict[str, RagResultModel]:
+        """
+        Answer the question with every pipeline (or those named in `pipelines`)
+        concurrently, like GraphRAG.search.
+
+        Returns:
+            dict: One RagResultModel per pipeline name, in the order of `rags`.
+        """
+        query_vector = self.embed(query_text)
+        futures = {
+            name: self._executor.submit(
+                self._search, name, query_text, query_vector, retriever_config or {}, examples, return_context
+            )
+            for name in self.pipeline_names(pipelines)
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    async def asearch(
+        self,
+        query_text: str,
+        retriever_config: Optional[dict[str, Any]] = None,
+        examples: str = "",
+        return_context: bool = False,
+        pipelines: Optional[List[str]] = None,
+    ) -> Dict[str, RagResultModel]:
+        """Asynchronous version of search."""
+        loop = asyncio.get_running_loop()
+        names = self.pipeline_names(pipelines)
+        query_vector = await loop.run_in_executor(self._executor, self.embed, query_text)
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._executor,
+                    self._search, name, query_text, query_vector, retriever_config or {}, examples, return_context,
+                )
+                for name in names
+            )
+        )
+        return dict(zip(names, results))
@@ -0,0 +1,177 @@
+import functools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RAG_TEMPLATE = '''Answer the Question using the following Context. Only respond with information mentioned in the Context. Do not inject any speculative information not mentioned. 
+
+    # Question:
+    {query_text}
+    
+    # Context:
+    {context}
+
+    # Answer:
+    '''
+
+
+def _component(build):
+    """
+    A lazily built, shared component: `build` runs on first access only (under the
+    resources lock), and its duration is recorded in `build_times`.
+    """
+
+    @functools.wraps(build)
+    def getter(self):
+        name = build.__name__
+        if name not in self._components:
+            with self._lock:
+                if name not in self._components:
+                    start_time = time.perf_counter()
+                    self._components[name] = build(self)
+                    self.build_times[name] = time.perf_counter() - start_time
+                    logger.debug(f"Built {name} in {self.build_times[name]:.3f}s")
+        return self._components[name]
+
+    return property(getter)
+
+
+class QueryResources:
+    """
+    The components of the query scripts (Neo4j driver, embedder, Claude, retrievers,
+    GraphRAG pipelines, caches), built on first use instead of at import time. Heavy
+    dependencies (neo4j_graphrag, boto3, numpy) are imported by the properties that need
+    them, so creating this object is free and a command only pays for what it uses.
+
+    Configuration comes from the environment (.env is loaded on creation): NEO4J_URI,
+    NEO4J_USERNAME, NEO4J_PASSWORD, LOCAL_VECTOR_INDEX and ANSWER_CACHE_THRESHOLD.
+
+    Attributes:
+        build_times (dict): Seconds spent building each component, by name.
+    """
+
+    def __init__(self, env_file: str = ".env"):
+        from dotenv import load_dotenv
+
+        load_dotenv(env_file, override=True)
+        self.build_times: dict = {}
+        self._components: dict = {}
+        self._lock = threading.RLock()
+
+    @_component
+    def driver(self):
+        import neo4j
+
+        # the driver connects on its first query, not here
+        return neo4j.GraphDatabase.driver(
+            os.getenv('NEO4J_URI', ''), auth=(os.getenv('NEO4J_USERNAME', ''), os.getenv('NEO4J_PASSWORD', ''))
+        )
+
+    @_component
+    def llm(self):
+        from bedrock.neojs_claude import NeoJSClaude
+        from bedrock.response_cache import DiskResponseCache
+
+        return NeoJSClaude(
+            model_name="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            model_params={
+                "response_format": {"type": "json_object"},  # use json_object formatting for best results
+                "temperature": 0,  # turning temperature down for more deterministic results
+            },
+            # temperature 0 answers are reused across reruns
+            response_cache=DiskResponseCache(),
+        )
+
+    @_component
+    def embedder(self):
+        from bedrock.embedding_cache import EmbeddingCache
+        from bedrock.neojs_embedder import NeoJSEmbedder
+
+        # chunks and questions already embedded on a previous run are read from the on-disk cache
+        return NeoJSEmbedder(model_id="amazon.titan-embed-text-v2:0", cache=EmbeddingCache())
+
+    @_component
+    def vector_retriever(self):
+        # with LOCAL_VECTOR_INDEX set, chunks are searched in-process (no database round trip);
+        # the index directory is exported from Neo4j the first time
+        local_vector_index = os.getenv('LOCAL_VECTOR_INDEX', '')
+        if local_vector_index:
+            from .vector_index import LocalVectorIndex, LocalVectorRetriever
+
+            return LocalVectorRetriever(
+                LocalVectorIndex.open_or_export(self.driver, local_vector_index, return_properties=["text"]),
+                embedder=self.embedder,
+            )
+        from neo4j_graphrag.retrievers import VectorRetriever
+
+        return VectorRetriever(self.driver, index_name="text_embeddings", embedder=self.embedder, return_properties=["text"])
+
+    @_component
+    def expansion(self):
+        from .expansion import GraphExpansion
+
+        # expansion from the retrieved chunks is capped per hop and per chunk, and the kg_rels
+        # section of the context is cut at a token budget, so hub entities stay cheap
+        return GraphExpansion(max_hops=2, ranking="degree", max_context_tokens=2000)
+
+    @_component
+    def vc_retriever(self):
+        from neo4j_graphrag.retrievers import VectorCypherRetriever
+
+        return VectorCypherRetriever(
+            self.driver,
+            index_name="text_embeddings",
+            embedder=self.embedder,
+            retrieval_query=self.expansion.retrieval_query,
+            result_formatter=self.expansion.result_formatter,
+        )
+
+    @_component
+    def compressor(self):
+        from .compression import ContextCompressor
+
+        return ContextCompressor(max_tokens=6000)
+
+    @_component
+    def answer_cache(self):
+        from .answer_cache import SemanticAnswerCache, file_version
+
+        # rephrasings of a question already answered reuse its answer; re-ingesting rewrites the
+        # manifest, which drops every cached answer
+        return SemanticAnswerCache(
+            threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95')),
+            ttl=24 * 3600,
+            graph_version=file_version('.cache/ingestion_manifest.json'),
+        )
+
+    def _rag(self, retriever):
+        from neo4j_graphrag.generation import RagTemplate
+        from neo4j_graphrag.generation.graphrag import GraphRAG
+
+        from .compression import CompressingRetriever
+
+        rag_template = RagTemplate(template=RAG_TEMPLATE, expected_inputs=['query_text', 'context'])
+        # overlapping chunks are merged and duplicate relationships dropped before the prompt is built
+        return GraphRAG(llm=self.llm, retriever=CompressingRetriever(retriever, self.compressor), prompt_template=rag_template)
+
+    @_component
+    def vector_rag(self):
+        return self._rag(self.vector_retriever)
+
+    @_component
+    def vc_rag(self):
+        return self._rag(self.vc_retriever)
+
+    @_component
+    def rags(self):
+        """GraphRAG pipelines by name: "Vector" and "Vector + Cypher"."""
+        return {"Vector": self.vector_rag, "Vector + Cypher": self.vc_rag}
+
+    @_component
+    def search(self):
+        from .multi_search import MultiRetrieverSearch
+
+        return MultiRetrieverSearch(self.rags, embedder=self.embedder, answer_cache=self.answer_cache)
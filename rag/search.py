@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from neo4j_graphrag.generation.graphrag import GraphRAG
+from neo4j_graphrag.types import RetrieverResult
+
+logger = logging.getLogger(__name__)
+
+
+def build_prompt(rag: GraphRAG, query_text: str, retriever_result: RetrieverResult, examples: str = "") -> str:
+    """Format the RAG prompt the same way GraphRAG.search does."""
+    context = "\n".join(item.content for item in retriever_result.items)
+    return rag.prompt_template.format(query_text=query_text, context=context, examples=examples)
+
+
+def context_ids(retriever_result: RetrieverResult) -> list[Any]:
+    """
+    Ids of the retrieved chunks: vector retrievers put the node id in metadata["id"],
+    GraphExpansion puts the ids of all the chunks an item was built from in metadata["ids"].
+    """
+    ids: list[Any] = []
+    for item in retriever_result.items:
+        metadata = item.metadata or {}
+        if metadata.get("id"):
+            ids.append(metadata["id"])
+        ids.extend(metadata.get("ids") or [])
+    return ids
+
+
+def _retrieve(
+    rag: GraphRAG, query_text: str, retriever_config: Optional[dict[str, Any]], query_vector: Optional[list[float]]
+) -> RetrieverResult:
+    if query_vector is not None:
+        return rag.retriever.search(query_vector=query_vector, **(retriever_config or {}))
+    return rag.retriever.search(query_text=query_text, **(retriever_config or {}))
+
+
+def stream_search(
+    rag: GraphRAG,
+    query_text: str,
+    retriever_config: Optional[dict[str, Any]] = None,
+    examples: str = "",
+    query_vector: Optional[list[float]] = None,
+) -> Iterator[str]:
+    """
+    Streaming counterpart of GraphRAG.search: retrieves the context, then yields the
+    answer text as the LLM produces it. The LLM must provide `stream` (see NeoJSClaude).
+    A precomputed `query_vector` (see MultiRetrieverSearch.embed) skips the query embedding.
+    """
+    start_time = time.perf_counter()
+    retriever_result = _retrieve(rag, query_text, retriever_config, query_vector)
+    logger.info(f"Retrieval took {time.perf_counter() - start_time:.2f}s")
+    prompt = build_prompt(rag, query_text, retriever_result, examples)
+    yield from rag.llm.stream(prompt, system_instruction=rag.prompt_template.system_instructions)  # type: ignore
+
+
+async def astream_search(
+    rag: GraphRAG,
+    query_text: str,
+    retriever_config: Optional[dict[str, Any]] = None,
+    examples: str = "",
+    query_vector: Optional[list[float]] = None,
+) -> AsyncIterator[str]:
+    """Asynchronous version of stream_search. The LLM must provide `astream`."""
+    start_time = time.perf_counter()
+    retriever_result = await asyncio.to_thread(_retrieve, rag, query_text, retriever_config, query_vector)
+    logger.info(f"Retrieval took {time.perf_counter() - start_time:.2f}s")
+    prompt = build_prompt(rag, query_text, retriever_result, examples)
+    async for text in rag.llm.astream(prompt, system_instruction=rag.prompt_template.system_instructions):  # type: ignore
+        yield text
@@ -0,0 +1,270 @@
+import json
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .resources import QueryResources
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_HTTPServer"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        query_server = self.server.query_server
+        if self.path == "/health":
+            status = 503 if query_server.draining else 200
+            self._send_json(status, query_server.health())
+        elif self.path == "/metrics":
+            self._send_json(200, query_server.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/search":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict) or not isinstance(request.get("question"), str) or not request["question"].strip():
+                raise ValueError('The body must be a JSON object with a non-empty "question"')
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self.server.query_server.handle_search(self, request)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # in-flight requests are finished, not killed, on shutdown
+    daemon_threads = False
+    block_on_close = True
+    query_server: "QueryServer"
+
+
+class QueryServer:
+    """
+    A long-lived HTTP/JSON query server: the Neo4j driver, Claude, the embedder, the
+    retrievers and the caches are built (and connected) once at start, so a question
+    costs retrieval and model time only.
+
+    Endpoints:
+
+    - `POST /search` with {"question", "pipelines": optional list of pipeline names,
+      "top_k": 5, "stream": false, "return_context": false}. Returns
+      {"answers": {pipeline: answer}, "latency_ms"}; with "stream", the answers are sent
+      as NDJSON lines {"pipeline", "text"} as they are generated, then {"pipeline", "done"}.
+    - `GET /health`: 200 while serving, 503 once shutdown started.
+    - `GET /metrics`: request counts, in-flight requests, latency percentiles and the
+      answer cache, compression, Claude token usage (including prompt cache reads),
+      Claude streaming latency and component build statistics.
+
+    At most `max_concurrent` searches run at once, each with its pipelines in parallel (the
+    server's MultiRetrieverSearch has `max_concurrent` threads per pipeline, so admitted
+    requests never queue behind each other); a request waits up to `queue_timeout`
+    seconds for a slot, then gets 503. SIGINT/SIGTERM stop accepting requests, let the
+    ones in flight finish and close the driver.
+
+    Args:
+        resources (QueryResources): The components to serve. Defaults to a new one.
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        max_concurrent (int): Searches running at the same time.
+        queue_timeout (float): Seconds a request waits for a free slot.
+    """
+
+    def __init__(
+        self,
+        resources: Optional[QueryResources] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        max_concurrent: int = 8,
+        queue_timeout: float = 30.0,
+    ):
+        self.resources = resources or QueryResources()
+        self.host = host
+        self.port = port
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.draining = False
+        self.started_at = time.time()
+        self.stats = {"requests": 0, "errors": 0, "rejected": 0, "in_flight": 0}
+        self._latencies: deque = deque(maxlen=1000)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._httpd: Optional[_HTTPServer] = None
+        self._multi_search = None
+
+    @property
+    def search(self):
+        """The server's MultiRetrieverSearch, sized for `max_concurrent` requests at once."""
+        if self._multi_search is None:
+            with self._lock:
+                if self._multi_search is None:
+                    from .multi_search import MultiRetrieverSearch
+
+                    rags = self.resources.rags
+                    self._multi_search = MultiRetrieverSearch(
+                        rags,
+                        embedder=self.resources.embedder,
+                        max_workers=self.max_concurrent * len(rags),
+                        answer_cache=self.resources.answer_cache,
+                    )
+        return self._multi_search
+
+    def warm_up(self):
+        """Build every component and open the Neo4j connection before the first request."""
+        start_time = time.perf_counter()
+        self.resources.driver.verify_connectivity()
+        self.search  # builds the embedder, Claude, retrievers and pipelines
+        logger.info(f"Query server warmed up in {time.perf_counter() - start_time:.2f}s")
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "draining" if self.draining else "ok", "uptime_s": round(time.time() - self.started_at, 1)}
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            stats = dict(self.stats)
+        stats["latency_ms_p50"] = round(_percentile(latencies, 0.5) * 1000, 1)
+        stats["latency_ms_p95"] = round(_percentile(latencies, 0.95) * 1000, 1)
+        stats["answer_cache"] = self.resources.answer_cache.stats
+        stats["compression"] = self.resources.compressor.stats
+        if "llm" in self.resources.build_times:
+            stats["llm_usage"] = self.resources.llm.usage
+            stats["llm_streams"] = self.resources.llm.stream_stats
+        stats["build_times_s"] = {name: round(seconds, 3) for name, seconds in self.resources.build_times.items()}
+        return stats
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    def handle_search(self, handler: _Handler, request: Dict[str, Any]):
+        if self.draining:
+            handler._send_json(503, {"error": "Server is shutting down"})
+            return
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count(rejected=1)
+            handler._send_json(503, {"error": f"Busy: {self.max_concurrent} searches in flight"})
+            return
+        self._count(requests=1, in_flight=1)
+        start_time = time.perf_counter()
+        try:
+            if request.get("stream"):
+                self._stream(handler, request)
+            else:
+                self._search(handler, request)
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start_time)
+        except ValueError as e:
+            self._count(errors=1)
+            handler._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._count(errors=1)
+            logger.exception("Search failed")
+            handler._send_json(500, {"error": str(e)})
+        finally:
+            self._count(in_flight=-1)
+            self._slots.release()
+
+    def _search(self, handler: _Handler, request: Dict[str, Any]):
+        start_time = time.perf_counter()
+        results = self.search.search(
+            request["question"],
+            retriever_config={'top_k': int(request.get("top_k", 5))},
+            return_context=bool(request.get("return_context")),
+            pipelines=request.get("pipelines"),
+        )
+        body: Dict[str, Any] = {"answers": {name: result.answer for name, result in results.items()}}
+        if request.get("return_context"):
+            body["context"] = {
+                name: [item.content for item in result.retriever_result.items]
+                for name, result in results.items()
+                if result.retriever_result is not None
+            }
+        body["latency_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        handler._send_json(200, body)
+
+    def _stream(self, handler: _Handler, request: Dict[str, Any]):
+        from .search import stream_search
+
+        search = self.search
+        names = search.pipeline_names(request.get("pipelines"))
+        query_vector = search.embed(request["question"])
+        # HTTP/1.0 without Content-Length: the body ends when the connection closes
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.end_headers()
+
+        def send(line: Dict[str, Any]):
+            handler.wfile.write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+            handler.wfile.flush()
+
+        top_k = int(request.get("top_k", 5))
+        for name in names:
+            try:
+                for text in stream_search(search.rags[name], request["question"], retriever_config={'top_k': top_k}, query_vector=query_vector):
+                    send({"pipeline": name, "text": text})
+            except (BrokenPipeError, ConnectionResetError):
+                logger.info("Client disconnected during streaming")
+                return
+            except Exception as e:
+                # the status line is already sent: report the error in the stream
+                self._count(errors=1)
+                logger.exception(f"{name}: streaming failed")
+                send({"pipeline": name, "error": str(e)})
+                continue
+            send({"pipeline": name, "done": True})
+
+    def shutdown(self):
+        """Stop accepting requests; `serve_forever` returns once the ones in flight are done."""
+        if self.draining or self._httpd is None:
+            return
+        self.draining = True
+        logger.info("Shutting down query server, finishing requests in flight")
+        # shutdown() blocks until serve_forever exits, so it must not run on the serving thread
+        threading.Thread(target=self._httpd.shutdown, name="query-server-shutdown").start()
+
+    def serve_forever(self, warm_up: bool = True, install_signal_handlers: bool = True):
+        if warm_up:
+            self.warm_up()
+        self._httpd = _HTTPServer((self.host, self.port), _Handler)
+        self._httpd.query_server = self
+        self.port = self._httpd.server_address[1]
+        if install_signal_handlers:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: self.shutdown())
+        logger.info(f"Query server listening on http://{self.host}:{self.port}")
+        try:
+            self._httpd.serve_forever()
+        finally:
+            # waits for the request threads (block_on_close)
+            self._httpd.server_close()
+            if "driver" in self.resources.build_times:
+                self.resources.driver.close()
+            logger.info(f"Query server stopped after {self.stats['requests']} requests")
@@ -0,0 +1,293 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import neo4j
+import numpy as np
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.retrievers.base import Retriever
+from neo4j_graphrag.types import RawSearchResult, RetrieverResultItem
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNKS_QUERY = """
+MATCH (n:{label})
+WHERE n.{embedding_property} IS NOT NULL AND elementId(n) > $after
+RETURN elementId(n) AS id, n.{embedding_property} AS embedding, n {{ {properties} }} AS properties
+ORDER BY elementId(n)
+LIMIT $batch_size
+"""
+
+
+class LocalVectorIndex:
+    """
+    An in-process cosine-similarity index over chunk embeddings, stored in a directory:
+
+    - `vectors.f32`: memory-mapped float32 matrix of L2-normalized vectors (grows by doubling);
+    - `records.jsonl`: one {"id", "properties"} line per row, appended as rows are added;
+    - `meta.json`: dimensions and row count, written last so an interrupted append is ignored;
+    - `ivf-centroids.npy` / `ivf-lists.npy`: the optional IVF partitioning.
+
+    Opening an index maps the vector file instead of reading it, so it starts in the time
+    it takes to read the records. Search is exact by default (one matrix-vector product and
+    an argpartition); after `build_ivf`, `search(..., nprobe=k)` only scans the rows of the
+    `k` nearest k-means cells.
+
+    Scores follow the Neo4j cosine vector index: (1 + cosine) / 2, in [0, 1].
+
+    Args:
+        path (str): Directory of the index. Created if missing.
+        dimensions (int): Vector length. Required when creating an index.
+    """
+
+    def __init__(self, path: str, dimensions: Optional[int] = None):
+        self.path = path
+        self._lock = threading.RLock()
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if dimensions is not None and dimensions != meta["dimensions"]:
+                raise ValueError(f"Index at {path} has {meta['dimensions']} dimensions, not {dimensions}")
+            self.dimensions = meta["dimensions"]
+            self.count = meta["count"]
+        elif dimensions is None:
+            raise ValueError(f"No index at {path}; pass dimensions to create one")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.dimensions = dimensions
+            self.count = 0
+            # rows appended by a run that never saved are dropped
+            open(os.path.join(path, "records.jsonl"), "w").close()
+
+        self.ids: List[str] = []
+        self.properties: List[Dict[str, Any]] = []
+        records_path = os.path.join(path, "records.jsonl")
+        if os.path.exists(records_path):
+            with open(records_path, "rb+") as f:
+                while len(self.ids) < self.count:
+                    record = json.loads(f.readline())
+                    self.ids.append(record["id"])
+                    self.properties.append(record["properties"])
+                # drop lines of an append that was interrupted before saving
+                f.truncate(f.tell())
+        self._vectors = self._map(max(self.count, 1))
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: Optional[np.ndarray] = None
+        centroids_path = os.path.join(path, "ivf-centroids.npy")
+        if os.path.exists(centroids_path):
+            self.centroids = np.load(centroids_path)
+            self.lists = np.load(os.path.join(path, "ivf-lists.npy"))[: self.count]
+
+    def _map(self, min_rows: int) -> np.memmap:
+        file_path = os.path.join(self.path, "vectors.f32")
+        row_bytes = self.dimensions * 4
+        rows = os.path.getsize(file_path) // row_bytes if os.path.exists(file_path) else 0
+        if rows < min_rows:
+            rows = max(min_rows, rows * 2, 1024)
+            with open(file_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        return np.memmap(file_path, dtype=np.float32, mode="r+", shape=(rows, self.dimensions))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], properties: Optional[Sequence[dict]] = None):
+        """Add rows and save. New rows are assigned to their IVF cell if the index has one."""
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dimensions))
+        properties = properties or [{} for _ in ids]
+        with self._lock:
+            start, end = self.count, self.count + len(ids)
+            if end > self._vectors.shape[0]:
+                self._vectors.flush()
+                self._vectors = self._map(end)
+            self._vectors[start:end] = matrix
+            with open(os.path.join(self.path, "records.jsonl"), "a") as f:
+                for id_, props in zip(ids, properties):
+                    f.write(json.dumps({"id": id_, "properties": props}) + "\n")
+            self.ids.extend(ids)
+            self.properties.extend(properties)
+            if self.centroids is not None:
+                self.lists = np.concatenate([self.lists, (matrix @ self.centroids.T).argmax(axis=1).astype(np.int32)])
+            self.count = end
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self._vectors.flush()
+            if self.centroids is not None:
+                np.save(os.path.join(self.path, "ivf-centroids.npy"), self.centroids)
+                np.save(os.path.join(self.path, "ivf-lists.npy"), self.lists)
+            tmp_path = os.path.join(self.path, "meta.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"dimensions": self.dimensions, "count": self.count}, f)
+            os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def build_ivf(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 50_000, seed: int = 0):
+        """
+        Partition the rows into `n_lists` cells (spherical k-means, default sqrt(count))
+        for approximate search. Rows appended later join their nearest cell.
+        """
+        if self.count == 0:
+            return
+        with self._lock:
+            vectors = self._vectors[: self.count]
+            n_lists = n_lists or max(1, int(np.sqrt(self.count)))
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(self.count, size=min(sample_size, self.count), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)].copy()
+            for _ in range(iterations):
+                assignment = (sample @ centroids.T).argmax(axis=1)
+                for cell in range(len(centroids)):
+                    members = sample[assignment == cell]
+                    if len(members):
+                        centroids[cell] = members.mean(axis=0)
+                centroids = self._normalize(centroids)
+            self.centroids = centroids
+            self.lists = np.empty(self.count, dtype=np.int32)
+            for start in range(0, self.count, 100_000):
+                block = vectors[start:start + 100_000]
+                self.lists[start:start + len(block)] = (block @ centroids.T).argmax(axis=1)
+            self.save()
+            logger.info(f"Built IVF index with {len(centroids)} cells over {self.count} vectors")
+
+    def search(self, query_vector: Sequence[float], top_k: int = 5, nprobe: Optional[int] = None) -> List[Tuple[str, float, dict]]:
+        """
+        Return the `top_k` most similar rows as (id, score, properties), best first.
+        With `nprobe` and an IVF partitioning, only the `nprobe` closest cells are scanned.
+        """
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32))
+        with self._lock:
+            vectors = self._vectors[: self.count]
+            if nprobe and self.centroids is not None:
+                cells = np.argsort(-(self.centroids @ query))[:nprobe]
+                rows = np.flatnonzero(np.isin(self.lists, cells))
+                similarities = vectors[rows] @ query
+            else:
+                rows = None
+                similarities = vectors @ query
+            k = min(top_k, len(similarities))
+            if k == 0:
+                return []
+            best = np.argpartition(-similarities, k - 1)[:k]
+            best = best[np.argsort(-similarities[best])]
+            results = []
+            for i in best:
+                row = int(rows[i]) if rows is not None else int(i)
+                results.append((self.ids[row], float((1 + similarities[i]) / 2), self.properties[row]))
+            return results
+
+    @classmethod
+    def from_neo4j(
+        cls,
+        driver: neo4j.Driver,
+        path: str,
+        label: str = "Chunk",
+        embedding_property: str = "embedding",
+        return_properties: Sequence[str] = ("text",),
+        batch_size: int = 1000,
+        neo4j_database: Optional[str] = None,
+    ) -> "LocalVectorIndex":
+        """Export the embeddings (and `return_properties`) of every `label` node into a new index at `path`."""
+        query = EXPORT_CHUNKS_QUERY.format(
+            label=label,
+            embedding_property=embedding_property,
+            properties=", ".join(f".{p}" for p in return_properties),
+        )
+        index = None
+        after = ""
+        while True:
+            records = driver.execute_query(
+                query, {"after": after, "batch_size": batch_size}, database_=neo4j_database
+            ).records
+            if not records:
+                break
+            if index is None:
+                index = cls(path, dimensions=len(records[0]["embedding"]))
+            index.append(
+                [r["id"] for r in records], [r["embedding"] for r in records], [dict(r["properties"]) for r in records]
+            )
+            after = records[-1]["id"]
+        if index is None:
+            raise ValueError(f"No {label} nodes with a {embedding_property} property to export")
+        logger.info(f"Exported {len(index)} {label} embeddings to {path}")
+        return index
+
+    @classmethod
+    def open_or_export(cls, driver: neo4j.Driver, path: str, **export_kwargs) -> "LocalVectorIndex":
+        """Open the index at `path`, exporting it from Neo4j first if it doesn't exist yet."""
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return cls(path)
+        return cls.from_neo4j(driver, path, **export_kwargs)
+
+
+class LocalVectorRetriever(Retriever):
+    """
+    Drop-in replacement for VectorRetriever that searches a LocalVectorIndex instead of
+    the Neo4j vector index, so retrieval makes no database round trip. Records have the
+    same shape as VectorRetriever's (node properties, score, id, nodeLabels).
+
+    Args:
+        index (LocalVectorIndex): The index to search.
+        embedder (Embedder): Embeds `query_text` when no `query_vector` is given.
+        nprobe (int): IVF cells scanned per query; None for exact search.
+        result_formatter (Callable): Optional record formatter, as for VectorRetriever.
+    """
+
+    VERIFY_NEO4J_VERSION = False
+
+    def __init__(
+        self,
+        index: LocalVectorIndex,
+        embedder: Optional[Embedder] = None,
+        nprobe: Optional[int] = None,
+        result_formatter: Optional[Callable[[neo4j.Record], RetrieverResultItem]] = None,
+        node_label: str = "Chunk",
+    ):
+        # no driver: nothing here talks to Neo4j
+        self.driver = None  # type: ignore
+        self.neo4j_database = None
+        self.index = index
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.result_formatter = result_formatter
+        self.node_label = node_label
+
+    def default_record_formatter(self, record: neo4j.Record) -> RetrieverResultItem:
+        metadata = {
+            "score": record.get("score"),
+            "nodeLabels": record.get("nodeLabels"),
+            "id": record.get("id"),
+        }
+        return RetrieverResultItem(content=str(record.get("node")), metadata=metadata)
+
+    def get_search_results(
+        self,
+        query_vector: Optional[list[float]] = None,
+        query_text: Optional[str] = None,
+        top_k: int = 5,
+        effective_search_ratio: int = 1,
+        filters: Optional[dict[str, Any]] = None,
+    ) -> RawSearchResult:
+        """Get the top_k nearest chunks for either `query_vector` or `query_text`."""
+        if (query_vector is None) == (query_text is None):
+            raise ValueError("You must provide exactly one of query_vector or query_text.")
+        if filters:
+            raise ValueError("Metadata filters are not supported by the local vector index")
+        if query_vector is None:
+            if self.embedder is None:
+                raise ValueError("Embedding method required for text query.")
+            query_vector = self.embedder.embed_query(query_text)  # type: ignore
+        records = [
+            neo4j.Record({"node": properties, "score": score, "id": id_, "nodeLabels": [self.node_label]})
+            for id_, score, properties in self.index.search(query_vector, top_k=top_k, nprobe=self.nprobe)
+        ]
+        return RawSearchResult(records=records)
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import glob
+import logging
+import time
+
+from fsspec.implementations.local import LocalFileSystem
+from neo4j_graphrag.experimental.components.pdf_loader import PdfLoader
+from neo4j_graphrag.experimental.components.schema import SchemaBuilder, SchemaEntity, SchemaRelation
+from neo4j_graphrag.experimental.components.text_splitters.fixed_size_splitter import FixedSizeSplitter
+
+from ingestion.prompt_compiler import CompiledExtractionTemplate, TokenCounter, dedupe
+from ingestion.text_splitter import TokenTextSplitter
+from sample_president_nodes import return_node_labels, return_prompt, return_rel_types
+
+logging.basicConfig(level=logging.WARNING)
+
+PDF_DIRECTORIES = ["sample-pdfs", "fifa-samples-pdfs"]
+
+
+def prompt_overhead() -> int:
+    """Fixed tokens of one extraction call, measured on the presidents prompt and schema."""
+    schema = SchemaBuilder.create_schema_model(
+        entities=[SchemaEntity.from_text_or_dict(e) for e in dedupe(return_node_labels())],
+        relations=[SchemaRelation.from_text_or_dict(r) for r in dedupe(return_rel_types())],
+    )
+    return CompiledExtractionTemplate(return_prompt()).overhead(schema.model_dump())
+
+
+async def benchmark(name, splitter, texts, counter, overhead, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [await splitter.run(text) for text in texts]
+    seconds = (time.perf_counter() - start) / repeat
+    chunks = [chunk.text for result in results for chunk in result.chunks]
+    text_tokens = sum(counter.count(chunk) for chunk in chunks)
+    print(
+        f"{name:<40} chunks={len(chunks):>4}  chunk tokens={text_tokens:>7}  "
+        f"tokens sent={text_tokens + overhead * len(chunks):>7}  "
+        f"max chunk={max(counter.count(c) for c in chunks):>5}  split time={seconds * 1000:8.1f} ms"
+    )
+
+
+async def main(chunk_tokens: int, overlap_tokens: int, repeat: int):
+    counter = TokenCounter()
+    overhead = prompt_overhead()
+    print(f"Prompt overhead per extraction call: {overhead} tokens\n")
+
+    for directory in PDF_DIRECTORIES:
+        paths = sorted(glob.glob(f"{directory}/*.pdf"))
+        texts = [PdfLoader.load_file(path, LocalFileSystem()) for path in paths]
+        characters = sum(len(t) for t in texts)
+        # both splitters get the same token budget: the character splitter's size is
+        # converted with this corpus's characters per token
+        chars_per_token = characters / max(1, sum(counter.count(t) for t in texts))
+        chunk_chars, overlap_chars = round(chunk_tokens * chars_per_token), round(overlap_tokens * chars_per_token)
+        print(f"{directory}: {len(paths)} files, {characters} characters, {chars_per_token:.2f} characters per token")
+        splitters = [
+            (
+                f"FixedSizeSplitter({chunk_chars} chars, {overlap_chars})",
+                FixedSizeSplitter(chunk_size=chunk_chars, chunk_overlap=overlap_chars, approximate=True),
+            ),
+            (
+                f"TokenTextSplitter({chunk_tokens} tokens, {overlap_tokens})",
+                TokenTextSplitter(chunk_size=chunk_tokens, chunk_overlap=overlap_tokens, token_counter=counter),
+            ),
+        ]
+        for name, splitter in splitters:
+            await benchmark(name, splitter, texts, counter, overhead, repeat)
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare text splitters on the sample PDFs at the same token budget.")
+    parser.add_argument("--chunk-tokens", type=int, default=1250, help="chunk size of both splitters, in tokens")
+    parser.add_argument("--overlap-tokens", type=int, default=25, help="overlap of both splitters, in tokens")
+    parser.add_argument("--repeat", type=int, default=3, help="runs averaged for the split time")
+    args = parser.parse_args()
+    asyncio.run(main(args.chunk_tokens, args.overlap_tokens, args.repeat))
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.llm import LLMInterface
+from neo4j_graphrag.llm.types import LLMResponse
+
+import ingestion.incremental
+from ingestion import BatchIngestor, IncrementalIngestor, IngestionManifest, LocalBatchBackend, TokenTextSplitter
+
+TEXT = "\n\n".join(
+    f"{name} is a player who scored many goals for the national team in the final."
+    for name in ("Alpha", "Bravo", "Charlie")
+)
+
+
+class _RecordingDriver:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, parameters_=None, database_=None, **kwargs):
+        self.queries.append((query, parameters_))
+
+
+class _Embedder(Embedder):
+    def embed_query(self, text):
+        return [0.1, 0.2]
+
+
+class _LLM(LLMInterface):
+    """Interactive extraction: one Person named after the first word of the prompt."""
+
+    def __init__(self):
+        super().__init__(model_name="fake")
+        self.prompts = []
+
+    def invoke(self, input, message_history=None, system_instruction=None):
+        self.prompts.append(input)
+        return LLMResponse(content=_graph(input))
+
+    async def ainvoke(self, input, message_history=None, system_instruction=None):
+        return self.invoke(input)
+
+
+class _TextLoader:
+    @staticmethod
+    def load_file(path, fs):
+        with open(path) as f:
+            return f.read()
+
+
+def _graph(prompt):
+    name = prompt.split()[0]
+    return json.dumps({"nodes": [{"id": "0", "label": "Person", "properties": {"name": name}}], "relationships": []})
+
+
+class _Invoke:
+    """Batch model: answers like _LLM, the records of chunks containing a word in `broken` fail."""
+
+    def __init__(self):
+        self.broken = set()
+        self.prompts = []
+
+    def __call__(self, body):
+        prompt = body["messages"][0]["content"][0]["text"]
+        self.prompts.append(prompt)
+        if any(word in prompt for word in self.broken):
+            raise RuntimeError("model error")
+        return {"content": [{"type": "text", "text": _graph(prompt)}], "usage": {"input_tokens": 10, "output_tokens": 5}}
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion.incremental, "PdfLoader", _TextLoader)
+    path = str(tmp_path / "doc.txt")
+    with open(path, "w") as f:
+        f.write(TEXT)
+    return path
+
+
+def _batch_ingestor(tmp_path, llm, driver, backend):
+    ingestor = IncrementalIngestor(
+        driver=driver,
+        llm=llm,
+        embedder=_Embedder(),
+        text_splitter=TokenTextSplitter(chunk_size=25, chunk_overlap=0, section_fill=0.5),
+        manifest=IngestionManifest(str(tmp_path / "manifest.json")),
+        entities=["Person"],
+        prompt_template="{schema}{examples}{text}",
+        perform_entity_resolution=False,
+    )
+    return BatchIngestor(ingestor, backend, work_dir=str(tmp_path / "batch"), poll_interval=0)
+
+
+def _written_chunks(driver):
+    return [row["properties"]["text"] for query, params in driver.queries if ":`Chunk`" in query for row in params["rows"]]
+
+
+def test_failed_records_are_submitted_again_on_the_next_run(tmp_path, monkeypatch):
+    path = _setup(tmp_path, monkeypatch)
+    llm, driver, invoke = _LLM(), _RecordingDriver(), _Invoke()
+    backend = LocalBatchBackend(invoke, work_dir=str(tmp_path / "jobs"))
+    invoke.broken = {"Bravo"}
+
+    batch = _batch_ingestor(tmp_path, llm, driver, backend)
+    stats = asyncio.run(batch.run([path]))
+    bravo_hash = next(
+        IngestionManifest.chunk_hash(chunk.text)
+        for chunk in asyncio.run(batch.ingestor.text_splitter.run(TEXT)).chunks
+        if "Bravo" in chunk.text
+    )
+    assert stats["records"] == 3 and stats["failed_records"] == 1 and stats["chunks_without_result"] == 1
+    assert stats["chunks_failed"] == 1 and stats["failed_chunk_hashes"] == [bravo_hash]
+    entry = batch.ingestor.manifest.files[path]
+    assert entry["file_hash"] is None and bravo_hash not in entry["chunks"] and len(entry["chunks"]) == 2
+    assert len(_written_chunks(driver)) == 2 and not any("Bravo" in text for text in _written_chunks(driver))
+    assert not llm.prompts
+
+    # next run: only the failed chunk is submitted
+    invoke.broken, invoke.prompts = set(), []
+    batch = _batch_ingestor(tmp_path, llm, driver, backend)
+    stats = asyncio.run(batch.run([path]))
+    assert stats["records"] == 1 and stats["chunks_failed"] == 0 and stats["failed_chunk_hashes"] == []
+    assert len(invoke.prompts) == 1 and "Bravo" in invoke.prompts[0]
+    assert batch.ingestor.manifest.files[path]["file_hash"] == IngestionManifest.file_hash(path)
+    assert len(batch.ingestor.manifest.files[path]["chunks"]) == 3
+
+
+def test_runs_below_the_minimum_job_size_use_interactive_calls(tmp_path, monkeypatch):
+    path = _setup(tmp_path, monkeypatch)
+    llm, driver, invoke = _LLM(), _RecordingDriver(), _Invoke()
+    backend = LocalBatchBackend(invoke, work_dir=str(tmp_path / "jobs"))
+    backend.min_records = 100
+
+    stats = asyncio.run(_batch_ingestor(tmp_path, llm, driver, backend).run([path]))
+    assert stats["extraction"] == "interactive" and stats["records"] == 0 and stats["job_id"] is None
+    assert len(llm.prompts) == 3 and not invoke.prompts and not os.path.exists(tmp_path / "jobs")
+    assert stats["chunks_processed"] == 3 and stats["chunks_failed"] == 0
+    assert len(_written_chunks(driver)) == 3
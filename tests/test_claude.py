@@ -0,0 +1,34 @@
+import io
+import json
+
+from bedrock.claude import Claude
+
+
+class _FakeBedrock:
+    def invoke_model_with_response_stream(self, body, **kwargs):
+        events = [
+            {"type": "message_start", "message": {"usage": {"input_tokens": 5}}},
+            {"type": "content_block_delta", "delta": {"text": "hello"}},
+            {"type": "message_delta", "usage": {"output_tokens": 2}},
+        ]
+        return {"body": [{"chunk": {"bytes": json.dumps(event).encode()}} for event in events]}
+
+    def invoke_model(self, body, **kwargs):
+        payload = {"content": [{"text": "hi"}], "usage": {"input_tokens": 3, "output_tokens": 1}}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+class _Pool:
+    def get(self, *args, **kwargs):
+        return _FakeBedrock()
+
+
+def test_stream_history_is_bounded_and_totals_cover_every_stream():
+    claude = Claude(client_pool=_Pool(), stream_history_size=3)
+    for _ in range(10):
+        assert "".join(claude.generate_response_stream("question")) == "hello"
+    assert len(claude.stream_history) == 3
+    stats = claude.stream_stats()
+    assert stats["streams"] == 10 and stats["cached"] == 0
+    assert stats["total_latency_p95_s"] >= stats["time_to_first_token_p50_s"] >= 0
+    assert claude.usage["input_tokens"] == 50 and claude.usage["output_tokens"] == 20
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from neo4j_graphrag.generation import RagTemplate
+from neo4j_graphrag.llm.types import LLMResponse
+from neo4j_graphrag.types import RetrieverResult, RetrieverResultItem
+
+import cli
+
+
+class _Resources:
+    """Stub QueryResources recording which components were built."""
+
+    def __init__(self):
+        self.built = []
+
+    def _rag(self, name):
+        self.built.append(name)
+        retriever = SimpleNamespace(search=lambda **kwargs: RetrieverResult(items=[RetrieverResultItem(content="context")]))
+        llm = SimpleNamespace(invoke=lambda prompt, system_instruction=None: LLMResponse(content=f"{name} answer"))
+        return SimpleNamespace(retriever=retriever, llm=llm, prompt_template=RagTemplate())
+
+    @property
+    def vector_rag(self):
+        return self._rag("vector_rag")
+
+    @property
+    def vc_rag(self):
+        return self._rag("vc_rag")
+
+    @property
+    def search(self):
+        self.built.append("search")
+        raise AssertionError("the search of every pipeline must not be built")
+
+    @property
+    def embedder(self):
+        return SimpleNamespace(embed_query=lambda text: [0.1, 0.2])
+
+    answer_cache = None
+
+
+def test_ask_builds_only_the_chosen_pipeline(capsys):
+    resources = _Resources()
+    args = cli.build_parser().parse_args(["ask", "What is GraphRAG?", "--pipeline", "vector"])
+    args.handler(args, resources)
+    assert resources.built == ["vector_rag"]
+    assert "vector_rag answer" in capsys.readouterr().out
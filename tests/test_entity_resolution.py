@@ -0,0 +1,64 @@
+import itertools
+
+from knowledge_graph.entity_resolution import EntityResolver, canonicalize
+
+
+def _resolve(names, label="Event"):
+    resolver = EntityResolver()
+    for name in names:
+        resolver.add(name, label)
+    return resolver
+
+
+def test_canonicalize():
+    assert canonicalize("FIFA_World-Cup") == canonicalize("fifa world cup") == "fifa world cup"
+
+
+def test_spelling_variants_merge():
+    resolver = _resolve(["fifa world cup", "fifa_world_cup", "FIFA World-Cup"])
+    assert len(resolver.nodes()) == 1
+
+
+def test_different_numbers_never_merge():
+    resolver = _resolve(["FIFA World Cup 2022", "FIFA World Cup 2018"])
+    assert resolver.canonical_id("FIFA World Cup 2022") != resolver.canonical_id("FIFA World Cup 2018")
+
+
+def test_generic_name_does_not_join_a_numbered_cluster():
+    names = ["fifa world cup", "fifa_world_cup", "FIFA World Cup 2022", "FIFA World Cup 2018"]
+    for order in itertools.permutations(names):
+        resolver = _resolve(order)
+        generic = resolver.canonical_id("fifa world cup")
+        assert resolver.canonical_id("fifa_world_cup") == generic
+        assert generic not in (resolver.canonical_id("FIFA World Cup 2018"), resolver.canonical_id("FIFA World Cup 2022"))
+        names_by_id = {node[0]: node[2]["name"] for node in resolver.nodes()}
+        assert len(names_by_id) == 3
+        assert names_by_id[resolver.canonical_id("FIFA World Cup 2018")] == "FIFA World Cup 2018"
+        assert names_by_id[resolver.canonical_id("FIFA World Cup 2022")] == "FIFA World Cup 2022"
+        assert canonicalize(names_by_id[generic]) == "fifa world cup"
+
+
+def test_edges_of_the_generic_name_stay_on_it():
+    resolver = EntityResolver()
+    result = resolver.resolve_results([
+        {
+            "Nodes": [["FIFA World Cup 2018", "Event", {}], ["fifa_world_cup", "Event", {}], ["Brazil", "Country", {}]],
+            "Edges": [["fifa_world_cup", "HELD_IN", "Brazil", {}]],
+        },
+        {"Nodes": [["fifa world cup", "Event", {}], ["FIFA World Cup 2022", "Event", {}]], "Edges": []},
+    ])
+    assert result["Edges"] == [["fifa world cup", "HELD_IN", "brazil", {}]]
+
+
+def test_name_comes_from_the_representative():
+    resolver = EntityResolver()
+    resolver.add("Lionel Messi", "Person")
+    resolver.add("Lionel Messi", "Person")
+    resolver.add("lionel_messi", "Person")
+    resolver.add("Lionel Mesi", "Person")
+    nodes = resolver.nodes()
+    assert len(nodes) == 1
+    node_id, label, properties = nodes[0]
+    assert node_id == "lionel messi"
+    assert properties["name"] == "Lionel Messi"
+    assert properties["aliases"] == ["Lionel Mesi", "Lionel Messi", "lionel_messi"]
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import re
+
+from neo4j_graphrag.experimental.components.types import TextChunk, TextChunks
+from neo4j_graphrag.llm import LLMInterface
+from neo4j_graphrag.llm.types import LLMResponse
+
+from ingestion import PackingExtractor
+
+NAMES = ["Alpha", "Bravo", "Charlie", "Delta"]
+SECTION = re.compile(r"### chunk (\d+)\n(\w+)")
+
+
+class _LLM(LLMInterface):
+    """
+    One Person per chunk, tagged with its chunk number in packed prompts. Names in
+    `untagged` come back without a tag; `linked` names are connected to the next chunk's.
+    """
+
+    def __init__(self, untagged=(), linked=()):
+        super().__init__(model_name="fake")
+        self.untagged = set(untagged)
+        self.linked = set(linked)
+        self.prompts = []
+
+    def invoke(self, input, message_history=None, system_instruction=None):
+        self.prompts.append(input)
+        sections = SECTION.findall(input) or [(None, input.split()[0])]
+        nodes, relationships = [], []
+        for i, (index, name) in enumerate(sections):
+            properties = {"name": name}
+            if index is not None and name not in self.untagged:
+                properties["chunk"] = int(index)
+            nodes.append({"id": f"n{i}", "label": "Person", "properties": properties})
+            if name in self.linked and i + 1 < len(sections):
+                relationships.append({"start_node_id": f"n{i}", "end_node_id": f"n{i + 1}", "type": "KNOWS", "properties": {}})
+        return LLMResponse(content=json.dumps({"nodes": nodes, "relationships": relationships}))
+
+    async def ainvoke(self, input, message_history=None, system_instruction=None):
+        return self.invoke(input)
+
+
+def _run(llm, max_tokens=1000):
+    chunks = [TextChunk(text=f"{name} scored in the final.", index=i) for i, name in enumerate(NAMES)]
+    extractor = PackingExtractor(llm=llm, prompt_template="{text}", max_tokens=max_tokens)
+    graph = asyncio.run(extractor.run(chunks=TextChunks(chunks=chunks)))
+    names = {node.id: node.properties["name"] for node in graph.nodes if node.label == "Person"}
+    chunk_texts = {chunk.chunk_id: chunk.text for chunk in chunks}
+    # entity -> text of the chunk it was attributed to, through the FROM_CHUNK relationships
+    attribution = {
+        names[rel.start_node_id]: chunk_texts[rel.end_node_id] for rel in graph.relationships if rel.type == "FROM_CHUNK"
+    }
+    return extractor, graph, attribution
+
+
+def test_chunks_share_one_call_and_keep_their_entities():
+    llm = _LLM()
+    extractor, graph, attribution = _run(llm)
+    assert len(llm.prompts) == 1
+    assert extractor.stats == {"calls": 1, "packed_calls": 1, "packed_chunks": 4, "fallback_chunks": 0}
+    assert attribution == {name: f"{name} scored in the final." for name in NAMES}
+    assert all("chunk" not in node.properties for node in graph.nodes)
+
+
+def test_budget_limits_the_pack():
+    llm = _LLM()
+    extractor, _, attribution = _run(llm, max_tokens=15)
+    # each chunk is ~7 tokens, so they go in pairs
+    assert len(llm.prompts) == 2 and extractor.stats["packed_chunks"] == 4
+    assert attribution == {name: f"{name} scored in the final." for name in NAMES}
+
+
+def test_untagged_node_sends_the_pack_to_single_calls():
+    llm = _LLM(untagged={"Charlie"})
+    extractor, _, attribution = _run(llm)
+    assert len(llm.prompts) == 1 + 4
+    assert extractor.stats["fallback_chunks"] == 4 and extractor.stats["packed_chunks"] == 0
+    assert attribution == {name: f"{name} scored in the final." for name in NAMES}
+
+
+def test_relationship_between_chunks_sends_both_to_single_calls():
+    llm = _LLM(linked={"Bravo"})
+    extractor, graph, attribution = _run(llm)
+    assert len(llm.prompts) == 1 + 2
+    assert extractor.stats["packed_chunks"] == 2 and extractor.stats["fallback_chunks"] == 2
+    assert [prompt.split()[0] for prompt in llm.prompts[1:]] == ["Bravo", "Charlie"]
+    assert attribution == {name: f"{name} scored in the final." for name in NAMES}
+    assert not [rel for rel in graph.relationships if rel.type == "KNOWS"]
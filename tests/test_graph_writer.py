@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from neo4j_graphrag.experimental.components.types import Neo4jGraph, Neo4jNode, Neo4jRelationship
+
+import knowledge_graph.fifa_nodes
+from ingestion.graph_writer import BulkGraphWriter
+
+
+class _RecordingDriver:
+    """Fake neo4j.Driver recording every execute_query call."""
+
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, parameters_=None, database_=None, **kwargs):
+        self.queries.append((query, (parameters_ or {}).get("rows")))
+
+
+def _batches(driver):
+    return [rows for _, rows in driver.queries if rows is not None]
+
+
+def test_nodes_and_relationships_are_batched_per_label_and_type():
+    driver = _RecordingDriver()
+    writer = BulkGraphWriter(driver, batch_size=100)
+    graph = Neo4jGraph(
+        nodes=[Neo4jNode(id=f"p{i}", label="Person") for i in range(250)]
+        + [Neo4jNode(id=f"c{i}", label="Country") for i in range(10)],
+        relationships=[
+            Neo4jRelationship(start_node_id=f"p{i}", end_node_id=f"c{i % 10}", type="BORN_IN") for i in range(250)
+        ],
+    )
+    writer.write_graph(graph)
+
+    # one index creation, then Person 100+100+50, Country 10, BORN_IN 100+100+50
+    assert len(driver.queries) == 1 + 3 + 1 + 3
+    assert [len(rows) for rows in _batches(driver)] == [100, 100, 50, 10, 100, 100, 50]
+    assert writer.stats == {"round_trips": 7, "nodes": 260, "relationships": 250, "retries": 0}
+
+
+def test_index_is_created_once():
+    driver = _RecordingDriver()
+    writer = BulkGraphWriter(driver, batch_size=500)
+    writer.write_nodes([{"id": "a", "label": "Person"}])
+    writer.write_nodes([{"id": "b", "label": "Person"}])
+    assert sum("CREATE INDEX" in query for query, _ in driver.queries) == 1
+    assert writer.stats["round_trips"] == 2
+
+
+def test_extraction_results_merge_nodes_by_lowercased_id():
+    driver = _RecordingDriver()
+    writer = BulkGraphWriter(driver)
+    writer.write_extraction_results([
+        {"Nodes": [["Messi", "Person", {"age": 37}], ["Argentina", "Country"]], "Edges": [["Messi", "PLAYS_FOR", "Argentina"]]},
+        {"Nodes": [["messi", "Person", {"club": "Inter Miami"}]], "Edges": []},
+    ])
+    batches = _batches(driver)
+    assert [len(rows) for rows in batches] == [1, 1, 1]
+    assert batches[0][0]["properties"] == {"name": "Messi", "age": 37, "club": "Inter Miami"}
+    assert batches[2] == [{"start_node_id": "messi", "end_node_id": "argentina", "properties": {}}]
+
+
+class _Network:
+    """Stands in for pyvis' Network so the test doesn't write fifa-edges.html."""
+
+    def __init__(self, **kwargs):
+        self.node_ids = []
+
+    def add_node(self, node_id, **kwargs):
+        self.node_ids.append(node_id)
+
+    def add_edge(self, source, to, **kwargs):
+        pass
+
+    def show(self, name):
+        pass
+
+
+def test_generate_nodes_writes_the_resolved_graph_only_when_asked(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_graph.fifa_nodes, "Network", _Network)
+    results_path = tmp_path / "results.json"
+    results_path.write_text(json.dumps([
+        {"Nodes": [["Lionel Messi", "Person", {}], ["Argentina", "Country", {}]], "Edges": [["Lionel Messi", "PLAYS_FOR", "Argentina", {}]]},
+        {"Nodes": [["lionel_messi", "Person", {"club": "Inter Miami"}]], "Edges": []},
+    ]))
+
+    without_writer = asyncio.run(knowledge_graph.fifa_nodes.generate_nodes(results_path=str(results_path)))
+    driver = _RecordingDriver()
+    with_writer = asyncio.run(
+        knowledge_graph.fifa_nodes.generate_nodes(results_path=str(results_path), graph_writer=BulkGraphWriter(driver))
+    )
+
+    assert with_writer == without_writer == (["Person", "Country"], ["PLAYS_FOR"], [("Person", "PLAYS_FOR", "Country")])
+    # the spelling variants of Messi are merged before writing: Person 1, Country 1, PLAYS_FOR 1
+    batches = _batches(driver)
+    assert [len(rows) for rows in batches] == [1, 1, 1]
+    assert batches[2] == [{"start_node_id": "lionel messi", "end_node_id": "argentina", "properties": {}}]
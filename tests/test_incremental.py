@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from neo4j_graphrag.embeddings.base import Embedder
+from neo4j_graphrag.llm import LLMInterface
+from neo4j_graphrag.llm.types import LLMResponse
+
+import ingestion.incremental
+from ingestion import IncrementalIngestor, IngestionManifest, TokenTextSplitter
+
+TEXT = "\n\n".join(
+    f"{name} is a player who scored many goals for the national team in the final."
+    for name in ("Alpha", "Bravo", "Charlie")
+)
+
+
+class _RecordingDriver:
+    def __init__(self):
+        self.queries = []
+
+    def execute_query(self, query, parameters_=None, database_=None, **kwargs):
+        self.queries.append((query, parameters_))
+
+
+class _Embedder(Embedder):
+    def embed_query(self, text):
+        return [0.1, 0.2]
+
+
+class _LLM(LLMInterface):
+    """Returns one Person per chunk; answers garbage for chunks containing a word in `broken`."""
+
+    def __init__(self):
+        super().__init__(model_name="fake")
+        self.broken = set()
+        self.prompts = []
+
+    def invoke(self, input, message_history=None, system_instruction=None):
+        self.prompts.append(input)
+        if any(word in input for word in self.broken):
+            return LLMResponse(content="not json")
+        name = input.split()[0]
+        return LLMResponse(content=json.dumps({"nodes": [{"id": "0", "label": "Person", "properties": {"name": name}}], "relationships": []}))
+
+    async def ainvoke(self, input, message_history=None, system_instruction=None):
+        return self.invoke(input)
+
+
+class _TextLoader:
+    @staticmethod
+    def load_file(path, fs):
+        with open(path) as f:
+            return f.read()
+
+
+def _ingestor(tmp_path, llm, driver):
+    return IncrementalIngestor(
+        driver=driver,
+        llm=llm,
+        embedder=_Embedder(),
+        text_splitter=TokenTextSplitter(chunk_size=25, chunk_overlap=0, section_fill=0.5),
+        manifest=IngestionManifest(str(tmp_path / "manifest.json")),
+        entities=["Person"],
+        prompt_template="{schema}{examples}{text}",
+        perform_entity_resolution=False,
+    )
+
+
+def test_failed_chunks_are_extracted_again_on_the_next_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion.incremental, "PdfLoader", _TextLoader)
+    path = str(tmp_path / "doc.txt")
+    with open(path, "w") as f:
+        f.write(TEXT)
+    llm, driver = _LLM(), _RecordingDriver()
+    llm.broken = {"Bravo"}
+
+    ingestor = _ingestor(tmp_path, llm, driver)
+    stats = asyncio.run(ingestor.run([path]))
+    assert stats["chunks_processed"] == 3 and stats["chunks_failed"] == 1
+    entry = ingestor.manifest.files[path]
+    assert entry["file_hash"] is None and len(entry["chunks"]) == 2
+    written_chunks = [
+        row["properties"]["text"] for query, params in driver.queries if ":`Chunk`" in query for row in params["rows"]
+    ]
+    assert len(written_chunks) == 2 and not any("Bravo" in text for text in written_chunks)
+
+    # next run: the file is loaded again, only the failed chunk is extracted
+    llm.broken, llm.prompts = set(), []
+    ingestor = _ingestor(tmp_path, llm, driver)
+    stats = asyncio.run(ingestor.run([path]))
+    assert stats["files_skipped"] == 0 and stats["chunks_processed"] == 1 and stats["chunks_failed"] == 0
+    assert len(llm.prompts) == 1 and "Bravo" in llm.prompts[0]
+    assert ingestor.manifest.files[path]["file_hash"] == IngestionManifest.file_hash(path)
+    assert len(ingestor.manifest.files[path]["chunks"]) == 3
+
+    # and the one after skips it
+    assert asyncio.run(_ingestor(tmp_path, llm, driver).run([path]))["files_skipped"] == 1
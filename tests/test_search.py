@@ -0,0 +1,20 @@
+from neo4j_graphrag.types import RetrieverResult, RetrieverResultItem
+
+from rag.expansion import GraphExpansion
+from rag.search import context_ids
+
+
+def test_context_ids_of_vector_results():
+    result = RetrieverResult(items=[
+        RetrieverResultItem(content="a", metadata={"id": "4:abc:1", "score": 0.9}),
+        RetrieverResultItem(content="b", metadata=None),
+    ])
+    assert context_ids(result) == ["4:abc:1"]
+
+
+def test_context_ids_of_graph_expansion_results():
+    expansion = GraphExpansion(max_context_tokens=None)
+    assert "elementId(chunk)" in expansion.retrieval_query
+    item = expansion.result_formatter({"texts": ["chunk one", "chunk two"], "ids": ["4:abc:1", "4:abc:2"], "rels": ["A - R() -> B"]})
+    assert item.metadata == {"ids": ["4:abc:1", "4:abc:2"], "relationships": 1}
+    assert context_ids(RetrieverResult(items=[item])) == ["4:abc:1", "4:abc:2"]
@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from neo4j_graphrag.generation import RagTemplate
+from neo4j_graphrag.llm.types import LLMResponse
+from neo4j_graphrag.types import RetrieverResult, RetrieverResultItem
+
+from rag.server import QueryServer
+
+RETRIEVAL_SECONDS = 0.5
+
+
+class _SlowRetriever:
+    def search(self, query_vector=None, **kwargs):
+        time.sleep(RETRIEVAL_SECONDS)
+        return RetrieverResult(items=[RetrieverResultItem(content="context", metadata={"id": "chunk-1"})])
+
+
+class _LLM:
+    def invoke(self, prompt, system_instruction=None):
+        return LLMResponse(content="answer")
+
+
+class _Embedder:
+    def embed_query(self, text):
+        return [0.1, 0.2]
+
+
+def _resources():
+    rag = SimpleNamespace(retriever=_SlowRetriever(), llm=_LLM(), prompt_template=RagTemplate())
+    return SimpleNamespace(
+        rags={"Vector": rag, "Vector + Cypher": rag}, embedder=_Embedder(), answer_cache=None, build_times={}
+    )
+
+
+def _post(port, question):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/search",
+        data=json.dumps({"question": question}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def test_concurrent_searches_overlap():
+    server = QueryServer(_resources(), port=0, max_concurrent=6)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"warm_up": False, "install_signal_handlers": False})
+    thread.start()
+    try:
+        while server._httpd is None:
+            time.sleep(0.01)
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda i: _post(server.port, f"question {i}"), range(6)))
+        elapsed = time.perf_counter() - start_time
+    finally:
+        server.shutdown()
+        thread.join(timeout=10)
+
+    assert all(result["answers"] == {"Vector": "answer", "Vector + Cypher": "answer"} for result in results)
+    # 6 requests x 2 pipelines run side by side, instead of queueing on 2 threads (6 x the retrieval time)
+    assert elapsed < 3 * RETRIEVAL_SECONDS
+    assert server.stats["requests"] == 6 and server.stats["errors"] == 0
@@ -1,19 +1,11 @@
-def extract_labels_and_relationships(data):
-    node_labels = set()
-    rel_types = set()
+from knowledge_graph.schema_profiler import SchemaProfiler
 
-    # Extract node labels
-    for node in data.get("Nodes", []):
-        if len(node) > 1:
-            node_labels.add(node[1])
 
-    # Extract relationship types
-    for edge in data.get("Edges", []):
-        if len(edge) > 1:
-            rel_types.add(edge[1])
+def extract_labels_and_relationships(data):
+    profiler = SchemaProfiler()
+    profiler.add_result(data)
 
     return {
-        "node-labels": sorted(node_labels),
-        "rel_types": sorted(rel_types)
+        "node-labels": sorted(profiler.label_counts),
+        "rel_types": sorted(profiler.relationship_counts)
     }
- 
\ No newline at end of file